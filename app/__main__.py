@@ -0,0 +1,455 @@
+"""
+Command-line tools for Voltmatic Energy Solutions Site Survey App
+
+Admin and batch jobs that run without a display. Only the database layer
+and the pure-Python engines are imported, never Kivy:
+
+    python -m app stats
+    python -m app export site_surveys -o surveys.csv
+    python -m app import backup.json
+    python -m app re-quote --status pending
+    python -m app vacuum
+    python -m app maintain --budget-ms 1000
+    python -m app backup --keep 7
+    python -m app snapshots --verify
+    python -m app restore voltmatic-20240301-181500
+    python -m app generate --rows 100000
+    python -m app benchmark -o before.json
+    python -m app benchmark --compare before.json
+    python -m app integrity
+
+Every command takes --db to pick the database (default data/voltmatic.db).
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.database import DatabaseManager
+from app.geo import parse_coordinates
+from app.journal import JOURNALED_TABLES
+from app.storage import connect
+
+DEFAULT_DB_PATH = os.path.join('data', 'voltmatic.db')
+FORMATS = ('json', 'csv', 'vrec')
+
+
+def _print(data, as_json: bool):
+    if as_json:
+        print(json.dumps(data, indent=2, default=str))
+        return
+    for key, value in data.items():
+        if isinstance(value, dict):
+            print(f"{key}:")
+            for inner_key, inner_value in value.items():
+                print(f"  {inner_key:<24} {inner_value}")
+        else:
+            print(f"{key:<26} {value}")
+
+
+def _file_format(path: str, given: Optional[str]) -> str:
+    if given:
+        return given
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    if extension not in FORMATS:
+        raise SystemExit(f"Cannot tell the format of {path}; pass --format ({', '.join(FORMATS)})")
+    return extension
+
+
+def _iter_table(db_path: str, table: str) -> Iterator[Dict]:
+    """Stream a table's rows without holding them all in memory"""
+    with connect(db_path) as conn:
+        conn.row_factory = sqlite3.Row
+        for row in conn.execute(f"SELECT * FROM {table} ORDER BY id"):
+            yield dict(row)
+
+
+# -- Commands ----------------------------------------------------------------
+
+def cmd_stats(db: DatabaseManager, args) -> int:
+    """Row counts, sync backlog and file size"""
+    report = db.analytics
+    with connect(db.db_path) as conn:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    conversion = report.conversion()
+    _print({
+        'database': db.db_path,
+        'counts': db.get_dashboard_counts(),
+        'surveys_by_status': conversion['by_status'],
+        'conversion_rate': round(conversion['conversion_rate'], 3),
+        'due_follow_ups': len(db.get_due_followups()),
+        'unsynced_changes': db.journal.pending_count(),
+        'size_bytes': page_size * pages,
+        'free_bytes': page_size * free_pages,
+    }, args.json)
+    return 0
+
+
+def cmd_export(db: DatabaseManager, args) -> int:
+    """Write one table (csv, vrec) or every synced table (json) to a file"""
+    fmt = _file_format(args.output, args.format)
+    tables = [args.table] if args.table else list(JOURNALED_TABLES)
+    if fmt != 'json' and len(tables) != 1:
+        raise SystemExit(f"{fmt} exports hold one table; name it")
+
+    count = 0
+    if fmt == 'json':
+        data = {table: list(_iter_table(db.db_path, table)) for table in tables}
+        count = sum(len(rows) for rows in data.values())
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(data, f, default=str)
+    elif fmt == 'csv':
+        with open(args.output, 'w', newline='', encoding='utf-8') as f:
+            writer = None
+            for row in _iter_table(db.db_path, tables[0]):
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow(row)
+                count += 1
+    else:
+        from app.wire import write_records
+
+        def counted(rows):
+            nonlocal count
+            for row in rows:
+                count += 1
+                yield row
+
+        with open(args.output, 'wb') as f:
+            write_records(f, counted(_iter_table(db.db_path, tables[0])))
+    print(f"Exported {count} rows to {args.output}")
+    return 0
+
+
+def _read_import(path: str, fmt: str, table: Optional[str]) -> Dict[str, List[Dict]]:
+    if fmt == 'json':
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            if not table:
+                raise SystemExit("A JSON list needs --table")
+            return {table: data}
+        return data
+    if not table:
+        raise SystemExit(f"{fmt} imports need --table")
+    if fmt == 'csv':
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        for row in rows:
+            for key in ('id', 'client_id'):
+                if row.get(key):
+                    row[key] = int(row[key])
+        return {table: rows}
+    from app.wire import read_records
+    with open(path, 'rb') as f:
+        return {table: list(read_records(f))}
+
+
+def cmd_import(db: DatabaseManager, args) -> int:
+    """Load rows exported by `export`, clients first so references can be remapped"""
+    data = _read_import(args.input, _file_format(args.input, args.format), args.table)
+    unknown = set(data) - set(JOURNALED_TABLES)
+    if unknown:
+        raise SystemExit(f"Unknown tables: {', '.join(sorted(unknown))}")
+
+    client_ids = None
+    for table in JOURNALED_TABLES:
+        if table not in data:
+            continue
+        ids = db.import_rows(table, data[table], client_ids)
+        if table == 'clients':
+            client_ids = ids
+        print(f"{table}: {len(ids)} of {len(data[table])} rows imported or already present")
+    return 0
+
+
+def cmd_requote(db: DatabaseManager, args) -> int:
+    """Recompute recommended size and cost for surveys with the current sizing model"""
+    from app.sizing import recommend_for_survey
+
+    query = '''
+        SELECT s.id, s.monthly_spending, s.system_type, s.recommended_system_size, s.estimated_cost,
+               c.location_coordinates
+        FROM site_surveys s LEFT JOIN clients c ON c.id = s.client_id
+    '''
+    params = []
+    if args.status:
+        query += " WHERE s.status = ?"
+        params.append(args.status)
+
+    with connect(db.db_path) as conn:
+        conn.row_factory = sqlite3.Row
+        surveys = [dict(row) for row in conn.execute(query, params)]
+        updates = []
+        for survey in surveys:
+            size, cost = recommend_for_survey(survey, {'location_coordinates': survey['location_coordinates']})
+            if (size, cost) != (survey['recommended_system_size'], survey['estimated_cost']):
+                updates.append((size, cost, survey['id']))
+        if not args.dry_run:
+            conn.executemany(
+                "UPDATE site_surveys SET recommended_system_size = ?, estimated_cost = ? WHERE id = ?", updates
+            )
+            conn.commit()
+    print(f"{len(updates)} of {len(surveys)} surveys {'would change' if args.dry_run else 'updated'}")
+    return 0
+
+
+def cmd_vacuum(db: DatabaseManager, args) -> int:
+    """Rebuild the file to reclaim free pages and refresh planner statistics"""
+    before = os.path.getsize(db.db_path)
+    start = time.perf_counter()
+    conn = connect(db.db_path, isolation_level=None)
+    try:
+        # Also switches older files to the incremental mode app.maintenance uses
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    after = os.path.getsize(db.db_path)
+    print(f"{before} -> {after} bytes in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+def cmd_maintain(db: DatabaseManager, args) -> int:
+    """Run one time-boxed maintenance pass: checkpoint, incremental vacuum, ANALYZE"""
+    from app.maintenance import DatabaseMaintenance, format_report
+
+    report = DatabaseMaintenance(db.db_path).run(args.budget_ms, checkpoint_mode='TRUNCATE')
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 0
+
+
+def _backups(db: DatabaseManager, args):
+    from app.backup import BackupManager, backup_directory
+
+    return BackupManager(db.db_path, args.dir or backup_directory(db.db_path), keep=args.keep)
+
+
+def cmd_backup(db: DatabaseManager, args) -> int:
+    """Take a compressed, checksummed snapshot with the online backup API"""
+    manifest = _backups(db, args).create(args.label)
+    print(f"{manifest['name']}: {manifest['bytes']} bytes, {manifest['compressed_bytes']} compressed"
+          f" in {manifest['seconds']:.2f}s")
+    return 0
+
+
+def cmd_snapshots(db: DatabaseManager, args) -> int:
+    """List snapshots, newest first; --verify checks their checksums"""
+    from app.backup import SnapshotError, format_snapshots
+
+    backups = _backups(db, args)
+    manifests = backups.snapshots()
+    failed = 0
+    if args.verify or args.deep:
+        for manifest in manifests:
+            try:
+                backups.verify(manifest['name'], deep=args.deep)
+                manifest['verified'] = 'ok'
+            except SnapshotError as e:
+                manifest['verified'] = str(e)
+                failed += 1
+    if args.json:
+        _print(manifests, True)
+    else:
+        print(format_snapshots(manifests))
+        for manifest in manifests:
+            if manifest.get('verified', 'ok') != 'ok':
+                print(f"  {manifest['verified']}")
+    return 1 if failed else 0
+
+
+def cmd_restore(db: DatabaseManager, args) -> int:
+    """Replace the database's contents with a verified snapshot"""
+    from app.backup import SnapshotError
+
+    try:
+        manifest = _backups(db, args).restore(args.snapshot, safety_snapshot=not args.no_safety)
+    except SnapshotError as e:
+        raise SystemExit(f"Restore error: {e}")
+    print(f"Restored {manifest['name']}"
+          + (f"; previous data saved as {manifest['safety_snapshot']}" if manifest.get('safety_snapshot') else ''))
+    return 0
+
+
+def cmd_generate(db: DatabaseManager, args) -> int:
+    """Fill the database with seeded synthetic clients, surveys, calls and visits"""
+    from app.dataset import generate_dataset
+
+    if db.get_dashboard_counts().get('clients') and not args.force:
+        raise SystemExit(f"{db.db_path} already has clients; pass --force to add more")
+    start = time.perf_counter()
+    counts = generate_dataset(db.db_path, args.rows, args.seed, synced=not args.journal)
+    print(', '.join(f"{count} {table}" for table, count in counts.items())
+          + f" in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+def cmd_benchmark(db: DatabaseManager, args) -> int:
+    """Time every DatabaseManager method and report latency percentiles"""
+    from app.benchmarks import compare, format_comparison, format_results, load_results, run_benchmarks, save_results
+
+    report = run_benchmarks(db, args.repeat, args.seed, args.only)
+    if args.output:
+        save_results(report, args.output)
+    if args.compare:
+        rows = compare(load_results(args.compare), report, args.metric)
+        print(json.dumps(rows, indent=2) if args.json else format_comparison(rows, args.metric))
+    else:
+        print(json.dumps(report, indent=2) if args.json else format_results(report))
+    return 0
+
+
+def cmd_integrity(db: DatabaseManager, args) -> int:
+    """SQLite integrity and foreign keys, rollup totals, orphans and missing uids"""
+    problems = []
+    with connect(db.db_path) as conn:
+        result = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+        if result != ['ok']:
+            problems += [f"integrity_check: {line}" for line in result]
+        for table, rowid, parent, _ in conn.execute("PRAGMA foreign_key_check"):
+            problems.append(f"{table} row {rowid} points at a missing {parent} row")
+
+        actual = {
+            'clients': conn.execute("SELECT COUNT(*) FROM clients").fetchone()[0],
+            'site_surveys': conn.execute("SELECT COUNT(*) FROM site_surveys").fetchone()[0],
+            'pending_surveys': conn.execute(
+                "SELECT COUNT(*) FROM site_surveys WHERE status = 'pending'"
+            ).fetchone()[0],
+            'call_logs': conn.execute("SELECT COUNT(*) FROM call_logs").fetchone()[0],
+        }
+        rollups = dict(conn.execute("SELECT name, row_count FROM rollup_counts"))
+        for name, count in actual.items():
+            if rollups.get(name, 0) != count:
+                problems.append(f"rollup {name} is {rollups.get(name, 0)}, table has {count}")
+
+        for table in JOURNALED_TABLES:
+            missing = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE uid IS NULL").fetchone()[0]
+            if missing:
+                problems.append(f"{table}: {missing} rows without a uid")
+
+        for row in conn.execute("SELECT id, location_coordinates FROM clients WHERE latitude IS NULL "
+                                "AND COALESCE(location_coordinates, '') != ''"):
+            if parse_coordinates(row[1]):
+                problems.append(f"client {row[0]} has unparsed coordinates {row[1]!r}")
+
+        if problems and args.repair:
+            from app.analytics import rebuild_rollups
+            rebuild_rollups(conn.cursor())
+            conn.commit()
+            print("Rollups rebuilt")
+
+    for problem in problems:
+        print(problem)
+    print("ok" if not problems else f"{len(problems)} problem(s) found")
+    return 1 if problems else 0
+
+
+COMMANDS = {
+    'stats': cmd_stats,
+    'export': cmd_export,
+    'import': cmd_import,
+    're-quote': cmd_requote,
+    'vacuum': cmd_vacuum,
+    'maintain': cmd_maintain,
+    'backup': cmd_backup,
+    'snapshots': cmd_snapshots,
+    'restore': cmd_restore,
+    'generate': cmd_generate,
+    'benchmark': cmd_benchmark,
+    'integrity': cmd_integrity,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m app', description="Voltmatic admin and batch tools")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="SQLite database (default %(default)s)")
+    parser.add_argument('--profile', metavar='PATH', help="Record database calls and dump them to PATH as JSON")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    stats = commands.add_parser('stats', help=cmd_stats.__doc__)
+    stats.add_argument('--json', action='store_true')
+
+    export = commands.add_parser('export', help=cmd_export.__doc__)
+    export.add_argument('table', nargs='?', choices=JOURNALED_TABLES)
+    export.add_argument('-o', '--output', required=True)
+    export.add_argument('--format', choices=FORMATS, help="Default: from the file extension")
+
+    import_ = commands.add_parser('import', help=cmd_import.__doc__)
+    import_.add_argument('input')
+    import_.add_argument('--table', choices=JOURNALED_TABLES, help="Table for csv, vrec or JSON list files")
+    import_.add_argument('--format', choices=FORMATS, help="Default: from the file extension")
+
+    requote = commands.add_parser('re-quote', help=cmd_requote.__doc__)
+    requote.add_argument('--status', help="Only surveys with this status, e.g. pending")
+    requote.add_argument('--dry-run', action='store_true')
+
+    commands.add_parser('vacuum', help=cmd_vacuum.__doc__)
+
+    maintain = commands.add_parser('maintain', help=cmd_maintain.__doc__)
+    maintain.add_argument('--budget-ms', type=float, default=1000.0, help="Time box (default %(default)s)")
+    maintain.add_argument('--json', action='store_true')
+
+    backup_options = argparse.ArgumentParser(add_help=False)
+    backup_options.add_argument('--dir', help="Snapshot directory (default backups/ beside the database)")
+    backup_options.add_argument('--keep', type=int, default=7, help="Snapshots kept (default %(default)s)")
+
+    backup = commands.add_parser('backup', parents=[backup_options], help=cmd_backup.__doc__)
+    backup.add_argument('--label', help="Appended to the snapshot name")
+
+    snapshots = commands.add_parser('snapshots', parents=[backup_options], help=cmd_snapshots.__doc__)
+    snapshots.add_argument('--verify', action='store_true')
+    snapshots.add_argument('--deep', action='store_true', help="Also decompress and check each database")
+    snapshots.add_argument('--json', action='store_true')
+
+    restore = commands.add_parser('restore', parents=[backup_options], help=cmd_restore.__doc__)
+    restore.add_argument('snapshot', help="Snapshot name, as listed by 'snapshots'")
+    restore.add_argument('--no-safety', action='store_true', help="Skip the pre-restore snapshot of current data")
+
+    generate = commands.add_parser('generate', help=cmd_generate.__doc__)
+    generate.add_argument('--rows', type=int, default=10000, help="Approximate total rows (default %(default)s)")
+    generate.add_argument('--seed', type=int, default=1)
+    generate.add_argument('--journal', action='store_true', help="Keep the rows in the change journal as unsynced")
+    generate.add_argument('--force', action='store_true', help="Add rows even if the database has clients")
+
+    benchmark = commands.add_parser('benchmark', help=cmd_benchmark.__doc__)
+    benchmark.add_argument('--repeat', type=int, default=20)
+    benchmark.add_argument('--seed', type=int, default=1, help="Seed for the arguments each case picks")
+    benchmark.add_argument('--only', help="Regular expression selecting cases by name")
+    benchmark.add_argument('-o', '--output', help="Save the results as JSON")
+    benchmark.add_argument('--compare', metavar='RESULTS', help="Compare against results saved by --output")
+    benchmark.add_argument('--metric', default='p50_ms', help="Metric to compare (default %(default)s)")
+    benchmark.add_argument('--json', action='store_true')
+
+    integrity = commands.add_parser('integrity', help=cmd_integrity.__doc__)
+    integrity.add_argument('--repair', action='store_true', help="Rebuild rollups if they disagree")
+    return parser
+
+
+def main(argv: Optional[Tuple[str, ...]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command not in ('import', 'generate') and not os.path.exists(args.db):
+        raise SystemExit(f"No database at {args.db}")
+    if os.path.dirname(args.db):
+        os.makedirs(os.path.dirname(args.db), exist_ok=True)
+    recorder = None
+    if args.profile:
+        from app.instrumentation import QueryRecorder, install
+        recorder = install(QueryRecorder())
+    db = DatabaseManager(args.db)
+    try:
+        return COMMANDS[args.command](db, args)
+    finally:
+        if recorder:
+            print(f"Query profile written to {recorder.dump(args.profile)}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
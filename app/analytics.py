@@ -0,0 +1,295 @@
+"""
+Incremental analytics rollups for Voltmatic Energy Solutions Site Survey App
+
+Summary tables are kept current by SQLite triggers on every insert, update
+and delete, so reports read a handful of pre-aggregated rows instead of
+scanning surveys and call logs.
+"""
+import sqlite3
+from typing import Dict, List, Optional
+
+from app.storage import connect
+
+# Months come from the integer timestamps, which already fall back to
+# created_at; a date nobody could parse is counted under month ''
+_SURVEY_MONTH = "COALESCE(strftime('%Y-%m', {row}.survey_ts, 'unixepoch'), '')"
+_CALL_MONTH = "COALESCE(strftime('%Y-%m', {row}.call_ts, 'unixepoch'), '')"
+
+# Survey statuses that count as a won job; rejected or cancelled ones don't
+CONVERTED_STATUSES = ('completed', 'approved')
+
+ROLLUP_TABLES = {
+    'rollup_surveys': '''
+        CREATE TABLE IF NOT EXISTS rollup_surveys (
+            month TEXT NOT NULL,
+            surveyor_name TEXT NOT NULL,
+            system_type TEXT NOT NULL,
+            status TEXT NOT NULL,
+            survey_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, surveyor_name, system_type, status)
+        ) WITHOUT ROWID
+    ''',
+    'rollup_survey_transitions': '''
+        CREATE TABLE IF NOT EXISTS rollup_survey_transitions (
+            from_status TEXT NOT NULL,
+            to_status TEXT NOT NULL,
+            transition_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (from_status, to_status)
+        ) WITHOUT ROWID
+    ''',
+    'rollup_calls': '''
+        CREATE TABLE IF NOT EXISTS rollup_calls (
+            month TEXT NOT NULL,
+            call_outcome TEXT NOT NULL,
+            call_count INTEGER NOT NULL DEFAULT 0,
+            follow_up_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, call_outcome)
+        ) WITHOUT ROWID
+    ''',
+    'rollup_counts': '''
+        CREATE TABLE IF NOT EXISTS rollup_counts (
+            name TEXT PRIMARY KEY,
+            row_count INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''',
+}
+
+
+def _survey_delta(row: str, sign: str) -> str:
+    """Trigger statements adding one OLD/NEW survey row to rollup_surveys"""
+    month = _SURVEY_MONTH.format(row=row)
+    surveyor = f"COALESCE({row}.surveyor_name, '')"
+    system_type = f"COALESCE({row}.system_type, '')"
+    status = f"COALESCE({row}.status, '')"
+    return f'''
+        INSERT OR IGNORE INTO rollup_surveys (month, surveyor_name, system_type, status)
+        VALUES ({month}, {surveyor}, {system_type}, {status});
+        UPDATE rollup_surveys SET survey_count = survey_count {sign} 1
+        WHERE month = {month} AND surveyor_name = {surveyor}
+          AND system_type = {system_type} AND status = {status};
+    '''
+
+
+def _call_delta(row: str, sign: str) -> str:
+    """Trigger statements adding one OLD/NEW call row to rollup_calls"""
+    month = _CALL_MONTH.format(row=row)
+    outcome = f"COALESCE({row}.call_outcome, '')"
+    return f'''
+        INSERT OR IGNORE INTO rollup_calls (month, call_outcome) VALUES ({month}, {outcome});
+        UPDATE rollup_calls
+        SET call_count = call_count {sign} 1,
+            follow_up_count = follow_up_count {sign} (COALESCE({row}.follow_up_required, 0) != 0)
+        WHERE month = {month} AND call_outcome = {outcome};
+    '''
+
+
+def _count_delta(name: str, sign: str, condition: str = '1') -> str:
+    return f'''
+        UPDATE rollup_counts SET row_count = row_count {sign} ({condition}) WHERE name = '{name}';
+    '''
+
+
+ROLLUP_TRIGGERS = {
+    'rollup_surveys_insert': f'''
+        CREATE TRIGGER IF NOT EXISTS rollup_surveys_insert AFTER INSERT ON site_surveys
+        BEGIN
+            {_survey_delta('NEW', '+')}
+            {_count_delta('site_surveys', '+')}
+            {_count_delta('pending_surveys', '+', "NEW.status = 'pending'")}
+        END
+    ''',
+    'rollup_surveys_update': f'''
+        CREATE TRIGGER IF NOT EXISTS rollup_surveys_update
+        AFTER UPDATE OF survey_ts, surveyor_name, system_type, status ON site_surveys
+        BEGIN
+            {_survey_delta('OLD', '-')}
+            {_survey_delta('NEW', '+')}
+            {_count_delta('pending_surveys', '-', "OLD.status = 'pending'")}
+            {_count_delta('pending_surveys', '+', "NEW.status = 'pending'")}
+            INSERT OR IGNORE INTO rollup_survey_transitions (from_status, to_status)
+            SELECT COALESCE(OLD.status, ''), COALESCE(NEW.status, '')
+            WHERE OLD.status IS NOT NEW.status;
+            UPDATE rollup_survey_transitions SET transition_count = transition_count + 1
+            WHERE from_status = COALESCE(OLD.status, '') AND to_status = COALESCE(NEW.status, '')
+              AND OLD.status IS NOT NEW.status;
+        END
+    ''',
+    'rollup_surveys_delete': f'''
+        CREATE TRIGGER IF NOT EXISTS rollup_surveys_delete AFTER DELETE ON site_surveys
+        BEGIN
+            {_survey_delta('OLD', '-')}
+            {_count_delta('site_surveys', '-')}
+            {_count_delta('pending_surveys', '-', "OLD.status = 'pending'")}
+        END
+    ''',
+    'rollup_calls_insert': f'''
+        CREATE TRIGGER IF NOT EXISTS rollup_calls_insert AFTER INSERT ON call_logs
+        BEGIN
+            {_call_delta('NEW', '+')}
+            {_count_delta('call_logs', '+')}
+        END
+    ''',
+    'rollup_calls_update': f'''
+        CREATE TRIGGER IF NOT EXISTS rollup_calls_update
+        AFTER UPDATE OF call_ts, call_outcome, follow_up_required ON call_logs
+        BEGIN
+            {_call_delta('OLD', '-')}
+            {_call_delta('NEW', '+')}
+        END
+    ''',
+    'rollup_calls_delete': f'''
+        CREATE TRIGGER IF NOT EXISTS rollup_calls_delete AFTER DELETE ON call_logs
+        BEGIN
+            {_call_delta('OLD', '-')}
+            {_count_delta('call_logs', '-')}
+        END
+    ''',
+    'rollup_clients_insert': f'''
+        CREATE TRIGGER IF NOT EXISTS rollup_clients_insert AFTER INSERT ON clients
+        BEGIN
+            {_count_delta('clients', '+')}
+        END
+    ''',
+    'rollup_clients_delete': f'''
+        CREATE TRIGGER IF NOT EXISTS rollup_clients_delete AFTER DELETE ON clients
+        BEGIN
+            {_count_delta('clients', '-')}
+        END
+    ''',
+}
+
+
+def _normalized_sql(sql: str) -> str:
+    return ' '.join(sql.replace('IF NOT EXISTS ', '').split())
+
+
+def install_rollups(cursor):
+    """Create rollup tables and triggers, rebuilding the tables if new or if a trigger changed
+
+    Needs the survey_ts and call_ts columns, which the triggers read.
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'rollup_%'")
+    existing = {row[0] for row in cursor.fetchall()}
+    cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'rollup_%'")
+    triggers = dict(cursor.fetchall())
+
+    for ddl in ROLLUP_TABLES.values():
+        cursor.execute(ddl)
+    stale = False
+    for name, ddl in ROLLUP_TRIGGERS.items():
+        if name in triggers and _normalized_sql(triggers[name]) != _normalized_sql(ddl):
+            # Written by an older version, e.g. grouping on date text
+            cursor.execute(f"DROP TRIGGER {name}")
+            stale = True
+        cursor.execute(ddl)
+
+    if not set(ROLLUP_TABLES) <= existing:
+        rebuild_rollups(cursor)
+    elif stale:
+        # Status transitions can't be recomputed from the base tables
+        cursor.execute("SELECT from_status, to_status, transition_count FROM rollup_survey_transitions")
+        transitions = cursor.fetchall()
+        rebuild_rollups(cursor)
+        cursor.executemany(
+            "INSERT INTO rollup_survey_transitions (from_status, to_status, transition_count) VALUES (?, ?, ?)",
+            transitions
+        )
+
+
+def rebuild_rollups(cursor):
+    """Recompute every rollup table from the base tables"""
+    for table in ROLLUP_TABLES:
+        cursor.execute(f"DELETE FROM {table}")
+
+    cursor.execute(f'''
+        INSERT INTO rollup_surveys (month, surveyor_name, system_type, status, survey_count)
+        SELECT {_SURVEY_MONTH.format(row='s')}, COALESCE(s.surveyor_name, ''),
+               COALESCE(s.system_type, ''), COALESCE(s.status, ''), COUNT(*)
+        FROM site_surveys s
+        GROUP BY 1, 2, 3, 4
+    ''')
+    cursor.execute(f'''
+        INSERT INTO rollup_calls (month, call_outcome, call_count, follow_up_count)
+        SELECT {_CALL_MONTH.format(row='l')}, COALESCE(l.call_outcome, ''),
+               COUNT(*), SUM(COALESCE(l.follow_up_required, 0) != 0)
+        FROM call_logs l
+        GROUP BY 1, 2
+    ''')
+    cursor.execute('''
+        INSERT INTO rollup_counts (name, row_count)
+        SELECT 'clients', COUNT(*) FROM clients
+        UNION ALL SELECT 'site_surveys', COUNT(*) FROM site_surveys
+        UNION ALL SELECT 'pending_surveys', COUNT(*) FROM site_surveys WHERE status = 'pending'
+        UNION ALL SELECT 'call_logs', COUNT(*) FROM call_logs
+    ''')
+
+
+class AnalyticsReport:
+    """Management reports served entirely from the rollup tables"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    def _query(self, sql: str, params=()) -> List[Dict]:
+        with connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return [dict(row) for row in cursor.fetchall()]
+
+    def counts(self) -> Dict[str, int]:
+        """Totals for clients, surveys, pending surveys and call logs"""
+        return {row['name']: row['row_count']
+                for row in self._query("SELECT name, row_count FROM rollup_counts")}
+
+    def surveys_per_month(self, since: Optional[str] = None) -> List[Dict]:
+        """Survey count per "YYYY-MM" month"""
+        return self._query('''
+            SELECT month, SUM(survey_count) AS surveys FROM rollup_surveys
+            WHERE month >= ?
+            GROUP BY month HAVING surveys > 0 ORDER BY month
+        ''', (since or '',))
+
+    def surveys_per_surveyor(self, month: Optional[str] = None) -> List[Dict]:
+        """Survey count per surveyor, optionally for a single month"""
+        return self._query('''
+            SELECT surveyor_name, SUM(survey_count) AS surveys FROM rollup_surveys
+            WHERE ? IS NULL OR month = ?
+            GROUP BY surveyor_name HAVING surveys > 0 ORDER BY surveys DESC
+        ''', (month, month))
+
+    def surveys_per_system_type(self, month: Optional[str] = None) -> List[Dict]:
+        """Survey count per system type, optionally for a single month"""
+        return self._query('''
+            SELECT system_type, SUM(survey_count) AS surveys FROM rollup_surveys
+            WHERE ? IS NULL OR month = ?
+            GROUP BY system_type HAVING surveys > 0 ORDER BY surveys DESC
+        ''', (month, month))
+
+    def conversion(self) -> Dict:
+        """Surveys per status and the share that reached one of CONVERTED_STATUSES"""
+        by_status = {row['status']: row['surveys'] for row in self._query('''
+            SELECT status, SUM(survey_count) AS surveys FROM rollup_surveys GROUP BY status
+        ''')}
+        placeholders = ', '.join('?' * len(CONVERTED_STATUSES))
+        converted = self._query(f'''
+            SELECT COALESCE(SUM(transition_count), 0) AS converted FROM rollup_survey_transitions
+            WHERE from_status = 'pending' AND to_status IN ({placeholders})
+        ''', CONVERTED_STATUSES)[0]['converted']
+        total = sum(by_status.values())
+        won = sum(by_status.get(status, 0) for status in CONVERTED_STATUSES)
+        return {
+            'by_status': by_status,
+            'converted_from_pending': converted,
+            'pending': by_status.get('pending', 0),
+            'conversion_rate': won / total if total else 0.0
+        }
+
+    def call_outcomes(self, month: Optional[str] = None) -> List[Dict]:
+        """Call and follow-up counts per outcome, optionally for a single month"""
+        return self._query('''
+            SELECT call_outcome, SUM(call_count) AS calls, SUM(follow_up_count) AS follow_ups
+            FROM rollup_calls
+            WHERE ? IS NULL OR month = ?
+            GROUP BY call_outcome HAVING calls > 0 ORDER BY calls DESC
+        ''', (month, month))
@@ -0,0 +1,332 @@
+"""
+Backups for Voltmatic Energy Solutions Site Survey App
+
+Copying the database file while the app has it open can capture a torn
+write. Snapshots are taken with SQLite's online backup API instead, a few
+pages per step on a worker thread, so writers are only held up between
+steps and the UI never waits. Each snapshot is gzip-compressed and has a
+JSON manifest beside it with SHA-256 checksums of both the compressed file
+(checked quickly, without decompressing) and the database inside it.
+Only the newest `keep` snapshots are kept.
+
+Restoring verifies a snapshot, checks the decompressed database's
+integrity, saves a 'pre-restore' snapshot of the current data, then copies
+the snapshot in with the backup API, which replaces the live database
+inside one transaction.
+
+    backups = BackupManager(db.db_path, backup_directory(db.disk_path))
+    backups.create_async(on_done=print)
+    backups.restore(backups.snapshots()[0]['name'])
+"""
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from app.cache import entity_cache
+from app.journal import JOURNALED_TABLES
+from app.storage import connect
+
+# Pages copied per backup step, and the pause after each that lets writers in
+PAGES_PER_STEP = 64
+STEP_PAUSE_SECONDS = 0.002
+# Snapshots kept per directory; older ones are deleted after each new one
+DEFAULT_KEEP = 7
+# Automatic snapshots are taken when the newest is older than this
+BACKUP_INTERVAL_SECONDS = 24 * 3600
+COMPRESS_LEVEL = 6
+CHUNK_BYTES = 1024 * 1024
+
+SNAPSHOT_SUFFIX = '.db.gz'
+MANIFEST_SUFFIX = '.json'
+PARTIAL_SUFFIX = '.partial'
+
+
+class SnapshotError(Exception):
+    """A snapshot is missing, fails its checksums or holds a damaged database"""
+
+
+class BackupCancelled(Exception):
+    pass
+
+
+def backup_directory(db_path: Optional[str]) -> str:
+    """Where snapshots of a database file go by default: backups/ beside it"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path or os.path.join('data', 'voltmatic.db'))),
+                        'backups')
+
+
+def file_sha256(path: str, opener=open) -> str:
+    digest = hashlib.sha256()
+    with opener(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BackupManager:
+    """Creates, lists, verifies and restores snapshots of one database"""
+
+    def __init__(self, db_path: str, directory: str, keep: int = DEFAULT_KEEP, prefix: str = 'voltmatic'):
+        self.db_path = db_path
+        self.directory = directory
+        self.keep = keep
+        self.prefix = prefix
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    # -- Creating ------------------------------------------------------------
+
+    def create(self, label: Optional[str] = None, progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """Take a snapshot now (on the calling thread); returns its manifest
+
+        progress(remaining, total) is called after every step, in pages.
+        """
+        with self._lock:
+            self._cancel.clear()
+            os.makedirs(self.directory, exist_ok=True)
+            now = datetime.now()
+            name = self._new_name(now, label)
+            raw_path = os.path.join(self.directory, name + PARTIAL_SUFFIX)
+            gz_path = os.path.join(self.directory, name + SNAPSHOT_SUFFIX + PARTIAL_SUFFIX)
+            start = time.perf_counter()
+            try:
+                manifest = self._copy(raw_path, progress)
+                manifest['db_sha256'] = file_sha256(raw_path)
+                self._compress(raw_path, gz_path)
+                manifest.update({
+                    'name': name,
+                    'label': label,
+                    'created': now.isoformat(timespec='seconds'),
+                    'compressed_bytes': os.path.getsize(gz_path),
+                    'sha256': file_sha256(gz_path),
+                })
+                manifest['seconds'] = round(time.perf_counter() - start, 3)
+                # The snapshot counts once its manifest exists
+                os.replace(gz_path, self._path(name))
+                self._write_manifest(name, manifest)
+            finally:
+                for path in (raw_path, gz_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+            self.rotate()
+            return manifest
+
+    def _new_name(self, now: datetime, label: Optional[str]) -> str:
+        base = f"{self.prefix}-{now:%Y%m%d-%H%M%S}" + (f"-{label}" if label else '')
+        name, n = base, 1
+        while os.path.exists(self._path(name)):
+            n += 1
+            name = f"{base}-{n}"
+        return name
+
+    def _copy(self, raw_path: str, progress: Optional[Callable[[int, int], None]]) -> Dict:
+        """Online backup into raw_path, a few pages per step"""
+        def on_step(status, remaining, total):
+            if self._cancel.is_set():
+                raise BackupCancelled()
+            if progress:
+                progress(remaining, total)
+            # Gives other threads the GIL and writers a gap between steps
+            time.sleep(STEP_PAUSE_SECONDS)
+
+        source = connect(self.db_path)
+        target = sqlite3.connect(raw_path)
+        try:
+            source.backup(target, pages=PAGES_PER_STEP, progress=on_step)
+            # The copy is a plain rollback-journal file whatever the source uses
+            target.execute("PRAGMA journal_mode = DELETE")
+            counts = {}
+            for table in JOURNALED_TABLES:
+                try:
+                    counts[table] = target.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                except sqlite3.OperationalError:
+                    pass
+            page_size = target.execute("PRAGMA page_size").fetchone()[0]
+            pages = target.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            target.close()
+            source.close()
+        return {'bytes': os.path.getsize(raw_path), 'page_size': page_size, 'pages': pages, 'counts': counts}
+
+    def _compress(self, raw_path: str, gz_path: str):
+        with open(raw_path, 'rb') as src, gzip.open(gz_path, 'wb', compresslevel=COMPRESS_LEVEL) as dst:
+            for chunk in iter(lambda: src.read(CHUNK_BYTES), b''):
+                if self._cancel.is_set():
+                    raise BackupCancelled()
+                dst.write(chunk)
+
+    def create_async(self, label: Optional[str] = None, on_done: Optional[Callable[[Optional[Dict]], None]] = None,
+                     progress: Optional[Callable[[int, int], None]] = None) -> Future:
+        """Take a snapshot on the worker thread
+
+        on_done(manifest) runs on the worker thread (manifest is None if the
+        backup failed or was cancelled); schedule UI updates from it with
+        the Clock.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(1, thread_name_prefix='backup')
+
+        def run():
+            manifest = None
+            try:
+                manifest = self.create(label, progress)
+            except BackupCancelled:
+                pass
+            except (OSError, sqlite3.Error) as e:
+                print(f"Backup error: {e}")
+            if on_done:
+                on_done(manifest)
+            return manifest
+
+        return self._executor.submit(run)
+
+    def create_if_due(self, interval: float = BACKUP_INTERVAL_SECONDS,
+                      on_done: Optional[Callable[[Optional[Dict]], None]] = None) -> Optional[Future]:
+        """Start a background snapshot if the newest one is older than interval"""
+        snapshots = self.snapshots()
+        if snapshots and time.time() - os.path.getmtime(self._path(snapshots[0]['name'])) < interval:
+            return None
+        return self.create_async(on_done=on_done)
+
+    def cancel(self):
+        """Stop a snapshot in progress; its partial files are removed"""
+        self._cancel.set()
+
+    def close(self):
+        self.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    # -- Listing and rotation ------------------------------------------------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name + SNAPSHOT_SUFFIX)
+
+    def _manifest_path(self, name: str) -> str:
+        return os.path.join(self.directory, name + MANIFEST_SUFFIX)
+
+    def _write_manifest(self, name: str, manifest: Dict):
+        partial = self._manifest_path(name) + PARTIAL_SUFFIX
+        with open(partial, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(partial, self._manifest_path(name))
+
+    def manifest(self, name: str) -> Dict:
+        try:
+            with open(self._manifest_path(name), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"No readable manifest for {name}: {e}")
+
+    def snapshots(self) -> List[Dict]:
+        """Manifests of the complete snapshots, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        manifests = []
+        for entry in os.listdir(self.directory):
+            if entry.startswith(self.prefix + '-') and entry.endswith(MANIFEST_SUFFIX):
+                name = entry[:-len(MANIFEST_SUFFIX)]
+                if os.path.exists(self._path(name)):
+                    try:
+                        manifests.append(self.manifest(name))
+                    except SnapshotError:
+                        continue
+        # Names order snapshots only to the second; file times break ties
+        return sorted(manifests, key=lambda manifest: (manifest['created'], os.path.getmtime(self._path(manifest['name']))),
+                      reverse=True)
+
+    def rotate(self) -> List[str]:
+        """Delete all but the newest `keep` snapshots; returns the names removed"""
+        removed = []
+        for manifest in self.snapshots()[self.keep:]:
+            for path in (self._path(manifest['name']), self._manifest_path(manifest['name'])):
+                if os.path.exists(path):
+                    os.remove(path)
+            removed.append(manifest['name'])
+        return removed
+
+    # -- Verifying and restoring ---------------------------------------------
+
+    def verify(self, name: str, deep: bool = False) -> Dict:
+        """Check a snapshot's checksum; deep also decompresses it and checks the database
+
+        Raises SnapshotError on any mismatch.
+        """
+        manifest = self.manifest(name)
+        path = self._path(name)
+        if not os.path.exists(path):
+            raise SnapshotError(f"{name} is missing its {SNAPSHOT_SUFFIX} file")
+        if file_sha256(path) != manifest['sha256']:
+            raise SnapshotError(f"{name} is damaged: checksum mismatch")
+        if deep:
+            raw_path = os.path.join(self.directory, name + '.verify' + PARTIAL_SUFFIX)
+            try:
+                self._decompress(name, manifest, raw_path)
+            finally:
+                if os.path.exists(raw_path):
+                    os.remove(raw_path)
+        return manifest
+
+    def _decompress(self, name: str, manifest: Dict, raw_path: str):
+        """Unpack a snapshot to raw_path and check what comes out"""
+        digest = hashlib.sha256()
+        try:
+            with gzip.open(self._path(name), 'rb') as src, open(raw_path, 'wb') as dst:
+                for chunk in iter(lambda: src.read(CHUNK_BYTES), b''):
+                    digest.update(chunk)
+                    dst.write(chunk)
+        except (OSError, EOFError) as e:
+            raise SnapshotError(f"{name} cannot be decompressed: {e}")
+        if digest.hexdigest() != manifest['db_sha256']:
+            raise SnapshotError(f"{name} is damaged: database checksum mismatch")
+        conn = sqlite3.connect(raw_path)
+        try:
+            result = conn.execute("PRAGMA quick_check").fetchone()[0]
+        except sqlite3.DatabaseError as e:
+            result = str(e)
+        finally:
+            conn.close()
+        if result != 'ok':
+            raise SnapshotError(f"{name} holds a damaged database: {result}")
+
+    def restore(self, name: str, safety_snapshot: bool = True) -> Dict:
+        """Replace the database's contents with a snapshot's; returns its manifest
+
+        Other connections see the old data until the copy commits, then the
+        new. Reopen the app afterwards so schema migrations and cached
+        state catch up.
+        """
+        manifest = self.verify(name)
+        raw_path = os.path.join(self.directory, name + '.restore' + PARTIAL_SUFFIX)
+        try:
+            self._decompress(name, manifest, raw_path)
+            if safety_snapshot:
+                manifest['safety_snapshot'] = self.create('pre-restore')['name']
+            source = sqlite3.connect(raw_path)
+            target = connect(self.db_path)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+        finally:
+            if os.path.exists(raw_path):
+                os.remove(raw_path)
+        entity_cache(self.db_path).clear()
+        return manifest
+
+
+def format_snapshots(manifests: List[Dict]) -> str:
+    lines = [f"{'name':<40} {'created':<20} {'size':>10} {'rows':>8}"]
+    for manifest in manifests:
+        rows = sum(manifest.get('counts', {}).values())
+        lines.append(f"{manifest['name']:<40} {manifest['created']:<20} {manifest['compressed_bytes']:>10} {rows:>8}")
+    return '\n'.join(lines)
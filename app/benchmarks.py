@@ -0,0 +1,270 @@
+"""
+DatabaseManager benchmark suite for Voltmatic Energy Solutions Site Survey App
+
+Times every public DatabaseManager method against a generated dataset (see
+app.dataset) and reports latency percentiles. Results are saved as JSON
+with the commit and dataset they came from, so two runs can be compared:
+
+    python -m app --db /tmp/bench.db generate --rows 100000
+    python -m app --db /tmp/bench.db benchmark --output before.json
+    ... change something ...
+    python -m app --db /tmp/bench.db benchmark --compare before.json
+
+The suite runs on a temporary copy of the database, so write cases leave
+the real file, its change journal and its field versions untouched, and
+repeated runs see the same data.
+"""
+import json
+import platform
+import random
+import os
+import re
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.storage import connect
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Summary of timings in milliseconds (nearest-rank percentiles)"""
+    ordered = sorted(samples)
+    summary = {'runs': len(ordered)}
+    if not ordered:
+        return summary
+    for p in PERCENTILES:
+        rank = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))
+        summary[f'p{p}_ms'] = round(ordered[rank] * 1000, 4)
+    summary['min_ms'] = round(ordered[0] * 1000, 4)
+    summary['max_ms'] = round(ordered[-1] * 1000, 4)
+    summary['mean_ms'] = round(sum(ordered) / len(ordered) * 1000, 4)
+    return summary
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class BenchmarkSuite:
+    """Timed cases for each DatabaseManager method, with arguments drawn from the data"""
+
+    def __init__(self, db, repeat: int = 20, seed: int = 1):
+        self.db = db
+        self.repeat = repeat
+        self.rng = random.Random(seed)
+        with connect(db.db_path) as conn:
+            self.client_ids = [row[0] for row in conn.execute("SELECT id FROM clients")]
+            self.visit_dates = [row[0] for row in conn.execute(
+                "SELECT visit_date FROM site_visits GROUP BY visit_date ORDER BY COUNT(*) DESC LIMIT 50"
+            )]
+            self.points = [tuple(row) for row in conn.execute(
+                "SELECT latitude, longitude FROM clients WHERE latitude IS NOT NULL LIMIT 1000"
+            )] or [(-1.286, 36.817)]
+        self._doomed = []
+        self.scratch = {}
+
+    def client_id(self) -> Optional[int]:
+        return self.rng.choice(self.client_ids) if self.client_ids else None
+
+    def point(self) -> Tuple[float, float]:
+        return self.rng.choice(self.points)
+
+    def uncached(self, method: Callable, *args):
+        """Call a cache-backed read on a cold cache, so every sample runs the query"""
+        self.db.cache.clear()
+        return method(*args)
+
+    def date_range(self, days: int = 30) -> Tuple[str, str]:
+        """A window of days ending on a date the data is busy on"""
+        end = datetime.strptime(self.rng.choice(self.visit_dates or [datetime.now().strftime('%Y-%m-%d')]), '%Y-%m-%d')
+        return (end - timedelta(days=days - 1)).strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+
+    # -- Cases -------------------------------------------------------------
+
+    def _new_client(self) -> Dict:
+        lat, lon = self.point()
+        return {'name': 'Benchmark Client', 'phone': '0700000000', 'email': '', 'address': 'Bench',
+                'location_coordinates': f"{lat + 0.001}, {lon + 0.001}"}
+
+    def cases(self) -> List[Tuple[str, Callable[[], object]]]:
+        """(name, call) pairs; each call picks its own arguments"""
+        db = self.db
+        today = datetime.now().strftime('%Y-%m-%d')
+        return [
+            # Reads
+            ('get_dashboard_counts', db.get_dashboard_counts),
+            ('get_clients', db.get_clients),
+            ('get_client', lambda: db.get_client(self.client_id())),
+            ('get_site_surveys', db.get_site_surveys),
+            ('get_site_surveys[client]', lambda: self.uncached(db.get_site_surveys, self.client_id())),
+            ('get_site_surveys[30d,status]', lambda: db.get_site_surveys(None, *self.date_range(), status='pending')),
+            ('get_recent_surveys', db.get_recent_surveys),
+            ('get_call_logs', db.get_call_logs),
+            ('get_call_logs[client]', lambda: self.uncached(db.get_call_logs, self.client_id())),
+            ('get_call_logs[30d]', lambda: db.get_call_logs(None, *self.date_range())),
+            ('get_due_followups', db.get_due_followups),
+            ('get_pending_followups', db.get_pending_followups),
+            ('get_site_visits[date]', lambda: db.get_site_visits(self.rng.choice(self.visit_dates or [today]))),
+            ('get_site_visits[client]', lambda: db.get_site_visits(client_id=self.client_id())),
+            ('get_client_timeline', lambda: db.get_client_timeline(self.client_id())),
+            ('clients_within[5km]', lambda: db.clients_within(5, self.point())),
+            ('nearest_clients[10]', lambda: db.nearest_clients(self.point(), 10)),
+            ('plan_day_route', lambda: db.plan_day_route(self.rng.choice(self.visit_dates or [today]))),
+            ('analytics.surveys_per_month', db.analytics.surveys_per_month),
+            ('analytics.conversion', db.analytics.conversion),
+            # Writes, into the suite's scratch copy
+            ('add_client', lambda: db.add_client(self._new_client())),
+            ('set_client_location', lambda: db.set_client_location(
+                self.scratch['client'], '{:.5f}, {:.5f}'.format(*self.point()))),
+            ('add_site_survey', lambda: db.add_site_survey({
+                'client_id': self.scratch['client'], 'surveyor_name': 'Bench', 'system_type': 'Hybrid',
+                'monthly_spending': 5000.0})),
+            ('add_call_log', lambda: db.add_call_log({
+                'client_id': self.scratch['client'], 'call_outcome': 'Interested',
+                'follow_up_required': True, 'follow_up_date': today})),
+            ('complete_followup', lambda: db.complete_followup(self.scratch['call'])),
+            ('add_site_visit', lambda: db.add_site_visit({
+                'client_id': self.scratch['client'], 'visit_date': today, 'visit_time': '10:00'})),
+            ('update_site_visit_status', lambda: db.update_site_visit_status(self.scratch['visit'], 'completed')),
+            ('import_rows[10 clients]', lambda: db.import_rows(
+                'clients', [dict(self._new_client(), id=-n) for n in range(1, 11)])),
+            ('delete_client', lambda: db.delete_client(self._doomed.pop())),
+        ]
+
+    def _setup(self):
+        """Rows the write cases update, attach children to or delete"""
+        db = self.db
+        client = db.add_client(self._new_client())
+        self.scratch = {
+            'client': client,
+            'call': db.add_call_log({'client_id': client, 'follow_up_required': True}),
+            'visit': db.add_site_visit({'client_id': client, 'visit_date': '2000-01-01'}),
+        }
+        # One client per timed delete plus the warm-up
+        self._doomed = [db.add_client(self._new_client()) for _ in range(self.repeat + 1)]
+
+    def run(self, only: Optional[str] = None) -> Dict[str, Dict]:
+        """Time each case `repeat` times, after one untimed warm-up call"""
+        pattern = re.compile(only) if only else None
+        results = {}
+        self._setup()
+        for name, call in self.cases():
+            if pattern and not pattern.search(name):
+                continue
+            call()
+            samples = []
+            for _ in range(self.repeat):
+                start = time.perf_counter()
+                call()
+                samples.append(time.perf_counter() - start)
+            results[name] = percentiles(samples)
+        return results
+
+
+def dataset_summary(db_path: str) -> Dict[str, int]:
+    with connect(db_path) as conn:
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ('clients', 'site_surveys', 'call_logs', 'site_visits')}
+
+
+def run_metadata(db_path: str, **extra) -> Dict:
+    """Where and on what a run happened, saved next to its results"""
+    meta = {
+        'commit': _commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'machine': platform.machine(),
+        'dataset': dataset_summary(db_path),
+    }
+    meta.update(extra)
+    return meta
+
+
+def _copy_database(source_path: str, target_path: str):
+    source = connect(source_path)
+    target = connect(target_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def run_benchmarks(db, repeat: int = 20, seed: int = 1, only: Optional[str] = None) -> Dict:
+    """Run the suite on a scratch copy of db, in db's mode, and wrap the results for comparison"""
+    from app.database import DatabaseManager
+
+    mode = getattr(db, 'mode', 'file')
+    directory = tempfile.mkdtemp(prefix='voltmatic-bench-')
+    scratch = None
+    try:
+        if mode == 'memory':
+            scratch = DatabaseManager(mode='memory')
+            _copy_database(db.db_path, scratch.db_path)
+        else:
+            # Mirror mode loads its RAM copy from the file, so fill the file first
+            path = os.path.join(directory, 'bench.db')
+            _copy_database(db.db_path, path)
+            scratch = DatabaseManager(path, mode=mode)
+        results = BenchmarkSuite(scratch, repeat, seed).run(only)
+    finally:
+        if scratch is not None:
+            scratch.close()
+        shutil.rmtree(directory, ignore_errors=True)
+    return {
+        'meta': run_metadata(db.db_path, mode=mode, repeat=repeat, seed=seed),
+        'results': results,
+    }
+
+
+def save_results(report: Dict, path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+
+def load_results(path: str) -> Dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(before: Dict, after: Dict, metric: str = 'p50_ms') -> List[Dict]:
+    """Per-case change in a metric between two saved reports"""
+    rows = []
+    for name, result in after['results'].items():
+        old = before['results'].get(name, {}).get(metric)
+        new = result.get(metric)
+        rows.append({
+            'case': name,
+            'before': old,
+            'after': new,
+            'change': (new - old) / old if old and new is not None else None,
+        })
+    return rows
+
+
+def format_results(report: Dict) -> str:
+    lines = [f"{'case':<28}" + ''.join(f"{f'p{p}':>11}" for p in PERCENTILES) + f"{'max':>11}"]
+    for name, result in report['results'].items():
+        lines.append(f"{name:<28}" + ''.join(f"{result[f'p{p}_ms']:>9.3f}ms" for p in PERCENTILES)
+                     + f"{result['max_ms']:>9.3f}ms")
+    return '\n'.join(lines)
+
+
+def format_comparison(rows: List[Dict], metric: str = 'p50_ms') -> str:
+    lines = [f"{'case':<28}{'before':>12}{'after':>12}{'change':>10}   ({metric})"]
+    for row in rows:
+        change = f"{row['change']:+.1%}" if row['change'] is not None else 'new'
+        before = f"{row['before']:.3f}" if row['before'] is not None else '-'
+        lines.append(f"{row['case']:<28}{before:>12}{row['after']:>12.3f}{change:>10}")
+    return '\n'.join(lines)
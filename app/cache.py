@@ -0,0 +1,128 @@
+"""
+Entity cache for Voltmatic Energy Solutions Site Survey App
+
+Per-client row lists (a client's surveys, a client's call logs) kept in
+memory so drilling into a client does not wait on a query. The cache is
+shared by every DatabaseManager on the same database, bounded by an
+estimated size in bytes (least recently used entries go first) and
+invalidated by the DatabaseManager writes that touch a client's rows.
+Entries also expire after a while, as a safety net for writes made
+outside the app (sync pulls clear the whole cache).
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+ENTRY_TTL_SECONDS = 300
+# Rough per-row and per-value overheads of a dict of short strings
+ROW_OVERHEAD_BYTES = 240
+VALUE_OVERHEAD_BYTES = 50
+
+
+def estimate_size(rows: List[Dict]) -> int:
+    """Approximate memory held by a list of rows (dicts or app.records records)"""
+    size = 64
+    for row in rows:
+        size += ROW_OVERHEAD_BYTES
+        for value in row.values():
+            size += VALUE_OVERHEAD_BYTES + (len(value) if isinstance(value, (str, bytes)) else 8)
+    return size
+
+
+class EntityCache:
+    """Thread-safe LRU of row lists keyed by (kind, key)"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, ttl: float = ENTRY_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # Bumped by every invalidation; rows read before a bump may be stale
+        self.epoch = 0
+        self._entries: 'OrderedDict[Tuple[str, Hashable], Tuple[float, int, List[Dict]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, item: Tuple[str, Hashable]) -> bool:
+        with self._lock:
+            entry = self._entries.get(item)
+            return entry is not None and time.monotonic() - entry[0] < self.ttl
+
+    def get(self, kind: str, key: Hashable) -> Optional[List[Dict]]:
+        """Copies of the cached rows, or None"""
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is None or time.monotonic() - entry[0] >= self.ttl:
+                if entry is not None:
+                    self._drop((kind, key))
+                self.misses += 1
+                return None
+            self._entries.move_to_end((kind, key))
+            self.hits += 1
+            rows = entry[2]
+        # Callers may annotate the rows they get; keep the cached ones clean
+        return [row.copy() for row in rows]
+
+    def put(self, kind: str, key: Hashable, rows: List[Dict], epoch: Optional[int] = None) -> bool:
+        """Store rows; False if they alone exceed the cap, or anything was
+        invalidated since `epoch` (read self.epoch before querying)"""
+        size = estimate_size(rows)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                return False
+            self._drop((kind, key))
+            self._entries[(kind, key)] = (time.monotonic(), size, rows)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+        return True
+
+    def _drop(self, item):
+        entry = self._entries.pop(item, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def invalidate(self, kind: str, key: Hashable):
+        with self._lock:
+            self.epoch += 1
+            self._drop((kind, key))
+
+    def invalidate_key(self, key: Hashable):
+        """Every kind of entry for one key, e.g. a deleted client"""
+        with self._lock:
+            self.epoch += 1
+            for item in [item for item in self._entries if item[1] == key]:
+                self._drop(item)
+
+    def invalidate_kind(self, kind: str):
+        with self._lock:
+            self.epoch += 1
+            for item in [item for item in self._entries if item[0] == kind]:
+                self._drop(item)
+
+    def clear(self):
+        with self._lock:
+            self.epoch += 1
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.bytes, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+_caches: Dict[str, EntityCache] = {}
+_caches_lock = threading.Lock()
+
+
+def entity_cache(db_path: str) -> EntityCache:
+    """The cache shared by everything using db_path"""
+    with _caches_lock:
+        if db_path not in _caches:
+            _caches[db_path] = EntityCache()
+        return _caches[db_path]
@@ -5,21 +5,84 @@ import sqlite3
 import os
 import json
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+
+from app.geo import parse_coordinates, bounding_box, haversine_km
+from app.dates import epoch_range, normalize_date, to_epoch
+from app.analytics import AnalyticsReport, install_rollups
+from app.cache import entity_cache
+from app.records import CallLog, Client, SiteSurvey, SiteVisit
+from app.journal import ChangeJournal, JOURNALED_TABLES, install_change_journal, paused_journal
+from app.storage import MODES, HotMirror, MemoryDatabase, connect
+from app.versioning import install_versioning
+
+# Integer copies of date columns for range filters and sorting:
+# {table: {timestamp column: (date column, column used when it is empty)}}
+TIMESTAMP_COLUMNS = {
+    'site_surveys': {'survey_ts': ('survey_date', 'created_at')},
+    'call_logs': {'call_ts': ('call_date', 'created_at'), 'follow_up_ts': ('follow_up_date', None)},
+}
+
+
+# Visits have no timestamp column; their date and time are parsed in SQL
+VISIT_TS = '''COALESCE(CAST(strftime('%s', visit_date || ' ' || visit_time) AS INTEGER),
+                    CAST(strftime('%s', visit_date) AS INTEGER),
+                    CAST(strftime('%s', created_at) AS INTEGER), 0)'''
+
+
+def row_timestamps(table: str, row: Dict) -> Dict[str, Optional[int]]:
+    """The timestamp columns of a row about to be written"""
+    stamps = {}
+    for column, (source, fallback) in TIMESTAMP_COLUMNS.get(table, {}).items():
+        stamps[column] = to_epoch(row.get(source)) or (to_epoch(row.get(fallback)) if fallback else None)
+    return stamps
 
 class DatabaseManager:
     """Manages SQLite database operations for the app"""
     
-    def __init__(self):
-        self.db_path = os.path.join('data', 'voltmatic.db')
+    def __init__(self, db_path: Optional[str] = None, mode: str = 'file'):
+        """Open the database at db_path (default data/voltmatic.db)
+
+        mode is 'file', 'memory' (db_path ignored) or 'mirror' (db_path
+        copied into memory and written back by flush()); see app.storage.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown database mode {mode!r}")
+        self.mode = mode
+        self.disk_path = None if mode == 'memory' else db_path or os.path.join('data', 'voltmatic.db')
+        self.mirror = None
+        self._memory = None
+        if mode == 'memory':
+            self._memory = MemoryDatabase()
+        elif mode == 'mirror':
+            self._memory = self.mirror = HotMirror(self.disk_path)
+        # Every query connects to this: the file, or the shared in-memory copy
+        self.db_path = self._memory.uri if self._memory else self.disk_path
+        # Per-client surveys and call logs, shared with other managers on this database
+        self.cache = entity_cache(self.db_path)
+        self.has_rtree = False
         self.init_database()
         self.create_sample_data()
-    
+
+    def flush(self) -> bool:
+        """Write a mirrored database back to its file; False if nothing changed"""
+        return self.mirror.flush() if self.mirror else False
+
+    def close(self):
+        """Flush a mirror and free in-memory databases"""
+        if self._memory is not None:
+            self._memory.close()
+            self._memory = self.mirror = None
+
     def init_database(self):
         """Initialize database tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with connect(self.db_path) as conn:
             cursor = conn.cursor()
             
+            # Lets app.maintenance hand freed pages back a few at a time; takes
+            # effect on a new file, or on an existing one at its next VACUUM
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            
             # Clients table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS clients (
@@ -94,8 +157,189 @@ class DatabaseManager:
                 )
             ''')
             
+            self.migrate_schema(cursor)
             conn.commit()
     
+    def _ensure_columns(self, cursor, table: str, columns: Dict[str, str]):
+        """Add any missing columns to an existing table"""
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cursor.fetchall()}
+        for name, definition in columns.items():
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+    
+    def migrate_schema(self, cursor):
+        """Bring databases created by older versions up to date"""
+        # Numeric coordinates parsed from the free-text location_coordinates
+        self._ensure_columns(cursor, 'clients', {
+            'latitude': 'REAL',
+            'longitude': 'REAL'
+        })
+        self.init_spatial_index(cursor)
+        self.backfill_client_coordinates(cursor)
+        
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_site_visits_date ON site_visits (visit_date, visit_time)"
+        )
+        
+        # Per-client lookups, used by every branch of the timeline query
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_site_surveys_client ON site_surveys (client_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_call_logs_client ON call_logs (client_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_site_visits_client ON site_visits (client_id)")
+        
+        # Follow-ups: ISO dates plus a completion flag, indexed only while pending;
+        # reminded_at records when this device last notified about one
+        self._ensure_columns(cursor, 'call_logs', {
+            'follow_up_done': 'INTEGER DEFAULT 0',
+            'reminded_at': 'TEXT'
+        })
+        self.normalize_follow_up_dates(cursor)
+        
+        # Global uids and per-field versions for merging edits from other devices
+        install_versioning(cursor)
+        
+        # Journal of changed rows for incremental sync
+        install_change_journal(cursor)
+        
+        # Integer timestamps; local columns, so they may come after versioning
+        self.init_timestamp_columns(cursor)
+        
+        # Summary tables maintained by triggers for reporting, grouped by timestamp month
+        install_rollups(cursor)
+    
+    def init_spatial_index(self, cursor):
+        """Create the R*Tree over client coordinates, or a B-tree fallback"""
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS client_locations USING rtree(
+                    id, min_lat, max_lat, min_lon, max_lon
+                )
+            ''')
+        except sqlite3.OperationalError:
+            # SQLite built without R*Tree support
+            self.has_rtree = False
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_clients_lat_lon ON clients (latitude, longitude)"
+            )
+            return
+        
+        self.has_rtree = True
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS clients_location_insert
+            AFTER INSERT ON clients
+            WHEN NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL
+            BEGIN
+                INSERT OR REPLACE INTO client_locations
+                VALUES (NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS clients_location_update
+            AFTER UPDATE OF latitude, longitude ON clients
+            BEGIN
+                DELETE FROM client_locations WHERE id = OLD.id;
+                INSERT INTO client_locations
+                SELECT NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude
+                WHERE NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS clients_location_delete
+            AFTER DELETE ON clients
+            BEGIN
+                DELETE FROM client_locations WHERE id = OLD.id;
+            END
+        ''')
+    
+    def backfill_client_coordinates(self, cursor):
+        """Parse location_coordinates for rows saved before the numeric columns existed"""
+        cursor.execute('''
+            SELECT id, location_coordinates FROM clients
+            WHERE latitude IS NULL AND location_coordinates IS NOT NULL AND location_coordinates != ''
+        ''')
+        updates = []
+        for client_id, location in cursor.fetchall():
+            point = parse_coordinates(location)
+            if point:
+                updates.append((point[0], point[1], client_id))
+        if updates:
+            cursor.executemany("UPDATE clients SET latitude = ?, longitude = ? WHERE id = ?", updates)
+    
+    def normalize_follow_up_dates(self, cursor):
+        """Rewrite free-text follow-up dates as ISO dates where they can be parsed"""
+        cursor.execute('''
+            SELECT id, follow_up_date FROM call_logs
+            WHERE follow_up_date IS NOT NULL AND follow_up_date NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+        ''')
+        updates = []
+        for call_id, follow_up_date in cursor.fetchall():
+            normalized = normalize_date(follow_up_date)
+            if normalized:
+                updates.append((normalized, call_id))
+        if updates:
+            cursor.executemany("UPDATE call_logs SET follow_up_date = ? WHERE id = ?", updates)
+    
+    def init_timestamp_columns(self, cursor):
+        """Add, index and backfill the integer timestamp columns
+        
+        DatabaseManager writes fill them in Python, which parses any date
+        format; triggers cover rows written by sync merges and bulk inserts,
+        for which SQLite parses ISO text. Rows neither could parse are
+        retried here on every start.
+        """
+        for table, columns in TIMESTAMP_COLUMNS.items():
+            self._ensure_columns(cursor, table, {column: 'INTEGER' for column in columns})
+            for column, (source, fallback) in columns.items():
+                value = f"NULLIF(NEW.{source}, '')"
+                if fallback:
+                    value = f"COALESCE({value}, NEW.{fallback})"
+                value = f"CAST(strftime('%s', {value}) AS INTEGER)"
+                watched = [source] + ([fallback] if fallback else [])
+                changed = ' OR '.join(f"NEW.{name} IS NOT OLD.{name}" for name in watched)
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_{column}_insert AFTER INSERT ON {table}
+                    WHEN NEW.{column} IS NULL
+                    BEGIN
+                        UPDATE {table} SET {column} = {value} WHERE id = NEW.id;
+                    END
+                ''')
+                # Unless the same statement set the timestamp itself
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_{column}_update
+                    AFTER UPDATE OF {', '.join(watched)} ON {table}
+                    WHEN ({changed}) AND NEW.{column} IS OLD.{column}
+                    BEGIN
+                        UPDATE {table} SET {column} = {value} WHERE id = NEW.id;
+                    END
+                ''')
+                
+                # Derived values only; nothing for sync to send
+                with paused_journal(cursor.connection):
+                    # ISO text in one statement, then whatever only Python can parse
+                    cursor.execute(f"UPDATE {table} SET {column} = {value.replace('NEW.', '')} WHERE {column} IS NULL")
+                    cursor.execute(f'''
+                        SELECT id, {source}, {fallback or 'NULL'} FROM {table}
+                        WHERE {column} IS NULL AND NULLIF({source}, '') IS NOT NULL
+                    ''')
+                    updates = []
+                    for row_id, date_value, fallback_value in cursor.fetchall():
+                        stamp = to_epoch(date_value) or to_epoch(fallback_value)
+                        if stamp is not None:
+                            updates.append((stamp, row_id))
+                    if updates:
+                        cursor.executemany(f"UPDATE {table} SET {column} = ? WHERE id = ?", updates)
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_site_surveys_ts ON site_surveys (survey_ts)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_site_surveys_status_ts ON site_surveys (status, survey_ts)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_call_logs_ts ON call_logs (call_ts)")
+        # Pending follow-ups, by due timestamp rather than date text
+        cursor.execute("DROP INDEX IF EXISTS idx_call_logs_pending_follow_ups")
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_call_logs_pending_follow_up_ts
+            ON call_logs (follow_up_ts)
+            WHERE follow_up_required = 1 AND follow_up_done = 0
+        ''')
+    
     def create_sample_data(self):
         """Create sample data if database is empty"""
         # No longer creating sample data - start with empty database
@@ -103,42 +347,117 @@ class DatabaseManager:
     
     def add_client(self, client_data: Dict) -> int:
         """Add a new client"""
-        with sqlite3.connect(self.db_path) as conn:
+        location = client_data.get('location_coordinates', '')
+        point = parse_coordinates(location) or (None, None)
+        with connect(self.db_path) as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                INSERT INTO clients (name, phone, email, address, location_coordinates, notes)
-                VALUES (?, ?, ?, ?, ?, ?)
+                INSERT INTO clients (name, phone, email, address, location_coordinates, latitude, longitude, notes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 client_data['name'],
                 client_data['phone'],
                 client_data['email'],
                 client_data['address'],
-                client_data.get('location_coordinates', ''),
+                location,
+                point[0],
+                point[1],
                 client_data.get('notes', '')
             ))
             conn.commit()
             return cursor.lastrowid
     
-    def get_clients(self) -> List[Dict]:
+    def set_client_location(self, client_id: int, location_coordinates: str) -> bool:
+        """Update a client's location text and its parsed coordinates"""
+        point = parse_coordinates(location_coordinates) or (None, None)
+        with connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE clients SET location_coordinates = ?, latitude = ?, longitude = ? WHERE id = ?",
+                (location_coordinates, point[0], point[1], client_id)
+            )
+            conn.commit()
+            return cursor.rowcount > 0
+    
+    def _locations_in_box(self, cursor, box: Tuple[float, float, float, float]) -> List[Tuple]:
+        """(id, latitude, longitude) of clients inside (min_lat, max_lat, min_lon, max_lon)"""
+        if self.has_rtree:
+            cursor.execute('''
+                SELECT r.id, c.latitude, c.longitude FROM client_locations r
+                JOIN clients c ON c.id = r.id
+                WHERE r.max_lat >= ? AND r.min_lat <= ? AND r.max_lon >= ? AND r.min_lon <= ?
+            ''', box)
+        else:
+            cursor.execute('''
+                SELECT id, latitude, longitude FROM clients
+                WHERE latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?
+            ''', box)
+        return cursor.fetchall()
+    
+    def _clients_by_distance(self, cursor, ranked: List[Tuple[float, int]]) -> List[Client]:
+        """Load full client rows for (distance_km, id) pairs, keeping their order"""
+        if not ranked:
+            return []
+        ids = [client_id for _, client_id in ranked]
+        cursor.execute(
+            f"SELECT * FROM clients WHERE id IN ({','.join('?' * len(ids))})", ids
+        )
+        rows = {client['id']: client for client in Client.from_cursor(cursor)}
+        clients = []
+        for distance, client_id in ranked:
+            client = rows.get(client_id)
+            if client:
+                client['distance_km'] = distance
+                clients.append(client)
+        return clients
+    
+    def clients_within(self, radius_km: float, point: Tuple[float, float]) -> List[Client]:
+        """Clients within radius_km of (lat, lon), nearest first, with distance_km set"""
+        lat, lon = point
+        with connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            ranked = []
+            for client_id, client_lat, client_lon in self._locations_in_box(cursor, bounding_box(lat, lon, radius_km)):
+                distance = haversine_km(lat, lon, client_lat, client_lon)
+                if distance <= radius_km:
+                    ranked.append((distance, client_id))
+            ranked.sort()
+            return self._clients_by_distance(cursor, ranked)
+    
+    def nearest_clients(self, point: Tuple[float, float], k: int = 5) -> List[Client]:
+        """The k clients closest to (lat, lon), nearest first, with distance_km set"""
+        lat, lon = point
+        radius_km = 5.0
+        with connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            while True:
+                ranked = sorted(
+                    (haversine_km(lat, lon, client_lat, client_lon), client_id)
+                    for client_id, client_lat, client_lon in self._locations_in_box(cursor, bounding_box(lat, lon, radius_km))
+                )
+                # Only clients inside the circle are guaranteed to beat anything outside the box
+                if len(ranked) >= k and ranked[k - 1][0] <= radius_km or radius_km >= 20040:
+                    break
+                radius_km *= 4
+            return self._clients_by_distance(cursor, ranked[:k])
+    
+    def get_clients(self) -> List[Client]:
         """Get all clients"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with connect(self.db_path) as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM clients ORDER BY created_at DESC")
-            return [dict(row) for row in cursor.fetchall()]
+            return Client.from_cursor(cursor)
     
-    def get_client(self, client_id: int) -> Optional[Dict]:
+    def get_client(self, client_id: int) -> Optional[Client]:
         """Get a specific client"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with connect(self.db_path) as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM clients WHERE id = ?", (client_id,))
-            row = cursor.fetchone()
-            return dict(row) if row else None
+            return Client.one_from_cursor(cursor)
     
     def delete_client(self, client_id: int) -> bool:
         """Delete a client and all their associated data"""
-        with sqlite3.connect(self.db_path) as conn:
+        with connect(self.db_path) as conn:
             cursor = conn.cursor()
             
             # Delete all surveys for this client
@@ -153,15 +472,63 @@ class DatabaseManager:
             # Then delete the client
             cursor.execute("DELETE FROM clients WHERE id = ?", (client_id,))
             conn.commit()
+            self.cache.invalidate_key(client_id)
             return cursor.rowcount > 0
-    
+
+    def import_rows(self, table: str, rows: List[Dict], client_ids: Optional[Dict[int, int]] = None) -> Dict[int, int]:
+        """Insert exported rows in one transaction; returns {exported id: local id}
+
+        Rows are matched on uid, so importing the same export twice adds
+        nothing. client_id values are translated through client_ids when
+        given (the mapping returned by importing the clients).
+        """
+        if table not in JOURNALED_TABLES:
+            raise ValueError(f"Cannot import into {table}")
+        ids = {}
+        with connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"PRAGMA table_info({table})")
+            columns = [row[1] for row in cursor.fetchall() if row[1] != 'id']
+
+            for source in rows:
+                row = {name: source[name] for name in columns if source.get(name) not in (None, '')}
+                if table == 'clients' and 'latitude' not in row:
+                    point = parse_coordinates(row.get('location_coordinates'))
+                    if point:
+                        row['latitude'], row['longitude'] = point
+                if table == 'call_logs' and row.get('follow_up_date'):
+                    row['follow_up_date'] = normalize_date(row['follow_up_date']) or row['follow_up_date']
+                for column, stamp in row_timestamps(table, row).items():
+                    row.pop(column, None)
+                    if stamp is not None:
+                        row[column] = stamp
+                if isinstance(row.get('photos'), list):
+                    row['photos'] = json.dumps(row['photos'])
+                if client_ids is not None and 'client_id' in row:
+                    row['client_id'] = client_ids.get(row['client_id'], row['client_id'])
+
+                names = list(row)
+                cursor.execute(
+                    f"INSERT OR IGNORE INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                    [row[name] for name in names]
+                )
+                local_id = cursor.lastrowid if cursor.rowcount else None
+                if local_id is None and row.get('uid'):
+                    cursor.execute(f"SELECT id FROM {table} WHERE uid = ?", (row['uid'],))
+                    local_id = cursor.fetchone()[0]
+                if source.get('id') is not None and local_id is not None:
+                    ids[source['id']] = local_id
+            conn.commit()
+        self.cache.invalidate_kind(table)
+        return ids
+
     def add_site_survey(self, survey_data: Dict) -> int:
         """Add a new site survey"""
-        with sqlite3.connect(self.db_path) as conn:
+        with connect(self.db_path) as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                INSERT INTO site_surveys (client_id, survey_date, surveyor_name, site_address, property_type, roof_type, number_of_bedrooms, number_of_lights, appliances, kplc_availability, system_type, monthly_spending, recommended_system_size, estimated_cost, photos, notes, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO site_surveys (client_id, survey_date, surveyor_name, site_address, property_type, roof_type, number_of_bedrooms, number_of_lights, appliances, kplc_availability, system_type, monthly_spending, recommended_system_size, estimated_cost, photos, notes, status, survey_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 survey_data.get('client_id'),
                 survey_data.get('survey_date'),
@@ -179,53 +546,95 @@ class DatabaseManager:
                 survey_data.get('estimated_cost'),
                 json.dumps(survey_data.get('photos', [])),
                 survey_data.get('notes'),
-                survey_data.get('status', 'pending')
+                survey_data.get('status', 'pending'),
+                to_epoch(survey_data.get('survey_date'))
             ))
             conn.commit()
+            self.cache.invalidate('site_surveys', survey_data.get('client_id'))
             return cursor.lastrowid
     
-    def get_site_surveys(self, client_id: Optional[int] = None) -> List[Dict]:
-        """Get site surveys, optionally filtered by client"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+    def get_site_surveys(self, client_id: Optional[int] = None, date_from=None, date_to=None,
+                         status: Optional[str] = None) -> List[SiteSurvey]:
+        """Get site surveys, optionally filtered by client, survey date range and status
+        
+        A client's full list is served from the cache when prefetched.
+        """
+        if not client_id or date_from or date_to or status:
+            return self.fetch_site_surveys(client_id, date_from, date_to, status)
+        surveys = self.cache.get('site_surveys', client_id)
+        if surveys is None:
+            epoch = self.cache.epoch
+            surveys = self.fetch_site_surveys(client_id)
+            self.cache.put('site_surveys', client_id, [survey.copy() for survey in surveys], epoch)
+        return surveys
+    
+    def fetch_site_surveys(self, client_id: Optional[int] = None, date_from=None, date_to=None,
+                           status: Optional[str] = None) -> List[SiteSurvey]:
+        """Query site surveys, bypassing the cache; dates are inclusive, any format"""
+        low, high = epoch_range(date_from, date_to)
+        with connect(self.db_path) as conn:
             cursor = conn.cursor()
             
+            query = '''
+                SELECT s.*, c.name as client_name 
+                FROM site_surveys s 
+                JOIN clients c ON s.client_id = c.id 
+            '''
+            conditions = []
+            params = []
             if client_id:
-                cursor.execute('''
-                    SELECT s.*, c.name as client_name 
-                    FROM site_surveys s 
-                    JOIN clients c ON s.client_id = c.id 
-                    WHERE s.client_id = ? 
-                    ORDER BY s.created_at DESC
-                ''', (client_id,))
-            else:
-                cursor.execute('''
-                    SELECT s.*, c.name as client_name 
-                    FROM site_surveys s 
-                    JOIN clients c ON s.client_id = c.id 
-                    ORDER BY s.created_at DESC
-                ''')
-            
-            surveys = []
-            for row in cursor.fetchall():
-                survey = dict(row)
-                survey['photos'] = json.loads(survey['photos']) if survey['photos'] else []
-                surveys.append(survey)
-            
-            return surveys
+                conditions.append("s.client_id = ?")
+                params.append(client_id)
+            if low is not None:
+                conditions.append("s.survey_ts >= ?")
+                params.append(low)
+            if high is not None:
+                conditions.append("s.survey_ts <= ?")
+                params.append(high)
+            if status:
+                conditions.append("s.status = ?")
+                params.append(status)
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            query += " ORDER BY s.created_at DESC"
+            cursor.execute(query, params)
+            # photos are decoded from JSON when first read
+            return SiteSurvey.from_cursor(cursor)
     
-    def get_recent_surveys(self, limit: int = 5) -> List[Dict]:
+    def get_recent_surveys(self, limit: int = 5) -> List[SiteSurvey]:
         """Get recent site surveys"""
-        surveys = self.get_site_surveys()
-        return surveys[:limit]
+        with connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT s.*, c.name as client_name 
+                FROM site_surveys s 
+                JOIN clients c ON s.client_id = c.id 
+                ORDER BY s.created_at DESC
+                LIMIT ?
+            ''', (limit,))
+            return SiteSurvey.from_cursor(cursor)
+    
+    @property
+    def analytics(self) -> AnalyticsReport:
+        """Reports read from the trigger-maintained rollup tables"""
+        return AnalyticsReport(self.db_path)
+    
+    @property
+    def journal(self) -> ChangeJournal:
+        """Change journal of rows written since the last acknowledged sync"""
+        return ChangeJournal(self.db_path)
+    
+    def get_dashboard_counts(self) -> Dict[str, int]:
+        """Client, survey, pending survey and call totals without scanning the tables"""
+        return self.analytics.counts()
     
     def add_call_log(self, call_data: Dict) -> int:
         """Add a new call log"""
-        with sqlite3.connect(self.db_path) as conn:
+        with connect(self.db_path) as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                INSERT INTO call_logs (client_id, call_date, caller_name, call_duration, call_purpose, call_notes, call_outcome, follow_up_required, follow_up_date)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO call_logs (client_id, call_date, caller_name, call_duration, call_purpose, call_notes, call_outcome, follow_up_required, follow_up_date, call_ts, follow_up_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 call_data.get('client_id'),
                 call_data.get('call_date'),
@@ -235,21 +644,218 @@ class DatabaseManager:
                 call_data.get('call_notes'),
                 call_data.get('call_outcome'),
                 call_data.get('follow_up_required', False),
-                call_data.get('follow_up_date')
+                normalize_date(call_data.get('follow_up_date')) or call_data.get('follow_up_date'),
+                to_epoch(call_data.get('call_date')),
+                to_epoch(call_data.get('follow_up_date'))
             ))
             conn.commit()
+            self.cache.invalidate('call_logs', call_data.get('client_id'))
             return cursor.lastrowid
     
-    def get_call_logs(self, client_id: Optional[int] = None) -> List[Dict]:
-        """Get call logs, optionally filtered by client"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+    def get_call_logs(self, client_id: Optional[int] = None, date_from=None, date_to=None,
+                      outcome: Optional[str] = None) -> List[CallLog]:
+        """Get call logs, newest first, optionally filtered by client, call date range and outcome
+        
+        A client's full list is served from the cache when prefetched.
+        """
+        if not client_id or date_from or date_to or outcome:
+            return self.fetch_call_logs(client_id, date_from, date_to, outcome)
+        calls = self.cache.get('call_logs', client_id)
+        if calls is None:
+            epoch = self.cache.epoch
+            calls = self.fetch_call_logs(client_id)
+            self.cache.put('call_logs', client_id, [call.copy() for call in calls], epoch)
+        return calls
+    
+    def fetch_call_logs(self, client_id: Optional[int] = None, date_from=None, date_to=None,
+                        outcome: Optional[str] = None) -> List[CallLog]:
+        """Query call logs, bypassing the cache; dates are inclusive, any format"""
+        low, high = epoch_range(date_from, date_to)
+        with connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            
+            query = "SELECT * FROM call_logs"
+            conditions = []
+            params = []
+            if client_id:
+                conditions.append("client_id = ?")
+                params.append(client_id)
+            if low is not None:
+                conditions.append("call_ts >= ?")
+                params.append(low)
+            if high is not None:
+                conditions.append("call_ts <= ?")
+                params.append(high)
+            if outcome:
+                conditions.append("call_outcome = ?")
+                params.append(outcome)
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            # call_date text in mixed formats doesn't sort; its timestamp does
+            query += " ORDER BY call_ts DESC, id DESC"
+            cursor.execute(query, params)
+            return CallLog.from_cursor(cursor)
+    
+    def get_due_followups(self, as_of: Optional[str] = None) -> List[CallLog]:
+        """Pending follow-ups due on or before as_of (default today), oldest first"""
+        as_of = normalize_date(as_of) if as_of else datetime.now().strftime('%Y-%m-%d')
+        return self.get_pending_followups(until=as_of)
+    
+    def get_pending_followups(self, until: Optional[str] = None, include_reminded: bool = True) -> List[CallLog]:
+        """Pending follow-ups with their client's name, optionally up to a date"""
+        with connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            
+            # The conditions match idx_call_logs_pending_follow_up_ts exactly
+            query = '''
+                SELECT l.*, c.name as client_name, c.phone as client_phone
+                FROM call_logs l
+                JOIN clients c ON l.client_id = c.id
+                WHERE l.follow_up_required = 1 AND l.follow_up_done = 0
+                  AND l.follow_up_ts IS NOT NULL
+            '''
+            params = []
+            if until:
+                query += " AND l.follow_up_ts <= ?"
+                params.append(epoch_range(None, until)[1])
+            if not include_reminded:
+                query += " AND l.reminded_at IS NULL"
+            query += " ORDER BY l.follow_up_ts"
+            
+            cursor.execute(query, params)
+            return CallLog.from_cursor(cursor)
+    
+    def complete_followup(self, call_id: int) -> bool:
+        """Mark a call's follow-up as done"""
+        with connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE call_logs SET follow_up_done = 1 WHERE id = ?", (call_id,))
+            conn.commit()
+            self.cache.invalidate_kind('call_logs')
+            return cursor.rowcount > 0
+    
+    def mark_followup_reminded(self, call_id: int, at: Optional[str] = None) -> bool:
+        """Record that a follow-up's reminder was shown, so it isn't shown again"""
+        with connect(self.db_path) as conn:
+            # Local bookkeeping, not an edit to sync to other devices
+            with paused_journal(conn):
+                cursor = conn.execute(
+                    "UPDATE call_logs SET reminded_at = ? WHERE id = ?",
+                    (at or datetime.now().isoformat(timespec='seconds'), call_id)
+                )
+            conn.commit()
+            self.cache.invalidate_kind('call_logs')
+            return cursor.rowcount > 0
+    
+    def add_site_visit(self, visit_data: Dict) -> int:
+        """Schedule a new site visit"""
+        with connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO site_visits (client_id, visit_date, visit_time, purpose, notes, status)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (
+                visit_data.get('client_id'),
+                visit_data.get('visit_date'),
+                visit_data.get('visit_time'),
+                visit_data.get('purpose'),
+                visit_data.get('notes'),
+                visit_data.get('status', 'scheduled')
+            ))
+            conn.commit()
+            return cursor.lastrowid
+    
+    def get_site_visits(self, visit_date: Optional[str] = None, client_id: Optional[int] = None) -> List[SiteVisit]:
+        """Get site visits with their client's name and coordinates, optionally filtered"""
+        with connect(self.db_path) as conn:
             cursor = conn.cursor()
             
+            query = '''
+                SELECT v.*, c.name as client_name, c.address, c.location_coordinates,
+                       c.latitude, c.longitude
+                FROM site_visits v
+                JOIN clients c ON v.client_id = c.id
+            '''
+            conditions = []
+            params = []
+            if visit_date:
+                conditions.append("v.visit_date = ?")
+                params.append(visit_date)
             if client_id:
-                cursor.execute("SELECT * FROM call_logs WHERE client_id = ? ORDER BY call_date DESC", (client_id,))
-            else:
-                cursor.execute("SELECT * FROM call_logs ORDER BY call_date DESC")
+                conditions.append("v.client_id = ?")
+                params.append(client_id)
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            query += " ORDER BY v.visit_date, v.visit_time"
+            
+            cursor.execute(query, params)
+            return SiteVisit.from_cursor(cursor)
+    
+    def get_client_timeline(self, client_id: int, before: Optional[Tuple[int, str, int]] = None,
+                            limit: int = 50) -> Dict:
+        """One page of a client's surveys, calls and visits, newest first
+        
+        Returns {'items': [...], 'next': cursor}; pass the cursor back as
+        `before` for the following page (None once there is nothing older).
+        Each item has kind ('survey', 'call' or 'visit'), id, at (epoch
+        seconds), date (as entered), summary, status and notes.
+        """
+        with connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            
+            # Ordered by the integer timestamps, not the editable date text;
+            # (at, kind, id) is unique, so the page boundary is exact
+            query = f'''
+                SELECT * FROM (
+                    SELECT 'survey' AS kind, id, COALESCE(survey_ts, 0) AS at,
+                           COALESCE(NULLIF(survey_date, ''), created_at) AS date,
+                           TRIM(COALESCE(system_type, '') || ' ' || COALESCE(property_type, '')) AS summary,
+                           status, notes
+                    FROM site_surveys WHERE client_id = ?
+                    UNION ALL
+                    SELECT 'call', id, COALESCE(call_ts, 0), COALESCE(NULLIF(call_date, ''), created_at),
+                           COALESCE(call_purpose, ''),
+                           CASE WHEN follow_up_required = 1 AND follow_up_done = 0
+                                THEN 'follow-up ' || COALESCE(follow_up_date, 'pending')
+                                ELSE call_outcome END,
+                           call_notes
+                    FROM call_logs WHERE client_id = ?
+                    UNION ALL
+                    SELECT 'visit', id, {VISIT_TS},
+                           TRIM(COALESCE(visit_date, '') || ' ' || COALESCE(visit_time, '')),
+                           COALESCE(purpose, ''), status, notes
+                    FROM site_visits WHERE client_id = ?
+                )
+            '''
+            params = [client_id, client_id, client_id]
+            if before:
+                query += " WHERE (at, kind, id) < (?, ?, ?)"
+                params.extend(before)
+            query += " ORDER BY at DESC, kind DESC, id DESC LIMIT ?"
+            # One extra row tells whether another page exists
+            params.append(limit + 1)
             
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            cursor.execute(query, params)
+            items = [dict(row) for row in cursor.fetchall()]
+            next_cursor = None
+            if len(items) > limit:
+                items = items[:limit]
+                last = items[-1]
+                next_cursor = (last['at'], last['kind'], last['id'])
+            return {'items': items, 'next': next_cursor}
+    
+    def update_site_visit_status(self, visit_id: int, status: str) -> bool:
+        """Mark a site visit as scheduled, completed, cancelled, ..."""
+        with connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE site_visits SET status = ? WHERE id = ?", (status, visit_id))
+            conn.commit()
+            return cursor.rowcount > 0
+    
+    def plan_day_route(self, visit_date: str, start: Optional[Tuple[float, float]] = None) -> Dict:
+        """Order the scheduled visits of a day into a driving route"""
+        from app.routing import plan_route
+        
+        visits = [v for v in self.get_site_visits(visit_date=visit_date) if v['status'] == 'scheduled']
+        return plan_route(visits, start)
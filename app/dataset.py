@@ -0,0 +1,230 @@
+"""
+Synthetic data for Voltmatic Energy Solutions Site Survey App
+
+Generates a reproducible database of clients, surveys, call logs and site
+visits for benchmarks and load tests. The same seed and size always give
+the same rows. The shape follows what the field teams record:
+
+- clients cluster around the towns the surveyors cover
+- about 1.3 surveys, 2.5 calls and 0.6 visits per client, skewed so a few
+  clients have many
+- monthly spending is log-normal
+- dates span the last two years, with more activity in the dry seasons
+"""
+import math
+import random
+import uuid
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+
+from app.sizing import COST_PER_KW, DEFAULT_KWH_PER_KW_MONTH, TARIFF_KES_PER_KWH
+from app.storage import connect
+
+# (town, latitude, longitude, share of clients, scatter in degrees)
+TOWNS = (
+    ('Nairobi', -1.286, 36.817, 0.38, 0.12),
+    ('Mombasa', -4.043, 39.668, 0.14, 0.08),
+    ('Kisumu', -0.092, 34.768, 0.10, 0.07),
+    ('Nakuru', -0.303, 36.080, 0.10, 0.08),
+    ('Eldoret', 0.514, 35.270, 0.08, 0.07),
+    ('Thika', -1.033, 37.069, 0.06, 0.05),
+    ('Machakos', -1.517, 37.263, 0.05, 0.06),
+    ('Nyeri', -0.420, 36.947, 0.04, 0.05),
+    ('Garissa', -0.453, 39.646, 0.03, 0.10),
+    ('Kitale', 1.015, 35.006, 0.02, 0.05),
+)
+FIRST_NAMES = ('Wanjiku', 'Otieno', 'Achieng', 'Kamau', 'Njeri', 'Mwangi', 'Akinyi', 'Kiprop',
+               'Chebet', 'Mutua', 'Wambui', 'Omondi', 'Naliaka', 'Kariuki', 'Atieno', 'Barasa',
+               'Jeptoo', 'Onyango', 'Nyambura', 'Kimani', 'Halima', 'Hassan', 'Grace', 'David')
+LAST_NAMES = ('Kamau', 'Otieno', 'Mwangi', 'Ochieng', 'Kiptoo', 'Njoroge', 'Wekesa', 'Mutiso',
+              'Odhiambo', 'Cheruiyot', 'Kilonzo', 'Wanyama', 'Maina', 'Owino', 'Rotich', 'Abdi')
+BUSINESS_SUFFIXES = ('Enterprises', 'Academy', 'Hardware', 'Dairy', 'Hotel', 'Clinic', 'Farm', 'Church')
+SURVEYORS = ('Peter Mwangi', 'Faith Akinyi', 'John Kiprop', 'Mary Wambui', 'Ali Hassan', 'Ruth Chebet')
+
+# (value, weight) tables
+PROPERTY_TYPES = (('Residential', 60), ('Commercial', 22), ('Institutional', 10), ('Industrial', 5),
+                  ('Agricultural', 3))
+ROOF_TYPES = (('Iron sheet', 55), ('Concrete', 18), ('Tile', 15), ('Asbestos', 7), ('Thatch', 5))
+SYSTEM_TYPES = (('On-grid', 45), ('Hybrid', 35), ('Off-grid', 20))
+KPLC_AVAILABILITY = (('Yes', 70), ('No', 20), ('Unreliable', 10))
+SURVEY_STATUSES = (('pending', 45), ('completed', 30), ('approved', 15), ('rejected', 10))
+CALL_PURPOSES = (('Initial inquiry', 35), ('Follow-up', 35), ('Quotation', 15), ('Support', 15))
+CALL_OUTCOMES = (('Interested', 30), ('Call back', 25), ('No answer', 20), ('Not interested', 15),
+                 ('Booked survey', 10))
+VISIT_PURPOSES = (('Site survey', 60), ('Installation', 20), ('Maintenance', 15), ('Handover', 5))
+VISIT_STATUSES = (('completed', 55), ('scheduled', 30), ('cancelled', 15))
+APPLIANCES = ('TV', 'Fridge', 'Iron', 'Microwave', 'Water pump', 'Laptop', 'Freezer', 'Electric kettle')
+
+# Rows per client, used to turn a row target into a client count
+SURVEYS_PER_CLIENT = 1.3
+CALLS_PER_CLIENT = 2.5
+VISITS_PER_CLIENT = 0.6
+ROWS_PER_CLIENT = 1 + SURVEYS_PER_CLIENT + CALLS_PER_CLIENT + VISITS_PER_CLIENT
+
+# Relative activity per month; the long rains (Apr-May) and short rains (Nov) are slow
+MONTH_WEIGHTS = (1.1, 1.2, 1.0, 0.7, 0.7, 1.0, 1.2, 1.2, 1.1, 1.0, 0.8, 0.9)
+
+BATCH_SIZE = 5000
+
+
+class DatasetGenerator:
+    """Seeded source of realistic rows"""
+
+    def __init__(self, seed: int = 1, end: Optional[datetime] = None, days: int = 730):
+        self.rng = random.Random(seed)
+        self.end = end or datetime(2026, 10, 1)
+        self.days = days
+        self._town_weights = list(accumulate(town[3] for town in TOWNS))
+        self._tables = {}
+        # Day offsets weighted by season, sampled from a precomputed table
+        self._day_weights = list(accumulate(
+            MONTH_WEIGHTS[(self.end - timedelta(days=day)).month - 1] for day in range(days)
+        ))
+
+    def choice(self, table: Tuple[Tuple[str, int], ...]) -> str:
+        if table not in self._tables:
+            self._tables[table] = ([value for value, _ in table], list(accumulate(w for _, w in table)))
+        values, cumulative = self._tables[table]
+        return self.rng.choices(values, cum_weights=cumulative)[0]
+
+    def count(self, mean: float) -> int:
+        """Skewed per-client count: geometric with the given mean"""
+        if mean <= 0:
+            return 0
+        p = 1 / (1 + mean)
+        return int(math.log(1 - self.rng.random()) / math.log(1 - p))
+
+    def moment(self) -> datetime:
+        day = self.rng.choices(range(self.days), cum_weights=self._day_weights)[0]
+        return self.end - timedelta(days=day, hours=self.rng.randint(0, 10), minutes=self.rng.randint(0, 59))
+
+    def uid(self) -> str:
+        return uuid.UUID(int=self.rng.getrandbits(128)).hex
+
+    def client(self) -> Tuple[Dict, datetime]:
+        rng = self.rng
+        town = rng.choices(TOWNS, cum_weights=self._town_weights)[0]
+        lat = round(rng.gauss(town[1], town[4]), 5)
+        lon = round(rng.gauss(town[2], town[4]), 5)
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        name = f"{first} {last}" if rng.random() < 0.75 else f"{last} {rng.choice(BUSINESS_SUFFIXES)}"
+        created = self.moment()
+        return {
+            'uid': self.uid(),
+            'name': name,
+            'phone': f"07{rng.randrange(10 ** 8):08d}",
+            'email': f"{first.lower()}.{last.lower()}{rng.randrange(100)}@example.com" if rng.random() < 0.4 else '',
+            'address': f"Plot {rng.randint(1, 999)}, {town[0]}",
+            'location_coordinates': f"{lat}, {lon}" if rng.random() < 0.9 else '',
+            'latitude': lat,
+            'longitude': lon,
+            'notes': '',
+            'status': 'active' if rng.random() < 0.9 else 'inactive',
+            'created_at': created.strftime('%Y-%m-%d %H:%M:%S'),
+        }, created
+
+    def survey(self, client_id: int, after: datetime) -> Dict:
+        rng = self.rng
+        when = min(self.end, after + timedelta(days=rng.expovariate(1 / 14)))
+        spending = round(math.exp(rng.gauss(math.log(6000), 0.8)), 2)
+        size = max(0.5, round(spending / TARIFF_KES_PER_KWH / DEFAULT_KWH_PER_KW_MONTH * 2) / 2)
+        return {
+            'uid': self.uid(),
+            'client_id': client_id,
+            'survey_date': when.strftime('%Y-%m-%d'),
+            'surveyor_name': rng.choice(SURVEYORS),
+            'site_address': '',
+            'property_type': self.choice(PROPERTY_TYPES),
+            'roof_type': self.choice(ROOF_TYPES),
+            'number_of_bedrooms': rng.randint(1, 6),
+            'number_of_lights': rng.randint(3, 40),
+            'appliances': ', '.join(rng.sample(APPLIANCES, rng.randint(1, 5))),
+            'kplc_availability': self.choice(KPLC_AVAILABILITY),
+            'system_type': self.choice(SYSTEM_TYPES),
+            'monthly_spending': spending,
+            'recommended_system_size': size,
+            'estimated_cost': size * COST_PER_KW,
+            'photos': '[]',
+            'notes': '',
+            'status': self.choice(SURVEY_STATUSES),
+            'created_at': when.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+    def call(self, client_id: int, after: datetime) -> Dict:
+        rng = self.rng
+        when = min(self.end, after + timedelta(days=rng.expovariate(1 / 20), minutes=rng.randint(0, 600)))
+        follow_up = rng.random() < 0.3
+        follow_up_date = when + timedelta(days=rng.randint(1, 21))
+        return {
+            'uid': self.uid(),
+            'client_id': client_id,
+            'call_date': when.strftime('%Y-%m-%d %H:%M'),
+            'caller_name': rng.choice(SURVEYORS),
+            'call_duration': f"{rng.randint(1, 25)} min",
+            'call_purpose': self.choice(CALL_PURPOSES),
+            'call_notes': '',
+            'call_outcome': self.choice(CALL_OUTCOMES),
+            'follow_up_required': int(follow_up),
+            'follow_up_date': follow_up_date.strftime('%Y-%m-%d') if follow_up else None,
+            'follow_up_done': int(follow_up and follow_up_date < self.end and rng.random() < 0.8),
+            'created_at': when.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+    def visit(self, client_id: int, after: datetime) -> Dict:
+        rng = self.rng
+        when = after + timedelta(days=rng.randint(1, 30))
+        return {
+            'uid': self.uid(),
+            'client_id': client_id,
+            'visit_date': when.strftime('%Y-%m-%d'),
+            'visit_time': f"{rng.randint(8, 16):02d}:{rng.choice((0, 15, 30, 45)):02d}",
+            'purpose': self.choice(VISIT_PURPOSES),
+            'notes': '',
+            'status': self.choice(VISIT_STATUSES) if when < self.end else 'scheduled',
+            'created_at': after.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+
+def _insert(cursor, table: str, rows: List[Dict]):
+    if rows:
+        names = list(rows[0])
+        cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+            [[row[name] for name in names] for row in rows]
+        )
+
+
+def generate_dataset(db_path: str, rows: int = 10000, seed: int = 1, synced: bool = True) -> Dict[str, int]:
+    """Fill a database (schema already created) with about `rows` rows in total
+
+    With synced=True the change journal is cleared afterwards, as if every
+    row had already reached the office. Returns the rows written per table.
+    """
+    generator = DatasetGenerator(seed)
+    clients = max(1, round(rows / ROWS_PER_CLIENT))
+    counts = {'clients': 0, 'site_surveys': 0, 'call_logs': 0, 'site_visits': 0}
+
+    with connect(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM clients")
+        next_id = cursor.fetchone()[0] + 1
+        for start in range(0, clients, BATCH_SIZE):
+            batch = {table: [] for table in counts}
+            for client_id in range(next_id + start, next_id + min(clients, start + BATCH_SIZE)):
+                client, created = generator.client()
+                client['id'] = client_id
+                batch['clients'].append(client)
+                for _ in range(generator.count(SURVEYS_PER_CLIENT)):
+                    batch['site_surveys'].append(generator.survey(client_id, created))
+                for _ in range(generator.count(CALLS_PER_CLIENT)):
+                    batch['call_logs'].append(generator.call(client_id, created))
+                for _ in range(generator.count(VISITS_PER_CLIENT)):
+                    batch['site_visits'].append(generator.visit(client_id, created))
+            for table, table_rows in batch.items():
+                _insert(cursor, table, table_rows)
+                counts[table] += len(table_rows)
+        if synced:
+            cursor.execute("DELETE FROM change_journal")
+        conn.commit()
+    return counts
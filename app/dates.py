@@ -0,0 +1,104 @@
+"""
+Date normalization helpers for Voltmatic Energy Solutions Site Survey App
+
+Dates arrive as whatever text a form held. Everything is stored as ISO
+"YYYY-MM-DD" (or "YYYY-MM-DD HH:MM:SS") so that text comparison sorts
+chronologically and range queries can use indexes. Tables that are
+filtered by date also keep an integer copy (seconds since 1970, reading the
+stored wall-clock time as UTC, as SQLite's strftime('%s', ...) does).
+"""
+import calendar
+from datetime import date, datetime, time
+from typing import Optional, Tuple
+
+DATE_FORMAT = '%Y-%m-%d'
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_DATETIME_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%dT%H:%M',
+    '%d/%m/%Y %H:%M',
+    '%d/%m/%Y %H:%M:%S',
+)
+
+# Day-first forms are tried before month-first ones, as used in Kenya
+_DATE_FORMATS = (
+    '%Y-%m-%d',
+    '%Y/%m/%d',
+    '%d/%m/%Y',
+    '%d-%m-%Y',
+    '%d.%m.%Y',
+    '%d %b %Y',
+    '%d %B %Y',
+    '%b %d %Y',
+    '%B %d %Y',
+    '%d/%m/%y',
+)
+
+
+def parse_datetime(value) -> Optional[datetime]:
+    """Parse a stored or typed date/datetime value, or return None"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+
+    text = str(value).strip().replace(',', ' ')
+    text = ' '.join(text.split())
+    # Drop fractional seconds and timezone suffixes from ISO strings
+    if len(text) > 19 and text[4] == '-' and text[10] in ' T':
+        text = text[:19]
+    # Most stored values are already ISO; skip trying every format on them
+    if len(text) >= 10 and text[4] == '-' and text[7] == '-':
+        try:
+            return datetime.fromisoformat(text)
+        except ValueError:
+            pass
+
+    for fmt in _DATETIME_FORMATS + _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def normalize_date(value) -> Optional[str]:
+    """ISO "YYYY-MM-DD" for a date-like value, or None if it can't be parsed"""
+    parsed = parse_datetime(value)
+    return parsed.strftime(DATE_FORMAT) if parsed else None
+
+
+def normalize_datetime(value) -> Optional[str]:
+    """ISO "YYYY-MM-DD HH:MM:SS" for a date-like value, or None"""
+    parsed = parse_datetime(value)
+    return parsed.strftime(DATETIME_FORMAT) if parsed else None
+
+
+def to_epoch(value) -> Optional[int]:
+    """Integer timestamp for a date-like value, or None if it can't be parsed"""
+    parsed = parse_datetime(value)
+    return calendar.timegm(parsed.timetuple()) if parsed else None
+
+
+def epoch_range(date_from=None, date_to=None) -> Tuple[Optional[int], Optional[int]]:
+    """Inclusive timestamp bounds for a date range; either end may be None
+
+    A date_to without a time covers that whole day.
+    """
+    bounds = []
+    for value in (date_from, date_to):
+        if value is None or value == '':
+            bounds.append(None)
+            continue
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(f"Unrecognized date {value!r}")
+        bounds.append(calendar.timegm(parsed.timetuple()))
+    if bounds[1] is not None and parse_datetime(date_to).time() == time(0):
+        bounds[1] += 24 * 3600 - 1
+    return bounds[0], bounds[1]
@@ -0,0 +1,315 @@
+"""
+Frame-time diagnostics for Voltmatic Energy Solutions Site Survey App
+
+A Clock callback samples every frame's duration and attributes it to the
+current screen; screen switches are timed from on_enter to the first frame
+drawn after it. Recent frames feed the overlay (app.widgets.perf_overlay);
+per-screen histograms for the whole session are saved as JSON under
+<user_data_dir>/diagnostics so field staff can send a trace from a problem
+device.
+
+Turned on by VOLTMATIC_DIAGNOSTICS=1 or a triple tap in the top-left corner
+of the window; once on it keeps sampling until the app stops.
+
+MemoryProfiler (VOLTMATIC_MEMORY=1) is heavier and separate: after every
+screen's on_enter it takes a tracemalloc snapshot and counts live widgets
+by type, diffs both against the previous transition and against the last
+visit to the same screen, and appends the report to memory-*.jsonl. Widget
+types that keep growing on revisits are reported as leaked.
+"""
+import gc
+import json
+import os
+import time
+import tracemalloc
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Upper bounds in ms; one more bucket holds everything slower
+FRAME_BUCKETS_MS = (8, 17, 33, 50, 100, 250, 500)
+LATENCY_BUCKETS_MS = (50, 100, 200, 300, 500, 1000, 2000, 5000)
+RECENT_FRAMES = 120
+MAX_SESSIONS = 20
+# Triple tap inside this square (dp) at the top-left corner toggles the overlay
+GESTURE_CORNER_DP = 64
+# Traceback depth kept by tracemalloc, and allocation sites listed per report
+MEMORY_FRAMES = 8
+TOP_ALLOCATORS = 10
+
+
+class Histogram:
+    """Counts per bucket plus total, count and worst value"""
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.worst = 0.0
+
+    def add(self, value: float):
+        index = 0
+        while index < len(self.bounds) and value > self.bounds[index]:
+            index += 1
+        self.counts[index] += 1
+        self.total += value
+        self.worst = max(self.worst, value)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def to_dict(self) -> Dict:
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count, 2) if self.count else None,
+            'worst_ms': round(self.worst, 2),
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+
+class FrameStats:
+    """Recent frame window and per-screen session histograms"""
+
+    def __init__(self, recent: int = RECENT_FRAMES):
+        self.started = datetime.now()
+        self.recent = deque(maxlen=recent)
+        self.frames = {}
+        self.latency = {}
+        self.last_latency = {}
+
+    def frame(self, ms: float, screen: Optional[str]):
+        self.recent.append(ms)
+        screen = screen or '-'
+        if screen not in self.frames:
+            self.frames[screen] = Histogram(FRAME_BUCKETS_MS)
+        self.frames[screen].add(ms)
+
+    def screen_latency(self, screen: str, ms: float):
+        if screen not in self.latency:
+            self.latency[screen] = Histogram(LATENCY_BUCKETS_MS)
+        self.latency[screen].add(ms)
+        self.last_latency[screen] = ms
+
+    def fps(self) -> float:
+        total = sum(self.recent)
+        return len(self.recent) * 1000 / total if total else 0.0
+
+    def worst_ms(self) -> float:
+        return max(self.recent, default=0.0)
+
+    def to_dict(self) -> Dict:
+        return {
+            'started': self.started.isoformat(timespec='seconds'),
+            'saved': datetime.now().isoformat(timespec='seconds'),
+            'frames': {screen: histogram.to_dict() for screen, histogram in self.frames.items()},
+            'screen_latency': {screen: histogram.to_dict() for screen, histogram in self.latency.items()},
+        }
+
+    def save(self, directory: str) -> str:
+        """Write this session's histograms, replacing its earlier save, and drop old sessions"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"session-{self.started:%Y%m%d-%H%M%S}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=1)
+        sessions = sorted(name for name in os.listdir(directory) if name.startswith('session-'))
+        for name in sessions[:-MAX_SESSIONS]:
+            os.remove(os.path.join(directory, name))
+        return path
+
+
+class Diagnostics:
+    """Clock-driven sampler for an app's ScreenManager, with an optional overlay"""
+
+    def __init__(self, app, clock=None):
+        self.app = app
+        self.stats = FrameStats()
+        self.overlay = None
+        self.running = False
+        self._clock = clock
+        self._last_frame = None
+        self._entered = {}
+
+    @property
+    def clock(self):
+        if self._clock is None:
+            from kivy.clock import Clock
+            self._clock = Clock
+        return self._clock
+
+    @property
+    def directory(self) -> str:
+        return os.path.join(self.app.user_data_dir, 'diagnostics')
+
+    def bind_gesture(self, window):
+        """Triple tap in the top-left corner toggles the overlay"""
+        from kivy.metrics import dp
+
+        def on_touch_down(window, touch):
+            corner = dp(GESTURE_CORNER_DP)
+            if touch.is_triple_tap and touch.x <= corner and touch.y >= window.height - corner:
+                self.toggle()
+                return True
+            return False
+
+        window.bind(on_touch_down=on_touch_down)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        manager = self.app.screen_manager
+        for screen in manager.screens:
+            screen.bind(on_enter=self._on_enter)
+        self._last_frame = time.perf_counter()
+        self.clock.schedule_interval(self._on_frame, 0)
+
+    def _on_frame(self, dt):
+        now = time.perf_counter()
+        self.stats.frame((now - self._last_frame) * 1000, self.app.screen_manager.current)
+        self._last_frame = now
+
+    def _on_enter(self, screen):
+        # Bound handlers run before the screen's own on_enter, so this is its start
+        self._entered[screen.name] = time.perf_counter()
+        self.clock.schedule_once(lambda dt: self._rendered(screen.name), 0)
+
+    def _rendered(self, name: str):
+        """First frame drawn after the screen's on_enter"""
+        entered = self._entered.pop(name, None)
+        if entered is not None:
+            self.stats.screen_latency(name, (time.perf_counter() - entered) * 1000)
+
+    def toggle(self):
+        """Show or hide the overlay, starting the sampler the first time"""
+        self.start()
+        if self.overlay is None:
+            from kivy.core.window import Window
+            from app.widgets.perf_overlay import PerfOverlay
+            self.overlay = PerfOverlay(self)
+            Window.add_widget(self.overlay)
+        else:
+            self.overlay.visible = not self.overlay.visible
+
+    def summary(self) -> List[str]:
+        """Lines shown by the overlay"""
+        stats = self.stats
+        current = self.app.screen_manager.current
+        latency = stats.last_latency.get(current)
+        return [
+            f"{stats.fps():.0f} fps   worst {stats.worst_ms():.0f} ms / {len(stats.recent)} frames",
+            f"{current}: enter-to-render {latency:.0f} ms" if latency is not None else f"{current}",
+        ]
+
+    def save(self) -> Optional[str]:
+        if not self.running:
+            return None
+        try:
+            return self.stats.save(self.directory)
+        except OSError as e:
+            print(f"Diagnostics save error: {e}")
+            return None
+
+
+def widget_counts() -> Dict[str, int]:
+    """Live Kivy widgets by class name, after a full collection"""
+    from kivy.uix.widget import Widget
+
+    gc.collect()
+    return dict(Counter(type(obj).__name__ for obj in gc.get_objects() if isinstance(obj, Widget)))
+
+
+def _growth(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    changes = {name: after.get(name, 0) - before.get(name, 0) for name in set(before) | set(after)}
+    return dict(sorted(((name, change) for name, change in changes.items() if change),
+                       key=lambda item: -abs(item[1])))
+
+
+class MemoryProfiler:
+    """tracemalloc snapshots and widget counts on every screen transition"""
+
+    def __init__(self, app, clock=None, frames: int = MEMORY_FRAMES, top: int = TOP_ALLOCATORS):
+        self.app = app
+        self.frames = frames
+        self.top = top
+        self.reports = []
+        self.started = datetime.now()
+        self._clock = clock
+        self._previous = None
+        self._previous_widgets = {}
+        self._visits = {}
+
+    @property
+    def clock(self):
+        if self._clock is None:
+            from kivy.clock import Clock
+            self._clock = Clock
+        return self._clock
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.app.user_data_dir, 'diagnostics', f"memory-{self.started:%Y%m%d-%H%M%S}.jsonl")
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        for screen in self.app.screen_manager.screens:
+            screen.bind(on_enter=self._on_enter)
+        self.capture('start')
+
+    def _on_enter(self, screen):
+        # Bound handlers run before the screen loads; snapshot once it has
+        self.clock.schedule_once(lambda dt: self.capture(screen.name), 0)
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ))
+
+    def capture(self, screen: str) -> Dict:
+        """Snapshot now and report what changed since the last transition"""
+        widgets = widget_counts()
+        snapshot = self._snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        report = {
+            'at': datetime.now().isoformat(timespec='seconds'),
+            'screen': screen,
+            'traced_kb': round(current / 1024),
+            'peak_kb': round(peak / 1024),
+            'widgets': sum(widgets.values()),
+            'widget_growth': _growth(self._previous_widgets, widgets),
+            'top_allocators': [],
+        }
+        if self._previous is not None:
+            report['top_allocators'] = [{
+                'where': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                'size_diff_kb': round(stat.size_diff / 1024, 1),
+                'count_diff': stat.count_diff,
+            } for stat in snapshot.compare_to(self._previous, 'lineno')[:self.top]]
+        if screen in self._visits:
+            # The screen rebuilt its widgets; anything more than last time was never freed
+            report['leaked_widgets'] = {name: change for name, change in _growth(self._visits[screen], widgets).items()
+                                        if change > 0}
+        self._visits[screen] = widgets
+        self._previous, self._previous_widgets = snapshot, widgets
+        self.reports.append(report)
+        self._write(report)
+        print(f"Memory after {screen}: {report['traced_kb']} KB traced, {report['widgets']} widgets"
+              + (f", leaked {report['leaked_widgets']}" if report.get('leaked_widgets') else ''))
+        return report
+
+    def _write(self, report: Dict):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(report) + '\n')
+        except OSError as e:
+            print(f"Memory report error: {e}")
+
+    def stop(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
@@ -0,0 +1,90 @@
+"""
+Coordinate helpers for Voltmatic Energy Solutions Site Survey App
+"""
+import math
+import re
+from typing import Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+
+# A number with an optional hemisphere letter before or after it,
+# e.g. "-1.2921", "1.2921 S", "S 1.2921", "36.8219E"
+_COORD_RE = re.compile(
+    r'(?<![A-Za-z])([NSEW])\s*(\d+(?:\.\d+)?)(?![\d.])'
+    r'|([-+]?\d+(?:\.\d+)?)(?![\d.])\s*°?\s*(?:([NSEW])(?![A-Za-z]))?',
+    re.IGNORECASE
+)
+
+
+def parse_coordinates(text: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Parse a free-text location into a (lat, lon) pair
+
+    Accepts the forms surveyors actually type: "-1.2921, 36.8219",
+    "1.2921 S 36.8219 E", "lat -1.29 lon 36.82" and map links containing
+    "@-1.29,36.82". Returns None if no valid pair can be found.
+    """
+    if not text:
+        return None
+
+    text = text.strip()
+    at = text.find('@')
+    if at != -1:
+        text = text[at + 1:]
+
+    values = []
+    for before, leading, number, after in _COORD_RE.findall(text):
+        hemisphere = (before or after).upper()
+        value = float(leading or number)
+        if hemisphere in ('S', 'W'):
+            value = -abs(value)
+        values.append((value, hemisphere))
+        if len(values) == 2:
+            break
+
+    if len(values) != 2:
+        return None
+
+    (first, first_hemi), (second, second_hemi) = values
+    # Hemisphere letters win over ordering ("36.8 E, 1.29 S")
+    if first_hemi in ('E', 'W') or second_hemi in ('N', 'S'):
+        first, second = second, first
+
+    lat, lon = first, second
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+        return None
+    return lat, lon
+
+
+def format_coordinates(lat: float, lon: float) -> str:
+    """Format a (lat, lon) pair the way it is stored in location_coordinates"""
+    return f"{lat:.6f}, {lon:.6f}"
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """(min_lat, max_lat, min_lon, max_lon) enclosing a circle around a point
+
+    Boxes that reach a pole or cross the antimeridian widen to the full
+    longitude range rather than wrapping.
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat = lat - dlat
+    max_lat = lat + dlat
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+
+    dlon = math.degrees(math.asin(min(1.0, math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(lat)))))
+    min_lon = lon - dlon
+    max_lon = lon + dlon
+    if min_lon < -180.0 or max_lon > 180.0:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, min_lon, max_lon
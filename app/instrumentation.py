@@ -0,0 +1,185 @@
+"""
+Query instrumentation for Voltmatic Energy Solutions Site Survey App
+
+Records every DatabaseManager call (latency, rows returned, time spent
+opening connections, statements run) into a fixed-size ring buffer. Calls
+slower than a threshold also keep their SQL and EXPLAIN QUERY PLAN output.
+
+Nothing is wrapped until install() is called, so a disabled recorder costs
+one None check per connection. On a device, set VOLTMATIC_PROFILE=1 and the
+app dumps the buffer to query-profile.json in its data directory whenever
+it is paused; from code:
+
+    recorder = install(QueryRecorder(slow_ms=50))
+    ...
+    recorder.dump('query-profile.json')
+    uninstall()
+"""
+import functools
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from app import storage
+
+DEFAULT_CAPACITY = 1000
+DEFAULT_SLOW_MS = 100.0
+SLOW_CAPACITY = 100
+# Statements worth a query plan; BEGIN, COMMIT and PRAGMA are not
+PLANNED_PREFIXES = ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT')
+
+
+def _row_count(result) -> Optional[int]:
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    if isinstance(result, Mapping):
+        return 1
+    if result is None:
+        return 0
+    return None
+
+
+def explain(db_path: str, sql: str) -> List[str]:
+    """EXPLAIN QUERY PLAN lines for one statement, on a separate connection"""
+    conn = sqlite3.connect(db_path, uri=True)
+    try:
+        return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+    except sqlite3.Error as e:
+        return [f"(no plan: {e})"]
+    finally:
+        conn.close()
+
+
+class QueryRecorder:
+    """Ring buffer of timed DatabaseManager calls"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, slow_ms: float = DEFAULT_SLOW_MS,
+                 slow_log: Optional[str] = None):
+        self.calls = deque(maxlen=capacity)
+        self.slow = deque(maxlen=SLOW_CAPACITY)
+        self.slow_ms = slow_ms
+        self.slow_log = slow_log
+        self._local = threading.local()
+
+    # -- Hooks ---------------------------------------------------------------
+
+    def on_connect(self, conn: sqlite3.Connection, db_path: str, seconds: float):
+        """Connection observer: charge the open to the current call and trace its SQL"""
+        call = getattr(self._local, 'call', None)
+        if call is None:
+            return
+        call['connections'] += 1
+        call['connect_ms'] += seconds * 1000
+        call['db_path'] = db_path
+        conn.set_trace_callback(call['sql'].append)
+
+    def wrap(self, name: str, method: Callable) -> Callable:
+        @functools.wraps(method)
+        def recorded(*args, **kwargs):
+            if getattr(self._local, 'call', None) is not None:
+                # Nested call; its work counts towards the outer one
+                return method(*args, **kwargs)
+            call = self._local.call = {'connections': 0, 'connect_ms': 0.0, 'sql': [], 'db_path': None}
+            start = time.perf_counter()
+            error = None
+            result = None
+            try:
+                result = method(*args, **kwargs)
+                return result
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                self._local.call = None
+                self.record(name, elapsed, call, _row_count(result) if error is None else None, error)
+        return recorded
+
+    # -- Records -------------------------------------------------------------
+
+    def record(self, name: str, seconds: float, call: Dict, rows: Optional[int], error: Optional[str]):
+        entry = {
+            'at': datetime.now().isoformat(timespec='milliseconds'),
+            'call': name,
+            'ms': round(seconds * 1000, 3),
+            'connect_ms': round(call['connect_ms'], 3),
+            'connections': call['connections'],
+            'statements': len(call['sql']),
+            'rows': rows,
+        }
+        if error:
+            entry['error'] = error
+        self.calls.append(entry)
+        if entry['ms'] >= self.slow_ms:
+            self._log_slow(entry, call)
+
+    def _log_slow(self, entry: Dict, call: Dict):
+        """Keep the SQL and plans of a slow call, and append it to the slow log file"""
+        slow = dict(entry, queries=[
+            {'sql': sql, 'plan': explain(call['db_path'], sql) if sql.lstrip().upper().startswith(PLANNED_PREFIXES)
+             and call['db_path'] else []}
+            for sql in call['sql']
+        ])
+        self.slow.append(slow)
+        if self.slow_log:
+            try:
+                with open(self.slow_log, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(slow) + '\n')
+            except OSError as e:
+                print(f"Slow query log error: {e}")
+
+    def summary(self) -> Dict[str, Dict]:
+        """Latency percentiles per call name over the buffer"""
+        from app.benchmarks import percentiles
+
+        samples = {}
+        for entry in self.calls:
+            samples.setdefault(entry['call'], []).append(entry['ms'] / 1000)
+        return {name: percentiles(values) for name, values in sorted(samples.items())}
+
+    def dump(self, path: str) -> str:
+        """Write the buffer, slow calls and a summary as JSON; returns the path"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'dumped_at': datetime.now().isoformat(timespec='seconds'),
+                'slow_ms': self.slow_ms,
+                'summary': self.summary(),
+                'slow': list(self.slow),
+                'calls': list(self.calls),
+            }, f, indent=1)
+        return path
+
+    def clear(self):
+        self.calls.clear()
+        self.slow.clear()
+
+
+_installed = {}
+
+
+def install(recorder: QueryRecorder, cls=None) -> QueryRecorder:
+    """Wrap the public methods of DatabaseManager (or cls) and observe connections"""
+    if cls is None:
+        from app.database import DatabaseManager
+        cls = DatabaseManager
+    uninstall()
+    for name, method in list(vars(cls).items()):
+        if name.startswith('_') or not callable(method):
+            continue
+        _installed[(cls, name)] = method
+        setattr(cls, name, recorder.wrap(name, method))
+    storage.set_connect_observer(recorder.on_connect)
+    return recorder
+
+
+def uninstall():
+    """Restore the original methods and stop observing connections"""
+    for (cls, name), method in _installed.items():
+        setattr(cls, name, method)
+    _installed.clear()
+    storage.set_connect_observer(None)
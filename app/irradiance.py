@@ -0,0 +1,220 @@
+"""
+Solar irradiance lookup grid for Voltmatic Energy Solutions Site Survey App
+
+The grid is a fixed-layout binary file that is memory-mapped on first use,
+so a lookup only touches the few pages holding the surrounding grid cells.
+
+File layout (little-endian):
+
+    header   64 bytes   magic, version, lat0, lon0, dlat, dlon,
+                        nlat, nlon, nmonths, nhours (zero padded)
+    values   uint16     mean GHI in W/m2 for each
+                        [lat][lon][month][hour of local solar time]
+"""
+import math
+import mmap
+import os
+import struct
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.geo import parse_coordinates
+
+MAGIC = b'VIRR'
+VERSION = 1
+HEADER_SIZE = 64
+_HEADER = struct.Struct('<4sHHffffHHHH')
+
+MONTHS = 12
+HOURS = 24
+DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+_MID_MONTH_DAY = (15, 46, 74, 105, 135, 166, 196, 227, 258, 288, 319, 349)
+
+DEFAULT_GRID_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'assets', 'data', 'irradiance_kenya.bin'
+)
+
+# Kenya with a half-cell margin: 5.0S..5.5N, 33.5E..42.5E at 0.5 degrees
+KENYA_BOUNDS = (-5.0, 33.5, 0.5, 0.5, 22, 19)
+
+
+class IrradianceGrid:
+    """Read-only, memory-mapped view of an irradiance grid file"""
+
+    def __init__(self, path: str = DEFAULT_GRID_PATH):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+        (magic, version, header_size, self.lat0, self.lon0, self.dlat, self.dlon,
+         self.nlat, self.nlon, self.nmonths, self.nhours) = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} irradiance grid")
+
+        self._data_offset = header_size
+        self._cell_struct = struct.Struct(f'<{self.nhours}H')
+        self._cell_bytes = self.nmonths * self.nhours * 2
+        expected = header_size + self.nlat * self.nlon * self._cell_bytes
+        if len(self._map) < expected:
+            self.close()
+            raise ValueError(f"{path} is truncated ({len(self._map)} < {expected} bytes)")
+
+    def close(self):
+        """Release the memory map"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """(min_lat, min_lon, max_lat, max_lon) covered by the grid"""
+        return (self.lat0, self.lon0,
+                self.lat0 + (self.nlat - 1) * self.dlat,
+                self.lon0 + (self.nlon - 1) * self.dlon)
+
+    def contains(self, lat: float, lon: float) -> bool:
+        """Whether a point falls inside the grid"""
+        min_lat, min_lon, max_lat, max_lon = self.bounds
+        return min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+
+    def _cell_profile(self, i: int, j: int, month: int) -> Tuple[int, ...]:
+        offset = (self._data_offset
+                  + (i * self.nlon + j) * self._cell_bytes
+                  + month * self.nhours * 2)
+        return self._cell_struct.unpack_from(self._map, offset)
+
+    def _weights(self, lat: float, lon: float) -> List[Tuple[int, int, float]]:
+        """Bilinear (i, j, weight) triples for the cells around a point"""
+        y = (lat - self.lat0) / self.dlat
+        x = (lon - self.lon0) / self.dlon
+        i0 = min(int(math.floor(y)), self.nlat - 2)
+        j0 = min(int(math.floor(x)), self.nlon - 2)
+        fy = y - i0
+        fx = x - j0
+        return [
+            (i0, j0, (1 - fy) * (1 - fx)),
+            (i0, j0 + 1, (1 - fy) * fx),
+            (i0 + 1, j0, fy * (1 - fx)),
+            (i0 + 1, j0 + 1, fy * fx),
+        ]
+
+    def hourly_profile(self, lat: float, lon: float, month: int) -> Optional[List[float]]:
+        """Interpolated mean GHI (W/m2) for each hour of a month (1-12)"""
+        if not self.contains(lat, lon):
+            return None
+        profile = [0.0] * self.nhours
+        for i, j, weight in self._weights(lat, lon):
+            if weight == 0.0:
+                continue
+            for hour, value in enumerate(self._cell_profile(i, j, month - 1)):
+                profile[hour] += weight * value
+        return profile
+
+    def ghi(self, lat: float, lon: float, month: int, hour: int) -> Optional[float]:
+        """Interpolated mean GHI (W/m2) for one hour of local solar time"""
+        profile = self.hourly_profile(lat, lon, month)
+        return profile[hour] if profile else None
+
+    def daily_insolation(self, lat: float, lon: float, month: int) -> Optional[float]:
+        """Mean daily insolation for a month in kWh/m2/day (peak sun hours)"""
+        profile = self.hourly_profile(lat, lon, month)
+        return sum(profile) / 1000.0 if profile else None
+
+    def monthly_insolation(self, lat: float, lon: float) -> Optional[List[float]]:
+        """Mean daily insolation for all twelve months"""
+        if not self.contains(lat, lon):
+            return None
+        return [self.daily_insolation(lat, lon, month) for month in range(1, MONTHS + 1)]
+
+    def for_location(self, location: Optional[str]) -> Optional[List[float]]:
+        """Monthly insolation for a free-text location_coordinates value"""
+        point = parse_coordinates(location)
+        if not point:
+            return None
+        return self.monthly_insolation(*point)
+
+    def for_client(self, client: Dict) -> Optional[List[float]]:
+        """Monthly insolation for a client row from DatabaseManager"""
+        return self.for_location(client.get('location_coordinates'))
+
+
+_default_grid = None
+
+
+def get_grid() -> Optional[IrradianceGrid]:
+    """Shared grid for the bundled Kenya dataset, or None if it is missing"""
+    global _default_grid
+    if _default_grid is None:
+        try:
+            _default_grid = IrradianceGrid(DEFAULT_GRID_PATH)
+        except (OSError, ValueError) as e:
+            print(f"Irradiance grid unavailable: {e}")
+            return None
+    return _default_grid
+
+
+def clear_sky_ghi(lat: float, day_of_year: int, solar_hour: float) -> float:
+    """Haurwitz clear-sky GHI in W/m2"""
+    declination = math.radians(23.45) * math.sin(2 * math.pi * (284 + day_of_year) / 365)
+    hour_angle = math.radians(15.0 * (solar_hour - 12.0))
+    phi = math.radians(lat)
+    cos_zenith = (math.sin(phi) * math.sin(declination)
+                  + math.cos(phi) * math.cos(declination) * math.cos(hour_angle))
+    if cos_zenith <= 0.01:
+        return 0.0
+    return 1098.0 * cos_zenith * math.exp(-0.057 / cos_zenith)
+
+
+def kenya_clearness(lat: float, lon: float, month: int) -> float:
+    """Climatological fraction of clear-sky GHI reaching the ground
+
+    A smooth approximation: the arid north and east are clearest, the
+    western highlands and the coast cloudier, with the long rains
+    (Mar-May) and short rains (Oct-Dec) lowering the whole country.
+    """
+    aridity = min(1.0, max(0.0, (lon - 34.0) / 6.0)) * 0.5 + min(1.0, max(0.0, lat / 5.0)) * 0.5
+    coast = max(0.0, 1.0 - abs(lon - 40.0 + lat * 0.6) / 1.5) if lat < 0 else 0.0
+    rains = {3: 0.08, 4: 0.14, 5: 0.1, 6: 0.04, 7: 0.06, 10: 0.04, 11: 0.08, 12: 0.05}.get(month, 0.0)
+    return max(0.45, min(0.85, 0.70 + 0.12 * aridity - 0.06 * coast - rains * (1.2 - aridity)))
+
+
+def build_grid(path: str, bounds: Tuple = KENYA_BOUNDS,
+               source: Optional[Callable[[float, float, int, int], float]] = None):
+    """Write an irradiance grid file
+
+    `source(lat, lon, month, hour)` returns mean GHI in W/m2; by default a
+    clear-sky model scaled by `kenya_clearness` is used. Measured data
+    (e.g. a satellite climatology) can be written through the same call.
+    """
+    lat0, lon0, dlat, dlon, nlat, nlon = bounds
+    if source is None:
+        def source(lat, lon, month, hour):
+            day = _MID_MONTH_DAY[month - 1]
+            return clear_sky_ghi(lat, day, hour + 0.5) * kenya_clearness(lat, lon, month)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    cell = struct.Struct(f'<{HOURS}H')
+    with open(path, 'wb') as f:
+        header = _HEADER.pack(MAGIC, VERSION, HEADER_SIZE, lat0, lon0, dlat, dlon,
+                              nlat, nlon, MONTHS, HOURS)
+        f.write(header.ljust(HEADER_SIZE, b'\0'))
+        for i in range(nlat):
+            lat = lat0 + i * dlat
+            for j in range(nlon):
+                lon = lon0 + j * dlon
+                for month in range(1, MONTHS + 1):
+                    values = [max(0, min(65535, int(round(source(lat, lon, month, hour)))))
+                              for hour in range(HOURS)]
+                    f.write(cell.pack(*values))
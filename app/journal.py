@@ -0,0 +1,209 @@
+"""
+Change-data-capture journal for Voltmatic Energy Solutions Site Survey App
+
+Triggers on the synced tables record (table, row id, op, sequence) for every
+write. Each row keeps only its latest entry, so the journal never holds more
+than one entry per changed row and a reader resuming from any sequence
+number still sees every row changed after it.
+"""
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from app.storage import connect
+
+JOURNALED_TABLES = ('clients', 'site_surveys', 'call_logs', 'site_visits')
+
+INSERT, UPDATE, DELETE = 'I', 'U', 'D'
+
+
+def _journal_trigger(table: str, event: str, op: str, row: str) -> str:
+    # Deleted rows can't be looked up later, so their uid is kept in the
+    # entry; source_device is set while applying another device's changes.
+    # An update to a row whose insert hasn't been acknowledged stays an insert.
+    op_value = f"'{op}'"
+    if op == UPDATE:
+        op_value = f'''COALESCE((SELECT op FROM change_journal
+                             WHERE table_name = '{table}' AND row_id = NEW.id AND op = '{INSERT}'), '{UPDATE}')'''
+    # An entry replacing another device's change belongs to neither device
+    source = "(SELECT value FROM sync_state WHERE key = 'source_device')"
+    source_value = f'''CASE WHEN EXISTS (SELECT 1 FROM change_journal
+                                     WHERE table_name = '{table}' AND row_id = {row}.id
+                                       AND source_device IS NOT {source})
+                       THEN NULL ELSE {source} END'''
+    return f'''
+        CREATE TRIGGER journal_{table}_{event.lower()}
+        AFTER {event} ON {table}
+        WHEN (SELECT value FROM sync_state WHERE key = 'journal_paused') IS NULL
+        BEGIN
+            INSERT OR REPLACE INTO change_journal (seq, table_name, row_id, op, row_uid, source_device)
+            VALUES (NULL, '{table}', {row}.id, {op_value}, {row}.uid, {source_value});
+        END
+    '''
+
+
+def install_change_journal(cursor):
+    """Create the journal, its bookkeeping table and the capture triggers"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'change_journal'")
+    is_new = cursor.fetchone() is None
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_journal (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute("PRAGMA table_info(change_journal)")
+    columns = {row[1] for row in cursor.fetchall()}
+    for name, definition in (('row_uid', 'TEXT'), ('source_device', 'TEXT')):
+        if name not in columns:
+            cursor.execute(f"ALTER TABLE change_journal ADD COLUMN {name} {definition}")
+    # One entry per row: a newer write replaces the older entry
+    cursor.execute("DROP INDEX IF EXISTS idx_change_journal_row")
+    cursor.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_change_journal_unique_row ON change_journal (table_name, row_id)"
+    )
+    # Key/value bookkeeping: acknowledged sequence, journal pause flag, ...
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+    # Triggers are recreated so that upgrades pick up changes to their bodies
+    for table in JOURNALED_TABLES:
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f"DROP TRIGGER IF EXISTS journal_{table}_{event.lower()}")
+        cursor.execute(_journal_trigger(table, 'INSERT', INSERT, 'NEW'))
+        cursor.execute(_journal_trigger(table, 'UPDATE', UPDATE, 'NEW'))
+        cursor.execute(_journal_trigger(table, 'DELETE', DELETE, 'OLD'))
+
+    if is_new:
+        # Rows written before the journal existed have never left the device
+        for table in JOURNALED_TABLES:
+            cursor.execute(
+                f"INSERT INTO change_journal (table_name, row_id, op, row_uid) SELECT '{table}', id, '{INSERT}', uid FROM {table}"
+            )
+
+
+class ChangeJournal:
+    """Reads and compacts the change journal"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    def latest_seq(self) -> int:
+        """Highest sequence number written so far"""
+        with connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = 'change_journal'"
+            ).fetchone()
+            return row[0] if row else 0
+
+    def _entries(self, cursor, after_seq: int, limit: Optional[int]) -> List[Dict]:
+        cursor.execute('''
+            SELECT seq, table_name, row_id, op, row_uid, source_device FROM change_journal
+            WHERE seq > ? ORDER BY seq LIMIT ?
+        ''', (after_seq, limit if limit else -1))
+        return [dict(row) for row in cursor.fetchall()]
+
+    def get_entries(self, after_seq: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """Journal entries after a sequence number, oldest first"""
+        with connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            return self._entries(conn.cursor(), after_seq, limit)
+
+    def get_changes(self, after_seq: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """Journal entries after a sequence number with the current row attached
+
+        Inserts and updates carry the row as it is now under `row`; deletes
+        carry `row` = None.
+        """
+        with connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            entries = self._entries(cursor, after_seq, limit)
+
+            wanted = {}
+            for entry in entries:
+                if entry['op'] != DELETE:
+                    wanted.setdefault(entry['table_name'], []).append(entry['row_id'])
+
+            rows = {}
+            for table, ids in wanted.items():
+                # Chunk to stay under SQLite's bound-parameter limit
+                for start in range(0, len(ids), 500):
+                    chunk = ids[start:start + 500]
+                    cursor.execute(
+                        f"SELECT * FROM {table} WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                    )
+                    for row in cursor.fetchall():
+                        rows[(table, row['id'])] = dict(row)
+
+            for entry in entries:
+                entry['row'] = rows.get((entry['table_name'], entry['row_id']))
+            return entries
+
+    def acknowledged_seq(self) -> int:
+        """Sequence number up to which changes have been acknowledged"""
+        with connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT value FROM sync_state WHERE key = 'acknowledged_seq'"
+            ).fetchone()
+            return int(row[0]) if row else 0
+
+    def acknowledge(self, up_to_seq: int) -> int:
+        """Record that changes up to a sequence number were received and drop them
+
+        Returns the number of journal entries compacted away.
+        """
+        with connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM change_journal WHERE seq <= ?", (up_to_seq,))
+            removed = cursor.rowcount
+            cursor.execute(
+                "INSERT OR IGNORE INTO sync_state (key, value) VALUES ('acknowledged_seq', 0)"
+            )
+            cursor.execute('''
+                UPDATE sync_state SET value = MAX(CAST(value AS INTEGER), ?)
+                WHERE key = 'acknowledged_seq'
+            ''', (up_to_seq,))
+            conn.commit()
+            return removed
+
+    def pending_count(self) -> int:
+        """Entries not yet acknowledged"""
+        with connect(self.db_path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM change_journal").fetchone()[0]
+
+
+@contextmanager
+def paused_journal(conn):
+    """Suspend capture for the rest of a connection's transaction
+
+    Used when applying changes that came from elsewhere, so they are not
+    echoed back out as local changes. The flag is written and removed inside
+    the same transaction, so other connections never see it.
+    """
+    conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES ('journal_paused', '1')")
+    try:
+        yield conn
+    finally:
+        conn.execute("DELETE FROM sync_state WHERE key = 'journal_paused'")
+
+
+@contextmanager
+def journal_source(conn, device_id: str):
+    """Attribute changes written in this transaction to another device
+
+    Lets a server journal what it applied for a device, so the same changes
+    are not served back to that device when it pulls.
+    """
+    conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES ('source_device', ?)", (device_id,))
+    try:
+        yield conn
+    finally:
+        conn.execute("DELETE FROM sync_state WHERE key = 'source_device'")
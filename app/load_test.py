@@ -0,0 +1,231 @@
+"""
+Load generator for the office sync server
+
+Simulates many field devices pushing synthetic clients, surveys and call
+logs at the same time while dashboards are being read, then reports
+throughput and latency percentiles. Against a running server:
+
+    python -m app.load_test --port 8765 --devices 50 --chunks 20
+
+or, with no --port, against a throwaway server in the same process.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from app.sync import CONTENT_TYPE, decode_payload, encode_payload
+
+PROPERTY_TYPES = ('Residential', 'Commercial', 'Industrial', 'Institutional')
+ROOF_TYPES = ('Iron sheet', 'Tile', 'Concrete', 'Asbestos')
+SYSTEM_TYPES = ('On-grid', 'Off-grid', 'Hybrid')
+STATUSES = ('pending', 'completed', 'approved')
+OUTCOMES = ('Interested', 'Not interested', 'Call back', 'No answer')
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class SimulatedDevice:
+    """Builds wire changes as a field device would after a day of surveys"""
+
+    def __init__(self, index: int, rng: random.Random):
+        self.device_id = uuid.UUID(int=rng.getrandbits(128)).hex
+        self.surveyor = f"Surveyor {index:03d}"
+        self.rng = rng
+        self.clock = int(time.time() * 1000)
+        self.seq = 0
+
+    def stamp(self) -> str:
+        self.clock += 1
+        return f"{self.clock:013d}-00000-{self.device_id}"
+
+    def uid(self) -> str:
+        return uuid.UUID(int=self.rng.getrandbits(128)).hex
+
+    def change(self, table: str, fields: Dict) -> Dict:
+        stamp = self.stamp()
+        return {'t': table, 'u': self.uid(), 'op': 'I', 'f': {k: [v, stamp] for k, v in fields.items()}}
+
+    def chunk(self, size: int) -> Dict:
+        """One push payload of about `size` changes"""
+        rng = self.rng
+        changes = []
+        while len(changes) < size:
+            client = self.change('clients', {
+                'name': f"Client {self.uid()[:8]}",
+                'phone': f"07{rng.randrange(10 ** 8):08d}",
+                'address': f"Plot {rng.randrange(1, 999)}",
+                'latitude': rng.uniform(-4.5, 4.5),
+                'longitude': rng.uniform(34.0, 41.5),
+            })
+            changes.append(client)
+            for _ in range(rng.randint(1, 3)):
+                month, day = rng.randint(1, 12), rng.randint(1, 28)
+                changes.append(self.change('site_surveys', {
+                    'client_id': client['u'],
+                    'survey_date': f"2026-{month:02d}-{day:02d}",
+                    'surveyor_name': self.surveyor,
+                    'property_type': rng.choice(PROPERTY_TYPES),
+                    'roof_type': rng.choice(ROOF_TYPES),
+                    'system_type': rng.choice(SYSTEM_TYPES),
+                    'monthly_spending': round(rng.uniform(1000, 50000), 2),
+                    'status': rng.choice(STATUSES),
+                }))
+            changes.append(self.change('call_logs', {
+                'client_id': client['u'],
+                'call_date': '2026-10-01',
+                'caller_name': self.surveyor,
+                'call_outcome': rng.choice(OUTCOMES),
+                'follow_up_required': rng.randint(0, 1),
+            }))
+        self.seq += len(changes)
+        return {'device': self.device_id, 'from_seq': self.seq - len(changes), 'to_seq': self.seq,
+                'changes': changes}
+
+
+class Connection:
+    """Minimal keep-alive HTTP/1.1 client on asyncio streams"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, payload: Optional[Dict] = None) -> Tuple[int, Dict]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = encode_payload(payload) if payload is not None else b''
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: {CONTENT_TYPE}\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body
+        )
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        data = await self.reader.readexactly(length) if length else b''
+        return status, decode_payload(data) if data else {}
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+async def run_device(device: SimulatedDevice, host: str, port: int, chunks: int, chunk_size: int,
+                     latencies: List[float], counters: Dict[str, int]):
+    connection = Connection(host, port)
+    try:
+        for _ in range(chunks):
+            payload = device.chunk(chunk_size)
+            while True:
+                start = time.perf_counter()
+                status, _ = await connection.request('POST', '/sync/push', payload)
+                if status == 503:
+                    # Queue full: back off as the real client does
+                    counters['retries'] += 1
+                    await asyncio.sleep(random.uniform(0, 0.2))
+                    continue
+                if status != 200:
+                    counters['errors'] += 1
+                latencies.append(time.perf_counter() - start)
+                counters['changes'] += len(payload['changes'])
+                break
+    finally:
+        connection.close()
+
+
+async def run_reader(host: str, port: int, stop: asyncio.Event, latencies: List[float]):
+    connection = Connection(host, port)
+    try:
+        while not stop.is_set():
+            start = time.perf_counter()
+            await connection.request('GET', '/dashboard')
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.05)
+    finally:
+        connection.close()
+
+
+async def load_test(host: str, port: int, devices: int = 20, chunks: int = 10, chunk_size: int = 200,
+                    readers: int = 2, seed: int = 1) -> Dict:
+    """Push from `devices` concurrent devices while `readers` poll the dashboard"""
+    rng = random.Random(seed)
+    simulated = [SimulatedDevice(index, random.Random(rng.getrandbits(64))) for index in range(devices)]
+    push_latencies, read_latencies = [], []
+    counters = {'changes': 0, 'retries': 0, 'errors': 0}
+    stop = asyncio.Event()
+
+    reader_tasks = [asyncio.ensure_future(run_reader(host, port, stop, read_latencies)) for _ in range(readers)]
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_device(device, host, port, chunks, chunk_size, push_latencies, counters) for device in simulated
+    ))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await asyncio.gather(*reader_tasks)
+
+    stats_connection = Connection(host, port)
+    _, server_stats = await stats_connection.request('GET', '/server/stats')
+    stats_connection.close()
+
+    def summary(latencies: List[float]) -> Dict:
+        return {'count': len(latencies),
+                'p50_ms': percentile(latencies, 0.50) * 1000,
+                'p95_ms': percentile(latencies, 0.95) * 1000,
+                'p99_ms': percentile(latencies, 0.99) * 1000}
+
+    return dict(counters, seconds=elapsed, changes_per_second=counters['changes'] / elapsed if elapsed else 0,
+                push=summary(push_latencies), dashboard=summary(read_latencies), server=server_stats)
+
+
+async def _against_local_server(args) -> Dict:
+    from app.sync_server import SyncServer
+
+    with tempfile.TemporaryDirectory() as directory:
+        server = SyncServer(os.path.join(directory, 'office.db'), port=0)
+        await server.start()
+        try:
+            return await load_test(server.host, server.port, args.devices, args.chunks, args.chunk_size,
+                                   args.readers, args.seed)
+        finally:
+            await server.stop()
+
+
+def main(argv: Optional[Tuple[str, ...]] = None):
+    parser = argparse.ArgumentParser(description="Load test the office sync server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, help="Server to test; omit to start a temporary one")
+    parser.add_argument('--devices', type=int, default=20)
+    parser.add_argument('--chunks', type=int, default=10, help="Pushes per device")
+    parser.add_argument('--chunk-size', type=int, default=200, help="Changes per push")
+    parser.add_argument('--readers', type=int, default=2, help="Concurrent dashboard readers")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.port is None:
+        result = asyncio.run(_against_local_server(args))
+    else:
+        result = asyncio.run(load_test(args.host, args.port, args.devices, args.chunks, args.chunk_size,
+                                       args.readers, args.seed))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,315 @@
+"""
+Database maintenance for Voltmatic Energy Solutions Site Survey App
+
+Deleting rows leaves free pages in the file, and the query planner works
+from statistics that are only as fresh as the last ANALYZE. Maintenance
+returns free pages to the filesystem (incremental vacuum), refreshes
+statistics for tables whose size has drifted (ANALYZE, PRAGMA optimize)
+and checkpoints the WAL when the database uses one.
+
+Every pass runs under a time budget: statements that would overrun it are
+interrupted, and work left over (more free pages, tables still to analyze)
+is picked up by the next pass. The scheduler runs passes on a worker
+thread once the app has been idle for a while, and a longer one when it is
+paused, so none of this happens inside a user action or on the UI thread. Each pass returns a report of what it
+did:
+
+    report = DatabaseMaintenance(db.db_path).run(budget_ms=200)
+"""
+import json
+import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.storage import connect
+
+# Seconds without touches or key presses before an idle pass
+IDLE_SECONDS = 30
+# Time boxes for a pass: while idle, and while the app is being paused
+IDLE_BUDGET_MS = 150.0
+PAUSE_BUDGET_MS = 500.0
+# Minimum time between idle passes once nothing is left over
+MIN_INTERVAL_SECONDS = 15 * 60
+
+# Free pages worth returning, and how many each incremental_vacuum statement frees
+FREELIST_MIN_PAGES = 32
+VACUUM_STEP_PAGES = 256
+# Statistics are stale once a table's row count has moved this far from them
+STATS_DRIFT = 0.25
+# Rows sampled per index by ANALYZE; keeps it quick and approximate
+ANALYSIS_LIMIT = 1000
+# SQLite VM instructions between deadline checks
+PROGRESS_STEPS = 1000
+
+AUTO_VACUUM_INCREMENTAL = 2
+TASKS = ('checkpoint', 'incremental_vacuum', 'analyze', 'optimize')
+REPORT_HISTORY = 20
+# The report log is moved aside to <log>.1 beyond this size
+MAX_LOG_BYTES = 256 * 1024
+
+
+class BudgetExceeded(Exception):
+    """The pass ran out of time before this task could finish"""
+
+
+class ConversionDeferred(Exception):
+    """Switching to incremental auto-vacuum didn't fit in a pass this long"""
+
+
+class DatabaseMaintenance:
+    """Time-boxed maintenance passes over one database"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._deadline = 0.0
+        # Budget of the last pass whose conversion VACUUM was cut short
+        self._conversion_failed_ms = 0.0
+        self._budget_ms = 0.0
+
+    def run(self, budget_ms: float = IDLE_BUDGET_MS, tasks=TASKS, checkpoint_mode: str = 'PASSIVE') -> Dict:
+        """Run tasks in order until done or out of time; returns the report"""
+        start = time.perf_counter()
+        self._deadline = start + budget_ms / 1000
+        self._budget_ms = budget_ms
+        report = {'at': datetime.now().isoformat(timespec='seconds'), 'budget_ms': budget_ms, 'tasks': []}
+        # No busy wait: if another connection holds a lock, try again next pass
+        conn = connect(self.db_path, isolation_level=None, timeout=0)
+        try:
+            conn.set_progress_handler(self._past_deadline, PROGRESS_STEPS)
+            runners = {
+                'checkpoint': lambda: self.checkpoint(conn, checkpoint_mode),
+                'incremental_vacuum': lambda: self.incremental_vacuum(conn),
+                'analyze': lambda: self.analyze(conn),
+                'optimize': lambda: self.optimize(conn),
+            }
+            for task in tasks:
+                entry = {'task': task}
+                task_start = time.perf_counter()
+                try:
+                    if self._remaining() <= 0:
+                        raise BudgetExceeded()
+                    entry.update(runners[task]())
+                except BudgetExceeded:
+                    entry['status'] = 'deferred'
+                except ConversionDeferred as e:
+                    # Not pending: short passes would only fail at it again
+                    entry['status'] = 'skipped'
+                    entry['reason'] = str(e)
+                except sqlite3.OperationalError as e:
+                    # The progress handler stops a statement as 'interrupted'
+                    message = str(e)
+                    if 'interrupt' in message:
+                        entry['status'] = 'interrupted'
+                    elif 'locked' in message or 'busy' in message:
+                        entry['status'] = 'busy'
+                    else:
+                        entry['status'] = 'error'
+                        entry['error'] = message
+                entry['ms'] = round((time.perf_counter() - task_start) * 1000, 2)
+                report['tasks'].append(entry)
+        finally:
+            conn.close()
+        report['ms'] = round((time.perf_counter() - start) * 1000, 2)
+        report['pending'] = any(entry['status'] in ('partial', 'deferred', 'interrupted', 'busy')
+                                for entry in report['tasks'])
+        return report
+
+    def _remaining(self) -> float:
+        return self._deadline - time.perf_counter()
+
+    def _past_deadline(self) -> int:
+        return 1 if time.perf_counter() > self._deadline else 0
+
+    # -- Tasks -------------------------------------------------------------
+
+    def checkpoint(self, conn, mode: str = 'PASSIVE') -> Dict:
+        """Copy WAL frames into the database; TRUNCATE also empties the -wal file"""
+        if conn.execute("PRAGMA journal_mode").fetchone()[0] != 'wal':
+            return {'status': 'skipped', 'reason': 'not in WAL mode'}
+        busy, frames, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        return {'status': 'partial' if busy else 'done', 'frames': frames, 'checkpointed': checkpointed}
+
+    def incremental_vacuum(self, conn) -> Dict:
+        """Return free pages to the filesystem, a few at a time"""
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free < FREELIST_MIN_PAGES:
+            return {'status': 'skipped', 'free_pages': free}
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+            self._convert_to_incremental(conn, free)
+            free = 0
+        while free and self._remaining() > 0:
+            # execute() would step it once, freeing a single page; a script runs to the end
+            conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_STEP_PAGES})")
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        freed = pages - conn.execute("PRAGMA page_count").fetchone()[0]
+        return {'status': 'partial' if free else 'done', 'pages': freed, 'bytes': freed * page_size,
+                'free_pages': free}
+
+    def _convert_to_incremental(self, conn, free: int):
+        # Files created before incremental auto-vacuum need one full VACUUM
+        # to switch; if it doesn't fit in the budget it is rolled back and
+        # only tried again by a longer pass (or `python -m app vacuum`)
+        if self._budget_ms <= self._conversion_failed_ms:
+            raise ConversionDeferred(f"VACUUM needs more than {self._conversion_failed_ms:g}ms")
+        conn.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+        try:
+            conn.execute("VACUUM")
+        except sqlite3.OperationalError:
+            self._conversion_failed_ms = self._budget_ms
+            raise
+
+    def stale_tables(self, conn) -> List[str]:
+        """Tables never analyzed, or whose row count drifted from their statistics"""
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+            "AND sql NOT LIKE 'CREATE VIRTUAL%'"
+        )]
+        has_stats = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        ).fetchone() is not None
+        counted = {}
+        if has_stats:
+            # The first number of each stat is the rows ANALYZE saw in that
+            # index; partial indexes see fewer, so take the largest
+            for table, stat in conn.execute("SELECT tbl, stat FROM sqlite_stat1"):
+                counted[table] = max(counted.get(table, 0), int(stat.split()[0]))
+        stale = []
+        for table in tables:
+            rows = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+            seen = counted.get(table)
+            if seen is None:
+                if rows:
+                    stale.append(table)
+            elif abs(rows - seen) > STATS_DRIFT * max(seen, 1):
+                stale.append(table)
+        return stale
+
+    def analyze(self, conn) -> Dict:
+        """ANALYZE the stale tables, one statement each, until out of time"""
+        stale = self.stale_tables(conn)
+        if not stale:
+            return {'status': 'skipped'}
+        conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+        analyzed = []
+        for table in stale:
+            if self._remaining() <= 0:
+                break
+            conn.execute(f'ANALYZE "{table}"')
+            analyzed.append(table)
+        return {'status': 'done' if len(analyzed) == len(stale) else 'partial', 'tables': analyzed,
+                'remaining': len(stale) - len(analyzed)}
+
+    def optimize(self, conn) -> Dict:
+        """Let SQLite refresh anything else it considers worthwhile"""
+        conn.execute("PRAGMA optimize")
+        return {'status': 'done'}
+
+
+def format_report(report: Dict) -> str:
+    """One line per task"""
+    lines = []
+    for entry in report['tasks']:
+        details = ', '.join(f"{key}={value}" for key, value in entry.items() if key not in ('task', 'status', 'ms'))
+        lines.append(f"{entry['task']:<20} {entry['status']:<12} {entry['ms']:>8.1f}ms  {details}")
+    lines.append(f"{'total':<20} {'pending' if report['pending'] else 'complete':<12} {report['ms']:>8.1f}ms")
+    return '\n'.join(lines)
+
+
+class MaintenanceScheduler:
+    """Runs maintenance passes when the app goes idle, and on pause
+
+    Call touch() on user input; a pass starts on the worker thread once
+    nothing has happened for idle_seconds, at most every min_interval unless
+    the last pass left work.
+    """
+
+    def __init__(self, maintenance: DatabaseMaintenance, clock=None, idle_seconds: float = IDLE_SECONDS,
+                 budget_ms: float = IDLE_BUDGET_MS, min_interval: float = MIN_INTERVAL_SECONDS,
+                 log_path: Optional[str] = None):
+        self.maintenance = maintenance
+        self.idle_seconds = idle_seconds
+        self.budget_ms = budget_ms
+        self.min_interval = min_interval
+        self.log_path = log_path
+        self.history = deque(maxlen=REPORT_HISTORY)
+        self.pending = True
+        self._clock = clock
+        self._trigger = None
+        self._last_run = None
+        self._executor = None
+        self._running = None
+
+    @property
+    def clock(self):
+        if self._clock is None:
+            from kivy.clock import Clock
+            self._clock = Clock
+        return self._clock
+
+    def bind_input(self, window):
+        """Treat touches and key presses on window as activity"""
+        window.bind(on_touch_down=self.touch, on_key_down=self.touch)
+
+    def start(self):
+        if self._trigger is None:
+            self._trigger = self.clock.create_trigger(self._on_idle, self.idle_seconds)
+        self.touch()
+
+    def stop(self):
+        if self._trigger is not None:
+            self._trigger.cancel()
+
+    def touch(self, *args):
+        """Restart the idle countdown; never stops the event it was bound to"""
+        if self._trigger is not None:
+            self._trigger.cancel()
+            self._trigger()
+        return False
+
+    def close(self):
+        """Stop scheduling and let a pass in progress finish on its own"""
+        self.stop()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def _on_idle(self, dt):
+        due = self.pending or self._last_run is None or time.monotonic() - self._last_run >= self.min_interval
+        if due and (self._running is None or self._running.done()):
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(1, thread_name_prefix='maintenance')
+            self._running = self._executor.submit(self.run, self.budget_ms, 'idle')
+        # Wait for the next idle period either way
+        self._trigger()
+
+    def run(self, budget_ms: float, reason: str, checkpoint_mode: str = 'PASSIVE') -> Optional[Dict]:
+        try:
+            report = self.maintenance.run(budget_ms, checkpoint_mode=checkpoint_mode)
+        except sqlite3.Error as e:
+            print(f"Maintenance error: {e}")
+            return None
+        report['reason'] = reason
+        self._last_run = time.monotonic()
+        self.pending = report['pending']
+        self.history.append(report)
+        if self.log_path:
+            try:
+                if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > MAX_LOG_BYTES:
+                    os.replace(self.log_path, self.log_path + '.1')
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(report) + '\n')
+            except OSError as e:
+                print(f"Maintenance log error: {e}")
+        return report
+
+    def on_pause(self) -> Optional[Dict]:
+        """A longer pass as the app goes to the background, on the calling thread"""
+        # An idle pass still running would hold the database; it is time-boxed
+        if self._running is not None:
+            self._running.result()
+        return self.run(PAUSE_BUDGET_MS, 'pause', checkpoint_mode='TRUNCATE')
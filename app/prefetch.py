@@ -0,0 +1,65 @@
+"""
+Background prefetching for Voltmatic Energy Solutions Site Survey App
+
+While the clients list sits still, the surveys and call logs of the clients
+on screen are loaded into the entity cache (app.cache) on a worker thread,
+so "view surveys" and "call history" open without waiting on a query.
+Any scroll cancels the pending work; the list asks again once it is idle.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List
+
+# Loaded for each client, in this order
+PREFETCH_KINDS = ('site_surveys', 'call_logs')
+# Seconds the list must be still before prefetching starts
+IDLE_SECONDS = 0.4
+
+
+class Prefetcher:
+    """Fills a DatabaseManager's cache for a set of clients, one worker thread"""
+
+    def __init__(self, db):
+        self.db = db
+        self.loaded = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix='prefetch')
+
+    def prefetch(self, client_ids: Iterable[int]):
+        """Replace any pending work with loading these clients, in order"""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        self._executor.submit(self._run, generation, list(client_ids))
+
+    def cancel(self):
+        """Abandon pending work; the query in progress finishes, nothing after it runs"""
+        with self._lock:
+            self._generation += 1
+
+    def _current(self, generation: int) -> bool:
+        return generation == self._generation
+
+    def _run(self, generation: int, client_ids: List[int]):
+        fetchers = {'site_surveys': self.db.fetch_site_surveys, 'call_logs': self.db.fetch_call_logs}
+        cache = self.db.cache
+        for client_id in client_ids:
+            for kind in PREFETCH_KINDS:
+                if not self._current(generation):
+                    return
+                if (kind, client_id) in cache:
+                    continue
+                epoch = cache.epoch
+                try:
+                    rows = fetchers[kind](client_id)
+                except Exception as e:
+                    print(f"Prefetch error: {e}")
+                    return
+                # put() refuses rows read before a write invalidated the cache
+                if self._current(generation) and cache.put(kind, client_id, rows, epoch):
+                    self.loaded += 1
+
+    def close(self):
+        self.cancel()
+        self._executor.shutdown(wait=False)
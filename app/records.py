@@ -0,0 +1,216 @@
+"""
+Row records for Voltmatic Energy Solutions Site Survey App
+
+Queries used to return one dict per row. Records keep their columns in
+__slots__ and are built straight from cursor tuples by a constructor
+compiled once per column list, so a large result costs a small fixed-size
+object per row instead of a hash table. Repetitive text columns (names,
+outcomes, statuses) share one string per distinct value.
+
+Records still behave as mappings - record['name'], record.get('email'),
+dict(record), 'client_name' in record, record['photos'] = [...] - so code
+written for the dicts keeps working. A column that isn't set (not
+selected by the query) is a missing key, as it was. Columns a class
+doesn't declare, e.g. added by a newer schema, are kept in a small
+overflow dict.
+
+    clients = Client.from_cursor(cursor.execute("SELECT * FROM clients"))
+"""
+import json
+import sys
+from collections.abc import MutableMapping
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+_MISSING = object()
+
+
+class Record(MutableMapping):
+    """Base for slot-based rows; subclasses list FIELDS in column order"""
+
+    __slots__ = ('_extra',)
+    FIELDS: Tuple[str, ...] = ()
+    # Low-cardinality text columns whose equal values should share a string
+    SHARED: Tuple[str, ...] = ()
+    _field_set: FrozenSet[str] = frozenset()
+    _storage: Tuple[str, ...] = ()
+    _constructors: Dict[Tuple[str, ...], Callable] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls.FIELDS)
+        cls._storage = tuple(name for klass in reversed(cls.__mro__)
+                             for name in klass.__dict__.get('__slots__', ()))
+        cls._constructors = {}
+
+    def __init__(self, values: Optional[Dict] = None, **kwargs):
+        self._extra = None
+        for source in (values or {}), kwargs:
+            for key, value in source.items():
+                self[key] = value
+
+    # -- Building from a cursor ---------------------------------------------
+
+    @classmethod
+    def constructor(cls, columns: Tuple[str, ...]) -> Callable[[tuple], 'Record']:
+        """A function turning a row tuple with these columns into a record"""
+        make = cls._constructors.get(columns)
+        if make is None:
+            make = cls._constructors[columns] = cls._compile(columns)
+        return make
+
+    @classmethod
+    def _compile(cls, columns: Tuple[str, ...]) -> Callable:
+        # Generated like namedtuple's methods were: one attribute store per
+        # column, no per-row loop or name lookups
+        assigned, extra = {}, {}
+        for index, name in enumerate(columns):
+            # A repeated column name keeps its last value, as dict(row) did
+            target = assigned if name in cls._field_set else extra
+            value = f"row[{index}]"
+            if name in cls.SHARED:
+                value = f"(intern({value}) if {value}.__class__ is str else {value})"
+            assigned.pop(name, None)
+            extra.pop(name, None)
+            target[name] = value
+        lines = [
+            "def make(row):",
+            "    record = new(cls)",
+            f"    record._extra = {{{', '.join(f'{name!r}: {value}' for name, value in extra.items())}}}"
+            if extra else "    record._extra = None",
+        ]
+        lines += [f"    record.{name} = {value}" for name, value in assigned.items()]
+        lines.append("    return record")
+        namespace = {'new': object.__new__, 'cls': cls, 'intern': sys.intern}
+        exec('\n'.join(lines), namespace)
+        return namespace['make']
+
+    @classmethod
+    def from_cursor(cls, cursor) -> List['Record']:
+        """Every remaining row of an executed cursor (default row factory)"""
+        make = cls.constructor(tuple(description[0] for description in cursor.description))
+        return list(map(make, cursor))
+
+    @classmethod
+    def one_from_cursor(cls, cursor) -> Optional['Record']:
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return cls.constructor(tuple(description[0] for description in cursor.description))(row)
+
+    # -- Mapping interface --------------------------------------------------
+
+    def __getitem__(self, key):
+        if key in self._field_set:
+            value = getattr(self, key, _MISSING)
+        elif self._extra is not None:
+            value = self._extra.get(key, _MISSING)
+        else:
+            value = _MISSING
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in self._field_set:
+            setattr(self, key, value)
+        elif self._extra is None:
+            self._extra = {key: value}
+        else:
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._field_set and getattr(self, key, _MISSING) is not _MISSING:
+            delattr(self, key)
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        if key in self._field_set:
+            return getattr(self, key, _MISSING) is not _MISSING
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self):
+        for name in self.FIELDS:
+            if getattr(self, name, _MISSING) is not _MISSING:
+                yield name
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def copy(self) -> 'Record':
+        """A shallow copy of the same class, as dict.copy()"""
+        duplicate = object.__new__(type(self))
+        for name in self._storage:
+            value = getattr(self, name, _MISSING)
+            if value is not _MISSING:
+                setattr(duplicate, name, value)
+        duplicate._extra = dict(self._extra) if self._extra else None
+        return duplicate
+
+    def to_dict(self) -> Dict:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __reduce__(self):
+        return type(self), (self.to_dict(),)
+
+
+class Client(Record):
+    __slots__ = ('id', 'name', 'phone', 'email', 'address', 'location_coordinates', 'created_at', 'notes',
+                 'status', 'latitude', 'longitude', 'uid', 'distance_km')
+    FIELDS = __slots__
+    SHARED = ('status',)
+
+
+class SiteSurvey(Record):
+    """photos is stored as its JSON text and decoded on first access"""
+
+    __slots__ = ('id', 'client_id', 'survey_date', 'surveyor_name', 'site_address', 'property_type', 'roof_type',
+                 'number_of_bedrooms', 'number_of_lights', 'appliances', 'kplc_availability', 'system_type',
+                 'monthly_spending', 'recommended_system_size', 'estimated_cost', '_photos', 'notes', 'status',
+                 'created_at', 'uid', 'survey_ts', 'client_name')
+    FIELDS = tuple('photos' if name == '_photos' else name for name in __slots__)
+    SHARED = ('surveyor_name', 'property_type', 'roof_type', 'appliances', 'kplc_availability', 'system_type',
+              'status', 'client_name')
+
+    @property
+    def photos(self) -> List:
+        photos = self._photos
+        if photos is None or isinstance(photos, str):
+            photos = self._photos = json.loads(photos) if photos else []
+        return photos
+
+    @photos.setter
+    def photos(self, value):
+        self._photos = value
+
+    @photos.deleter
+    def photos(self):
+        del self._photos
+
+
+class CallLog(Record):
+    __slots__ = ('id', 'client_id', 'call_date', 'caller_name', 'call_duration', 'call_purpose', 'call_notes',
+                 'call_outcome', 'follow_up_required', 'follow_up_date', 'created_at', 'follow_up_done', 'reminded_at', 'uid',
+                 'call_ts', 'follow_up_ts', 'client_name', 'client_phone')
+    FIELDS = __slots__
+    SHARED = ('caller_name', 'call_duration', 'call_purpose', 'call_outcome', 'follow_up_date', 'client_name')
+
+
+class SiteVisit(Record):
+    __slots__ = ('id', 'client_id', 'visit_date', 'visit_time', 'purpose', 'notes', 'status', 'created_at', 'uid',
+                 'client_name', 'address', 'location_coordinates', 'latitude', 'longitude')
+    FIELDS = __slots__
+    SHARED = ('visit_date', 'visit_time', 'purpose', 'status', 'client_name')
@@ -0,0 +1,144 @@
+"""
+Follow-up reminder scheduling for Voltmatic Energy Solutions Site Survey App
+
+Pending follow-ups are loaded once into a min-heap keyed by due time. Only
+the earliest entry has a Clock event armed; when it fires, every due entry
+is popped and the next one is armed, so the database is never polled.
+Delivered reminders are stamped in call_logs.reminded_at, so relaunching
+or resuming the app doesn't notify about the same follow-up again.
+"""
+import heapq
+import itertools
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from app.dates import parse_datetime
+
+REMINDER_HOUR = 9  # Date-only follow-ups are due at 09:00 local time
+HORIZON_DAYS = 7  # Follow-ups further out are loaded when the horizon is reached
+
+
+class FollowUpScheduler:
+    """Fires a callback for each follow-up when it falls due"""
+
+    def __init__(self, db, on_due: Callable[[Dict], None], clock=None,
+                 now: Callable[[], datetime] = datetime.now):
+        self.db = db
+        self.on_due = on_due
+        self.now = now
+        self._clock = clock
+        self._heap = []
+        self._counter = itertools.count()
+        self._event = None
+        self._horizon = None
+        self._cancelled = set()
+        self._delivered = set()
+
+    @property
+    def clock(self):
+        if self._clock is None:
+            from kivy.clock import Clock
+            self._clock = Clock
+        return self._clock
+
+    def due_time(self, call: Dict) -> Optional[datetime]:
+        """When a call's follow-up should fire"""
+        due = parse_datetime(call.get('follow_up_date'))
+        if due and len(str(call['follow_up_date']).strip()) <= 10:
+            due = due.replace(hour=REMINDER_HOUR)
+        return due
+
+    def start(self):
+        """Load follow-ups up to the horizon and arm the first reminder"""
+        self._horizon = self.now() + timedelta(days=HORIZON_DAYS)
+        self._heap = []
+        self._cancelled.clear()
+        for call in self.db.get_pending_followups(until=self._horizon.strftime('%Y-%m-%d'), include_reminded=False):
+            self._push(call)
+        self._arm()
+
+    def stop(self):
+        """Cancel the armed reminder"""
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+
+    def add(self, call: Dict):
+        """Track a newly logged follow-up without reloading from the database"""
+        if not call.get('follow_up_required') or call.get('follow_up_done'):
+            return
+        due = self.due_time(call)
+        if due is None or (self._horizon and due > self._horizon):
+            return
+        self._cancelled.discard(call.get('id'))
+        self._delivered.discard(call.get('id'))
+        self._push(call, due)
+        self._arm()
+
+    def cancel(self, call_id: int):
+        """Forget a follow-up, e.g. after it has been completed"""
+        # Lazy deletion: the heap entry is skipped when it reaches the top
+        self._cancelled.add(call_id)
+
+    def complete(self, call_id: int) -> bool:
+        """Mark a follow-up done and drop its reminder"""
+        self.cancel(call_id)
+        return self.db.complete_followup(call_id)
+
+    def pending(self) -> List[Dict]:
+        """Tracked follow-ups in due order"""
+        return [call for _, _, call in sorted(self._heap) if call.get('id') not in self._cancelled]
+
+    def _push(self, call: Dict, due: Optional[datetime] = None):
+        if call.get('id') in self._delivered:
+            return
+        due = due or self.due_time(call)
+        if due is not None:
+            heapq.heappush(self._heap, (due, next(self._counter), call))
+
+    def _arm(self):
+        """Schedule a single Clock event for the earliest due time"""
+        self.stop()
+        while self._heap and self._heap[0][2].get('id') in self._cancelled:
+            heapq.heappop(self._heap)
+        if self._heap:
+            target = self._heap[0][0]
+        else:
+            target = self._horizon
+        if target is None:
+            return
+        delay = max(0.0, (target - self.now()).total_seconds())
+        self._event = self.clock.schedule_once(self._fire, delay)
+
+    def _fire(self, dt=None):
+        """Deliver every due follow-up, then arm the next one"""
+        self._event = None
+        now = self.now()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, call = heapq.heappop(self._heap)
+            if call.get('id') in self._cancelled:
+                continue
+            self._delivered.add(call.get('id'))
+            try:
+                self.on_due(call)
+                if call.get('id') is not None:
+                    self.db.mark_followup_reminded(call['id'], now.isoformat(timespec='seconds'))
+            except Exception as e:
+                print(f"Follow-up reminder error: {e}")
+
+        if self._horizon and now >= self._horizon:
+            # Reached the end of what was loaded; pull the next window
+            self.start()
+        else:
+            self._arm()
+
+
+def notify_follow_up(call: Dict):
+    """Show a system notification for a due follow-up"""
+    title = "Follow-up due"
+    message = f"Call {call.get('client_name', 'client')} - {call.get('call_purpose') or 'follow-up'}"
+    try:
+        from plyer import notification
+        notification.notify(title=title, message=message, app_name="Voltmatic")
+    except Exception:
+        print(f"{title}: {message}")
@@ -0,0 +1,237 @@
+"""
+Site visit route planning for Voltmatic Energy Solutions Site Survey App
+
+Orders a surveyor's visits for a day with a time-window aware nearest
+neighbour construction followed by 2-opt improvement. Travel times are
+estimated from great-circle distances, so no map service is needed.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from app.geo import haversine_km, parse_coordinates
+
+ROAD_FACTOR = 1.35  # Road distance per straight-line km
+AVERAGE_SPEED_KMH = 35.0
+SERVICE_MINUTES = 45  # Time spent on site per visit
+APPOINTMENT_SLACK_MINUTES = 30  # Allowed deviation from a booked visit_time
+DAY_START = '08:00'
+DAY_END = '18:00'
+LATE_PENALTY = 1000.0  # Cost per minute outside a time window
+
+
+def parse_time(value: Optional[str]) -> Optional[int]:
+    """Minutes after midnight for "HH:MM" or "HH:MM:SS", else None"""
+    if not value:
+        return None
+    try:
+        parts = str(value).strip().split(':')
+        hours, minutes = int(parts[0]), int(parts[1]) if len(parts) > 1 else 0
+    except (ValueError, IndexError):
+        return None
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        return None
+    return hours * 60 + minutes
+
+
+def format_time(minutes: float) -> str:
+    """Format minutes after midnight as "HH:MM\""""
+    minutes = int(round(minutes))
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def visit_point(visit: Dict) -> Optional[Tuple[float, float]]:
+    """Coordinates of a visit's client, from parsed columns or the text field"""
+    if visit.get('latitude') is not None and visit.get('longitude') is not None:
+        return visit['latitude'], visit['longitude']
+    return parse_coordinates(visit.get('location_coordinates'))
+
+
+def travel_matrix(points: List[Tuple[float, float]]) -> Tuple[List[List[float]], List[List[float]]]:
+    """(km, minutes) matrices of estimated road travel between every pair of points"""
+    n = len(points)
+    km = [[0.0] * n for _ in range(n)]
+    minutes = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        lat1, lon1 = points[i]
+        for j in range(i + 1, n):
+            distance = haversine_km(lat1, lon1, points[j][0], points[j][1]) * ROAD_FACTOR
+            km[i][j] = km[j][i] = distance
+            minutes[i][j] = minutes[j][i] = distance / AVERAGE_SPEED_KMH * 60.0
+    return km, minutes
+
+
+class RoutePlanner:
+    """Plans the order of one day's visits
+
+    Node 0 of the matrices is the surveyor's starting point; visits are
+    nodes 1..n. Windows are (open, close) in minutes after midnight.
+    """
+
+    def __init__(self, minutes: List[List[float]], windows: List[Tuple[float, float]],
+                 day_start: float, service_minutes: float = SERVICE_MINUTES):
+        self.minutes = minutes
+        self.windows = windows
+        self.day_start = day_start
+        self.service_minutes = service_minutes
+
+    def evaluate(self, route: List[int]) -> Tuple[float, float, float]:
+        """(cost, travel minutes, late minutes) of visiting nodes in order"""
+        minutes = self.minutes
+        windows = self.windows
+        service = self.service_minutes
+        clock = self.day_start
+        travel = 0.0
+        late = 0.0
+        previous = 0
+        for node in route:
+            leg = minutes[previous][node]
+            travel += leg
+            clock += leg
+            opens, closes = windows[node]
+            if clock < opens:
+                clock = opens
+            elif clock > closes:
+                late += clock - closes
+            clock += service
+            previous = node
+        return travel + LATE_PENALTY * late, travel, late
+
+    def nearest_neighbour(self) -> List[int]:
+        """Greedy route that always goes to the stop that can start soonest"""
+        minutes = self.minutes
+        windows = self.windows
+        remaining = set(range(1, len(windows)))
+        route = []
+        clock = self.day_start
+        current = 0
+        while remaining:
+            best = None
+            best_score = None
+            for node in remaining:
+                arrival = clock + minutes[current][node]
+                opens, closes = windows[node]
+                start = max(arrival, opens)
+                # Waiting counts like driving; lateness is almost never worth it
+                score = start - clock + LATE_PENALTY * max(0.0, arrival - closes)
+                # Break ties towards the window that closes first
+                if best_score is None or (score, closes) < best_score:
+                    best_score = (score, closes)
+                    best = node
+            arrival = clock + minutes[current][best]
+            clock = max(arrival, windows[best][0]) + self.service_minutes
+            current = best
+            route.append(best)
+            remaining.discard(best)
+        return route
+
+    def two_opt(self, route: List[int], max_passes: int = 50) -> List[int]:
+        """Improve a route by reversing segments while that lowers its cost"""
+        minutes = self.minutes
+        best_cost = self.evaluate(route)[0]
+        n = len(route)
+        for _ in range(max_passes):
+            improved = False
+            late = best_cost >= LATE_PENALTY
+            for i in range(n - 1):
+                a = route[i - 1] if i > 0 else 0
+                b = route[i]
+                for j in range(i + 1, n):
+                    c = route[j]
+                    d = route[j + 1] if j + 1 < n else None
+                    # Distance delta of the reversal; symmetric matrix so the
+                    # reversed interior keeps its length
+                    delta = minutes[a][c] - minutes[a][b]
+                    if d is not None:
+                        delta += minutes[b][d] - minutes[c][d]
+                    # With nobody late only shorter routes can be cheaper;
+                    # otherwise a longer route may still fix a window
+                    if delta >= -1e-9 and not late:
+                        continue
+                    candidate = route[:i] + route[i:j + 1][::-1] + route[j + 1:]
+                    cost = self.evaluate(candidate)[0]
+                    if cost < best_cost - 1e-9:
+                        route = candidate
+                        best_cost = cost
+                        late = best_cost >= LATE_PENALTY
+                        improved = True
+                        b = route[i]
+            if not improved:
+                break
+        return route
+
+    def solve(self) -> List[int]:
+        """Nearest neighbour construction followed by 2-opt"""
+        if len(self.windows) <= 1:
+            return []
+        return self.two_opt(self.nearest_neighbour())
+
+
+def visit_window(visit: Dict, day_start: int, day_end: int) -> Tuple[int, int]:
+    """Time window for a visit: around its booked time, else the working day"""
+    booked = parse_time(visit.get('visit_time'))
+    if booked is None:
+        return day_start, day_end - SERVICE_MINUTES
+    return booked - APPOINTMENT_SLACK_MINUTES, booked + APPOINTMENT_SLACK_MINUTES
+
+
+def plan_route(visits: List[Dict], start: Optional[Tuple[float, float]] = None,
+               day_start: str = DAY_START, day_end: str = DAY_END,
+               service_minutes: float = SERVICE_MINUTES) -> Dict:
+    """Order a day's visits to minimise driving while keeping appointments
+
+    `visits` are rows from DatabaseManager.get_site_visits(). `start` is
+    where the surveyor sets off from; when omitted the route starts at the
+    first stop. Returns a plan dict with the ordered `stops` (each visit
+    gets `eta`, `leg_km` and `late_minutes`), totals, and `unrouted`
+    visits whose client has no usable coordinates.
+    """
+    start_minutes = parse_time(day_start)
+    end_minutes = parse_time(day_end)
+
+    routed = []
+    unrouted = []
+    for visit in visits:
+        point = visit_point(visit)
+        if point:
+            routed.append((visit, point))
+        else:
+            unrouted.append(visit)
+
+    points = [start] if start else [routed[0][1] if routed else (0.0, 0.0)]
+    points += [point for _, point in routed]
+    km, minutes = travel_matrix(points)
+    if not start:
+        # Open route: leaving "home" costs nothing, so any first stop is free
+        for j in range(len(points)):
+            km[0][j] = minutes[0][j] = 0.0
+
+    windows = [(start_minutes, end_minutes)]
+    windows += [visit_window(visit, start_minutes, end_minutes) for visit, _ in routed]
+
+    planner = RoutePlanner(minutes, windows, start_minutes, service_minutes)
+    order = planner.solve()
+    cost, travel_minutes, late_minutes = planner.evaluate(order)
+
+    stops = []
+    clock = start_minutes
+    previous = 0
+    total_km = 0.0
+    for node in order:
+        clock += minutes[previous][node]
+        opens, closes = windows[node]
+        stop = dict(routed[node - 1][0])
+        stop['eta'] = format_time(max(clock, opens))
+        stop['leg_km'] = round(km[previous][node], 2)
+        stop['late_minutes'] = round(max(0.0, clock - closes))
+        clock = max(clock, opens) + service_minutes
+        total_km += km[previous][node]
+        previous = node
+        stops.append(stop)
+
+    return {
+        'stops': stops,
+        'unrouted': unrouted,
+        'total_km': round(total_km, 2),
+        'travel_minutes': round(travel_minutes),
+        'late_minutes': round(late_minutes),
+        'finish': format_time(clock) if stops else day_start
+    }
@@ -1,3 +1,18 @@
 """
 Screen modules for Voltmatic Energy Solutions app
 """
+
+
+def app_database():
+    """The running app's DatabaseManager, so screens share its path and mode
+
+    A screen with its own manager would write past a mirror-mode app's RAM
+    copy, which the next flush then writes back over the file.
+    """
+    from kivymd.app import MDApp
+
+    db = getattr(MDApp.get_running_app(), 'db', None)
+    if db is None:
+        from app.database import DatabaseManager
+        db = DatabaseManager()
+    return db
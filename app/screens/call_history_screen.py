@@ -2,26 +2,31 @@
 Call History screen for Voltmatic Energy Solutions Site Survey App
 """
 from kivy.uix.screenmanager import Screen
-from kivymd.uix.boxlayout import MDBoxLayout
-from kivymd.uix.card import MDCard
 from kivymd.uix.label import MDLabel
-from kivymd.uix.button import MDIconButton
-from kivymd.uix.dialog import MDDialog
-from kivymd.uix.button import MDFlatButton
-from app.database import DatabaseManager
+from app.screens import app_database
+from app.widgets.cards import CallListCard
+from app.widgets.pool import DialogPool, WidgetPool
+from app.widgets.progressive import renderer
 
 
 class CallHistoryScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.db = DatabaseManager()
+        self.db = app_database()
         self.dialog = None
         self.client_id = None
+        self.card_pool = WidgetPool(CallListCard)
+        self.dialogs = DialogPool()
+        self.card_handlers = {'view': self.view_call_details}
     
     def on_enter(self):
         """Called when screen is entered"""
         self.load_call_history()
     
+    def on_leave(self):
+        """Stop building cards nobody will see"""
+        renderer().cancel_owner(self)
+    
     def set_client(self, client_id):
         """Set the client to show call history for"""
         self.client_id = client_id
@@ -29,7 +34,7 @@ class CallHistoryScreen(Screen):
     def load_call_history(self):
         """Load and display call history for the selected client"""
         calls_container = self.ids.calls_container
-        calls_container.clear_widgets()
+        self.card_pool.recycle(calls_container)
         
         # Update header with client name
         if self.client_id:
@@ -55,113 +60,19 @@ class CallHistoryScreen(Screen):
                 calls_container.add_widget(no_calls_label)
                 return
             
-            for call in calls:
-                call_card = self.create_call_card(call)
-                calls_container.add_widget(call_card)
+            # One lookup for every client name, not one query per card
+            names = {} if self.client_id else {client['id']: client['name'] for client in self.db.get_clients()}
+            if not self.client_id:
+                for call in calls:
+                    call['client_name'] = names.get(call['client_id'], "Unknown Client")
+            renderer().render(calls_container, calls, self.create_call_card, owner=self)
                 
         except Exception as e:
             self.show_error_dialog(f"Error loading call history: {str(e)}")
     
     def create_call_card(self, call):
-        """Create a card widget for a call log"""
-        card = MDCard(
-            size_hint_y=None,
-            height="140dp",
-            padding="15dp",
-            spacing="10dp",
-            elevation=3,
-            radius=[12],
-            md_bg_color=(1, 1, 1, 1)
-        )
-        
-        main_layout = MDBoxLayout(
-            orientation='horizontal',
-            spacing="15dp"
-        )
-        
-        # Call info
-        info_layout = MDBoxLayout(
-            orientation='vertical',
-            spacing="5dp"
-        )
-        
-        # Get client name if not already filtered by client
-        if not self.client_id:
-            client = self.db.get_client(call['client_id'])
-            client_name = client['name'] if client else "Unknown Client"
-            
-            client_label = MDLabel(
-                text=f"Client: {client_name}",
-                font_style="H6",
-                theme_text_color="Primary",
-                size_hint_y=None,
-                height="25dp"
-            )
-            info_layout.add_widget(client_label)
-        
-        # Call date and caller
-        date_label = MDLabel(
-            text=f"Date: {call['call_date']} | Caller: {call.get('caller_name', 'N/A')}",
-            font_style="Caption",
-            theme_text_color="Secondary",
-            size_hint_y=None,
-            height="20dp"
-        )
-        info_layout.add_widget(date_label)
-        
-        # Duration and purpose
-        details_label = MDLabel(
-            text=f"Duration: {call.get('call_duration', 'N/A')} | Purpose: {call.get('call_purpose', 'N/A')}",
-            font_style="Caption",
-            theme_text_color="Secondary",
-            size_hint_y=None,
-            height="20dp"
-        )
-        info_layout.add_widget(details_label)
-        
-        # Outcome
-        outcome_label = MDLabel(
-            text=f"Outcome: {call.get('call_outcome', 'N/A')}",
-            font_style="Caption",
-            theme_text_color="Secondary",
-            size_hint_y=None,
-            height="20dp"
-        )
-        info_layout.add_widget(outcome_label)
-        
-        # Follow-up indicator
-        if call.get('follow_up_required'):
-            follow_up_label = MDLabel(
-                text=f"📅 Follow-up: {call.get('follow_up_date', 'Date not set')}",
-                font_style="Caption",
-                theme_text_color="Primary",
-                size_hint_y=None,
-                height="20dp"
-            )
-            info_layout.add_widget(follow_up_label)
-        
-        main_layout.add_widget(info_layout)
-        
-        # Action button
-        actions_layout = MDBoxLayout(
-            orientation='vertical',
-            size_hint_x=None,
-            width="50dp",
-            spacing="5dp"
-        )
-        
-        view_button = MDIconButton(
-            icon="eye",
-            theme_text_color="Custom",
-            text_color=(0.2, 0.6, 1, 1),
-            on_release=lambda x: self.view_call_details(call)
-        )
-        actions_layout.add_widget(view_button)
-        
-        main_layout.add_widget(actions_layout)
-        card.add_widget(main_layout)
-        
-        return card
+        """Take a card from the pool and bind it to the call"""
+        return self.card_pool.acquire().bind_record(call, self.card_handlers)
     
     def view_call_details(self, call):
         """View detailed call information"""
@@ -188,17 +99,24 @@ Follow-up Required: {'Yes' if call.get('follow_up_required') else 'No'}
 {f"Follow-up Date: {call.get('follow_up_date')}" if call.get('follow_up_required') else ""}
         """
         
-        self.dialog = MDDialog(
-            title="Call Details",
-            text=details_text,
-            buttons=[
-                MDFlatButton(
-                    text="CLOSE",
-                    on_release=self.close_dialog
-                )
-            ]
-        )
-        self.dialog.open()
+        if call.get('follow_up_required') and not call.get('follow_up_done'):
+            self.dialog = self.dialogs.show('follow_up_details', "Call Details", details_text, buttons=[
+                ("MARK FOLLOW-UP DONE", lambda: self.complete_follow_up(call)),
+                ("CLOSE", None),
+            ])
+        else:
+            self.dialog = self.dialogs.show('details', "Call Details", details_text, buttons=[("CLOSE", None)])
+    
+    def complete_follow_up(self, call):
+        """Mark a call's follow-up done and cancel its reminder"""
+        from kivymd.app import MDApp
+        
+        reminders = getattr(MDApp.get_running_app(), 'reminders', None)
+        if reminders:
+            reminders.complete(call['id'])
+        else:
+            self.db.complete_followup(call['id'])
+        self.load_call_history()
     
     def close_dialog(self, *args):
         """Close the dialog"""
@@ -207,17 +125,7 @@ Follow-up Required: {'Yes' if call.get('follow_up_required') else 'No'}
     
     def show_error_dialog(self, message):
         """Show error dialog"""
-        self.dialog = MDDialog(
-            title="Error",
-            text=message,
-            buttons=[
-                MDFlatButton(
-                    text="OK",
-                    on_release=self.close_dialog
-                )
-            ]
-        )
-        self.dialog.open()
+        self.dialog = self.dialogs.show('message', "Error", message)
     
     def go_back(self):
         """Navigate back to clients screen"""
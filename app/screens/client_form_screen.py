@@ -3,8 +3,8 @@ Client form screen for adding/editing clients
 """
 from kivy.properties import ObjectProperty, StringProperty
 from kivy.uix.screenmanager import Screen
-from kivymd.uix.dialog import MDDialog
-from kivymd.uix.button import MDFlatButton
+from app.widgets.pool import DialogPool
+from app.screens import app_database
 
 class ClientFormScreen(Screen):
     """Screen for adding or editing client information"""
@@ -15,12 +15,12 @@ class ClientFormScreen(Screen):
         super().__init__(**kwargs)
         self.db = None
         self.dialog = None
+        self.dialogs = DialogPool()
     
     def on_enter(self):
         """Called when screen is entered"""
         if not self.db:
-            from app.database import DatabaseManager
-            self.db = DatabaseManager()
+            self.db = app_database()
     
     def set_client_for_edit(self, client_id):
         """Load client data for editing"""
@@ -66,8 +66,7 @@ class ClientFormScreen(Screen):
         try:
             # Ensure database is initialized
             if not self.db:
-                from app.database import DatabaseManager
-                self.db = DatabaseManager()
+                self.db = app_database()
             
             if self.client_id:
                 # Update existing client (would need update method in database)
@@ -88,37 +87,11 @@ class ClientFormScreen(Screen):
     
     def show_error(self, message):
         """Show error dialog"""
-        if self.dialog:
-            self.dialog.dismiss()
-        
-        self.dialog = MDDialog(
-            title="Error",
-            text=message,
-            buttons=[
-                MDFlatButton(
-                    text="OK",
-                    on_release=lambda x: self.dialog.dismiss()
-                )
-            ]
-        )
-        self.dialog.open()
+        self.dialog = self.dialogs.show('message', "Error", message)
     
     def show_success(self, message):
         """Show success dialog"""
-        if self.dialog:
-            self.dialog.dismiss()
-        
-        self.dialog = MDDialog(
-            title="Success",
-            text=message,
-            buttons=[
-                MDFlatButton(
-                    text="OK",
-                    on_release=lambda x: self.dialog.dismiss()
-                )
-            ]
-        )
-        self.dialog.open()
+        self.dialog = self.dialogs.show('message', "Success", message)
     
     def go_back(self):
         """Navigate back to previous screen"""
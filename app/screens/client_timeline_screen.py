@@ -0,0 +1,107 @@
+"""
+Client timeline screen for Voltmatic Energy Solutions Site Survey App
+
+A client's surveys, calls and site visits in one list, newest first. Pages
+come from DatabaseManager.get_client_timeline; the next one is loaded when
+the list is scrolled near its end.
+"""
+from kivy.uix.screenmanager import Screen
+from kivymd.uix.label import MDLabel
+from app.widgets.cards import TimelineCard
+from app.widgets.pool import DialogPool, WidgetPool
+from app.widgets.progressive import renderer
+from app.screens import app_database
+
+# Items fetched per query
+PAGE_SIZE = 30
+# Load the next page once the list is scrolled this close to the bottom
+LOAD_MORE_SCROLL_Y = 0.1
+
+
+class ClientTimelineScreen(Screen):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.db = app_database()
+        self.dialog = None
+        self.client_id = None
+        self.next_page = None
+        self.loading = False
+        self.card_pool = WidgetPool(TimelineCard)
+        self.dialogs = DialogPool()
+        self.scroll_bound = False
+    
+    def on_enter(self):
+        """Called when screen is entered"""
+        if not self.scroll_bound:
+            self.ids.timeline_container.parent.bind(scroll_y=self.on_list_scroll)
+            self.scroll_bound = True
+        self.load_timeline()
+    
+    def on_leave(self):
+        """Stop building cards nobody will see"""
+        renderer().cancel_owner(self)
+        self.loading = False
+    
+    def set_client(self, client_id):
+        """Set the client to show the timeline of"""
+        self.client_id = client_id
+    
+    def load_timeline(self):
+        """Show the first page of the selected client's timeline"""
+        container = self.ids.timeline_container
+        self.card_pool.recycle(container)
+        self.next_page = None
+        
+        client = self.db.get_client(self.client_id) if self.client_id else None
+        if client is None:
+            container.add_widget(self.empty_label("Client not found"))
+            return
+        self.ids.header_label.title = f"Timeline - {client['name']}"
+        self.load_page()
+    
+    def load_page(self, before=None):
+        """Fetch one page and queue its cards"""
+        container = self.ids.timeline_container
+        try:
+            page = self.db.get_client_timeline(self.client_id, before, limit=PAGE_SIZE)
+        except Exception as e:
+            self.show_error_dialog(f"Error loading timeline: {str(e)}")
+            return
+        
+        if not page['items'] and before is None:
+            container.add_widget(self.empty_label("No surveys, calls or visits yet"))
+            return
+        self.next_page = page['next']
+        self.loading = True
+        # Later pages land below the fold, so none of their cards are built up front
+        renderer().render(container, page['items'], self.create_timeline_card, owner=self,
+                          first=None if before is None else 0, on_done=self.page_done)
+    
+    def page_done(self, job):
+        self.loading = False
+    
+    def on_list_scroll(self, view, scroll_y):
+        """Load the next page when the end of the list comes into view"""
+        if scroll_y <= LOAD_MORE_SCROLL_Y and self.next_page and not self.loading:
+            self.load_page(self.next_page)
+    
+    def create_timeline_card(self, item):
+        """Take a card from the pool and bind it to the item"""
+        return self.card_pool.acquire().bind_record(item, {})
+    
+    def empty_label(self, text):
+        return MDLabel(
+            text=text,
+            theme_text_color="Secondary",
+            halign="center",
+            size_hint_y=None,
+            height="48dp"
+        )
+    
+    def show_error_dialog(self, message):
+        """Show error dialog"""
+        self.dialog = self.dialogs.show('message', "Error", message)
+    
+    def go_back(self):
+        """Navigate back to clients screen"""
+        self.manager.current = 'clients'
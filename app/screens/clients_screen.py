@@ -4,11 +4,15 @@ Clients management screen for Voltmatic Energy Solutions Site Survey App
 from kivy.properties import ObjectProperty
 from kivy.uix.screenmanager import Screen
 from kivy.clock import Clock
-from kivymd.uix.card import MDCard
-from kivymd.uix.button import MDIconButton, MDFlatButton
+from kivymd.uix.button import MDFlatButton
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.label import MDLabel
 from kivymd.uix.dialog import MDDialog
+from app.widgets.cards import ClientListCard
+from app.widgets.pool import DialogPool, WidgetPool
+from app.widgets.progressive import renderer
+from app.prefetch import IDLE_SECONDS, Prefetcher
+from app.screens import app_database
 
 class ClientsScreen(Screen):
     """Screen for managing clients"""
@@ -17,13 +21,64 @@ class ClientsScreen(Screen):
         super().__init__(**kwargs)
         self.db = None
         self.dialog = None
+        self.call_log_dialog = None
+        self.call_log_client_id = None
+        self.card_pool = WidgetPool(ClientListCard)
+        self.prefetcher = None
+        self.prefetch_trigger = Clock.create_trigger(self.prefetch_visible, IDLE_SECONDS)
+        self.dialogs = DialogPool()
+        self.card_handlers = {
+            'call': lambda client: self.call_client(client['id'], client['phone']),
+            'call_history': lambda client: self.view_call_history(client['id']),
+            'timeline': lambda client: self.view_timeline(client['id']),
+            'survey': lambda client: self.start_survey(client['id']),
+            'view_surveys': lambda client: self.view_surveys(client['id']),
+            'edit': lambda client: self.edit_client(client['id']),
+            'delete': lambda client: self.confirm_delete_client(client['id'], client['name']),
+        }
     
     def on_enter(self):
         """Called when screen is entered"""
         if not self.db:
-            from app.database import DatabaseManager
-            self.db = DatabaseManager()
+            self.db = app_database()
+        if self.prefetcher is None:
+            self.prefetcher = Prefetcher(self.db)
+            self.ids.clients_list.parent.bind(scroll_y=self.on_list_scroll)
         self.load_clients()
+        self.prefetch_trigger()
+    
+    def on_leave(self):
+        """Stop building cards nobody will see, and prefetching for them"""
+        renderer().cancel_owner(self)
+        self.prefetch_trigger.cancel()
+        if self.prefetcher:
+            self.prefetcher.cancel()
+    
+    def on_list_scroll(self, view, scroll_y):
+        """Drop prefetches for the old position; start again once the list is still"""
+        self.prefetcher.cancel()
+        self.prefetch_trigger.cancel()
+        self.prefetch_trigger()
+    
+    def visible_client_ids(self):
+        """Ids of the clients whose cards are in view, top first"""
+        container = self.ids.clients_list
+        view = container.parent
+        _, bottom = view.to_window(view.x, view.y)
+        top = bottom + view.height
+        visible = []
+        for card in container.children:
+            if getattr(card, 'record', None) is None:
+                continue
+            _, y = card.to_window(card.x, card.y)
+            if y <= top and y + card.height >= bottom:
+                visible.append((-y, card.record['id']))
+        return [client_id for _, client_id in sorted(visible)]
+    
+    def prefetch_visible(self, dt=None):
+        """Load surveys and call logs of the clients on screen into the cache"""
+        if self.prefetcher and self.manager and self.manager.current == self.name:
+            self.prefetcher.prefetch(self.visible_client_ids())
     
     def load_clients(self, dt=None):
         """Load clients from database"""
@@ -33,15 +88,13 @@ class ClientsScreen(Screen):
             
         # Ensure database is initialized
         if not self.db:
-            from app.database import DatabaseManager
-            self.db = DatabaseManager()
+            self.db = app_database()
         
         try:
             clients = self.db.get_clients()
-            print(f"Found {len(clients)} clients")  # Debug print
             
-            # Clear existing items
-            self.ids.clients_list.clear_widgets()
+            # Clear existing items, keeping their cards for reuse
+            self.card_pool.recycle(self.ids.clients_list)
             
             if not clients:
                 # Show empty state
@@ -54,10 +107,8 @@ class ClientsScreen(Screen):
                 self.ids.clients_list.add_widget(empty_label)
                 return
             
-            # Add client cards
-            for client in clients:
-                client_card = self.create_client_card(client)
-                self.ids.clients_list.add_widget(client_card)
+            # Add client cards, the first screenful now and the rest over the next frames
+            renderer().render(self.ids.clients_list, clients, self.create_client_card, owner=self)
                 
         except Exception as e:
             print(f"Error loading clients: {str(e)}")
@@ -70,104 +121,8 @@ class ClientsScreen(Screen):
             self.ids.clients_list.add_widget(error_label)
     
     def create_client_card(self, client):
-        """Create a client card"""
-        card = MDCard(
-            size_hint_y=None,
-            height="120dp",
-            padding="15dp",
-            spacing="10dp",
-            elevation=3,
-            radius=[12],
-            md_bg_color=(1, 1, 1, 1)
-        )
-        
-        content = MDBoxLayout(orientation='horizontal', spacing="15dp")
-        
-        # Client info
-        info_layout = MDBoxLayout(orientation='vertical', spacing="5dp")
-        
-        name_label = MDLabel(
-            text=client['name'],
-            font_style="H6",
-            size_hint_y=None,
-            height="25dp"
-        )
-        
-        contact_label = MDLabel(
-            text=f" {client['phone']} | {client['email'] or 'No email'}",
-            font_style="Caption",
-            size_hint_y=None,
-            height="20dp"
-        )
-        
-        address_label = MDLabel(
-            text=f"📍 {client['address'][:50]}..." if len(client['address']) > 50 else f"📍 {client['address']}",
-            font_style="Caption",
-            size_hint_y=None,
-            height="20dp"
-        )
-        
-        info_layout.add_widget(name_label)
-        info_layout.add_widget(contact_label)
-        info_layout.add_widget(address_label)
-        
-        # Action buttons
-        actions_layout = MDBoxLayout(
-            orientation='horizontal',
-            size_hint_x=None,
-            width="250dp",
-            spacing="5dp"
-        )
-        
-        call_button = MDIconButton(
-            icon="phone",
-            theme_text_color="Custom",
-            text_color=(0.2, 0.8, 0.2, 1),
-            on_release=lambda x: self.call_client(client['id'], client['phone'])
-        )
-        
-        survey_button = MDIconButton(
-            icon="clipboard-plus",
-            on_release=lambda x: self.start_survey(client['id'])
-        )
-        
-        view_surveys_button = MDIconButton(
-            icon="eye",
-            on_release=lambda x: self.view_surveys(client['id'])
-        )
-        
-        edit_button = MDIconButton(
-            icon="pencil",
-            on_release=lambda x: self.edit_client(client['id'])
-        )
-        
-        delete_button = MDIconButton(
-            icon="delete",
-            theme_text_color="Custom",
-            text_color=(1, 0.2, 0.2, 1),
-            on_release=lambda x: self.confirm_delete_client(client['id'], client['name'])
-        )
-        
-        # Call history button
-        call_history_button = MDIconButton(
-            icon="history",
-            theme_text_color="Custom",
-            text_color=(0.6, 0.4, 1, 1),
-            on_release=lambda x: self.view_call_history(client['id'])
-        )
-        
-        actions_layout.add_widget(call_button)
-        actions_layout.add_widget(call_history_button)
-        actions_layout.add_widget(survey_button)
-        actions_layout.add_widget(view_surveys_button)
-        actions_layout.add_widget(edit_button)
-        actions_layout.add_widget(delete_button)
-        
-        content.add_widget(info_layout)
-        content.add_widget(actions_layout)
-        card.add_widget(content)
-        
-        return card
+        """Take a card from the pool and bind it to the client"""
+        return self.card_pool.acquire().bind_record(client, self.card_handlers)
     
     def start_survey(self, client_id):
         """Start a new survey for the client"""
@@ -191,7 +146,19 @@ class ClientsScreen(Screen):
         self.show_call_log_form(client_id)
     
     def show_call_log_form(self, client_id):
-        """Show form to log call details"""
+        """Show form to log call details, reusing the dialog after the first time"""
+        self.call_log_client_id = client_id
+        if self.call_log_dialog is None:
+            self.call_log_dialog = self.build_call_log_dialog()
+        else:
+            for field in (self.caller_name_field, self.call_duration_field, self.call_purpose_field,
+                          self.call_notes_field, self.call_outcome_field, self.follow_up_date_field):
+                field.text = ''
+            self.follow_up_checkbox.active = False
+        self.call_log_dialog.open()
+    
+    def build_call_log_dialog(self):
+        """Build the call log form; SAVE logs against call_log_client_id"""
         from kivymd.uix.textfield import MDTextField
         from kivymd.uix.boxlayout import MDBoxLayout
         from kivymd.uix.checkbox import MDCheckbox
@@ -270,7 +237,7 @@ class ClientsScreen(Screen):
         content.add_widget(follow_up_layout)
         content.add_widget(self.follow_up_date_field)
         
-        self.call_log_dialog = MDDialog(
+        return MDDialog(
             title="Log Call Details",
             type="custom",
             content_cls=content,
@@ -281,11 +248,10 @@ class ClientsScreen(Screen):
                 ),
                 MDFlatButton(
                     text="SAVE",
-                    on_release=lambda x: self.save_call_log(client_id)
+                    on_release=lambda x: self.save_call_log(self.call_log_client_id)
                 )
             ]
         )
-        self.call_log_dialog.open()
     
     def save_call_log(self, client_id):
         """Save the call log to database"""
@@ -304,7 +270,8 @@ class ClientsScreen(Screen):
                 'follow_up_date': self.follow_up_date_field.text if self.follow_up_checkbox.active and self.follow_up_date_field.text else None
             }
             
-            self.db.add_call_log(call_data)
+            call_data['id'] = self.db.add_call_log(call_data)
+            self.schedule_follow_up(call_data)
             self.close_call_log_dialog()
             self.show_success_dialog("Call logged successfully")
         except Exception as e:
@@ -312,9 +279,20 @@ class ClientsScreen(Screen):
             self.close_call_log_dialog()  # Close dialog even on error
             self.show_error_dialog(f"Error saving call log: {str(e)}")
     
+    def schedule_follow_up(self, call_data):
+        """Hand a new follow-up to the app's reminder scheduler"""
+        from kivymd.app import MDApp
+        
+        app = MDApp.get_running_app()
+        reminders = getattr(app, 'reminders', None)
+        if reminders and call_data.get('follow_up_required'):
+            client = self.db.get_client(call_data['client_id'])
+            call_data['client_name'] = client['name'] if client else ''
+            reminders.add(call_data)
+    
     def close_call_log_dialog(self, *args):
         """Close call log dialog"""
-        if hasattr(self, 'call_log_dialog'):
+        if self.call_log_dialog:
             self.call_log_dialog.dismiss()
     
     def view_surveys(self, client_id):
@@ -329,6 +307,12 @@ class ClientsScreen(Screen):
         call_history_screen.set_client(client_id)
         self.manager.current = 'call_history'
     
+    def view_timeline(self, client_id):
+        """Navigate to the surveys, calls and visits of a client in one list"""
+        timeline_screen = self.manager.get_screen('client_timeline')
+        timeline_screen.set_client(client_id)
+        self.manager.current = 'client_timeline'
+    
     def edit_client(self, client_id):
         """Edit client information"""
         client_form_screen = self.manager.get_screen('client_form')
@@ -345,23 +329,16 @@ class ClientsScreen(Screen):
     
     def confirm_delete_client(self, client_id, client_name):
         """Show confirmation dialog before deleting client"""
-        self.dialog = MDDialog(
-            title="Delete Client",
-            text=f"Are you sure you want to delete '{client_name}' and all their survey data?\n\nThis action cannot be undone.",
+        self.dialog = self.dialogs.show(
+            'confirm_delete',
+            "Delete Client",
+            f"Are you sure you want to delete '{client_name}' and all their survey data?\n\nThis action cannot be undone.",
             buttons=[
-                MDFlatButton(
-                    text="CANCEL",
-                    on_release=self.close_dialog
-                ),
-                MDFlatButton(
-                    text="DELETE",
-                    theme_text_color="Custom",
-                    text_color=(1, 0.2, 0.2, 1),
-                    on_release=lambda x: self.delete_client(client_id)
-                )
+                ("CANCEL", None),
+                ("DELETE", lambda: self.delete_client(client_id),
+                 {'theme_text_color': "Custom", 'text_color': (1, 0.2, 0.2, 1)}),
             ]
         )
-        self.dialog.open()
     
     def delete_client(self, client_id):
         """Delete the client and all their data"""
@@ -379,31 +356,11 @@ class ClientsScreen(Screen):
     
     def show_success_dialog(self, message):
         """Show success dialog"""
-        self.dialog = MDDialog(
-            title="Success",
-            text=message,
-            buttons=[
-                MDFlatButton(
-                    text="OK",
-                    on_release=self.close_dialog
-                )
-            ]
-        )
-        self.dialog.open()
+        self.dialog = self.dialogs.show('message', "Success", message)
     
     def show_error_dialog(self, message):
         """Show error dialog"""
-        self.dialog = MDDialog(
-            title="Error",
-            text=message,
-            buttons=[
-                MDFlatButton(
-                    text="OK",
-                    on_release=self.close_dialog
-                )
-            ]
-        )
-        self.dialog.open()
+        self.dialog = self.dialogs.show('message', "Error", message)
     
     def close_dialog(self, *args):
         """Close the dialog"""
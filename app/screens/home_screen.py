@@ -7,6 +7,7 @@ from kivy.clock import Clock
 from kivymd.uix.card import MDCard
 from kivymd.uix.button import MDRaisedButton
 from kivymd.uix.boxlayout import MDBoxLayout
+from app.screens import app_database
 
 class HomeScreen(Screen):
     """Main home screen with dashboard and quick actions"""
@@ -18,8 +19,7 @@ class HomeScreen(Screen):
     def on_enter(self):
         """Called when screen is entered"""
         if not self.db:
-            from app.database import DatabaseManager
-            self.db = DatabaseManager()
+            self.db = app_database()
         self.load_dashboard_data()
     
     def load_dashboard_data(self, dt=None):
@@ -28,19 +28,17 @@ class HomeScreen(Screen):
             return
         
         try:
-            # Get statistics
-            clients = self.db.get_clients()
-            surveys = self.db.get_site_surveys()
+            # Get statistics from the rollup tables
+            counts = self.db.get_dashboard_counts()
             recent_surveys = self.db.get_recent_surveys(3)
             
             # Update dashboard cards
             if hasattr(self.ids, 'clients_count'):
-                self.ids.clients_count.text = str(len(clients))
+                self.ids.clients_count.text = str(counts.get('clients', 0))
             if hasattr(self.ids, 'surveys_count'):
-                self.ids.surveys_count.text = str(len(surveys))
+                self.ids.surveys_count.text = str(counts.get('site_surveys', 0))
             if hasattr(self.ids, 'pending_surveys'):
-                pending = len([s for s in surveys if s['status'] == 'pending'])
-                self.ids.pending_surveys.text = str(pending)
+                self.ids.pending_surveys.text = str(counts.get('pending_surveys', 0))
             
             # Load recent surveys
             self.load_recent_surveys(recent_surveys)
@@ -3,11 +3,11 @@ Site survey screen for collecting survey data
 """
 from kivy.properties import ObjectProperty, StringProperty, NumericProperty
 from kivy.uix.screenmanager import Screen
-from kivymd.uix.dialog import MDDialog
-from kivymd.uix.button import MDFlatButton
 from kivymd.uix.pickers import MDDatePicker
 from kivymd.uix.menu import MDDropdownMenu
 from datetime import datetime
+from app.widgets.pool import DialogPool
+from app.screens import app_database
 
 class SurveyScreen(Screen):
     """Screen for conducting site surveys"""
@@ -18,17 +18,14 @@ class SurveyScreen(Screen):
         super().__init__(**kwargs)
         self.db = None
         self.dialog = None
+        self.dialogs = DialogPool()
         self.selected_client = None
-        self.property_type_menu = None
-        self.kplc_menu = None
-        self.system_type_menu = None
-        self.roof_type_menu = None
+        self.menus = {}
     
     def on_enter(self):
         """Called when screen is entered"""
         if not self.db:
-            from app.database import DatabaseManager
-            self.db = DatabaseManager()
+            self.db = app_database()
         
         # Check if client is selected
         if not self.client_id:
@@ -36,8 +33,11 @@ class SurveyScreen(Screen):
             self.manager.current = 'clients'
             return
         
+        # set_client() can run before the first entry created the database
+        if not self.selected_client or self.selected_client['id'] != self.client_id:
+            self.set_client(self.client_id)
+        
         # Set current date and time when entering survey
-        from datetime import datetime
         current_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         self.ids.survey_date_field.text = current_datetime
     
@@ -64,89 +64,53 @@ class SurveyScreen(Screen):
     
     def show_property_type_menu(self):
         """Show property type dropdown menu"""
-        menu_items = [
-            {"text": "Bungalow", "viewclass": "OneLineListItem", "on_release": lambda x="Bungalow": self.set_property_type(x)},
-            {"text": "Mansion", "viewclass": "OneLineListItem", "on_release": lambda x="Mansion": self.set_property_type(x)},
-            {"text": "Commercial", "viewclass": "OneLineListItem", "on_release": lambda x="Commercial": self.set_property_type(x)},
-        ]
-        self.property_type_menu = MDDropdownMenu(
-            caller=self.ids.property_type,
-            items=menu_items,
-            width_mult=4,
-        )
-        self.property_type_menu.open()
-    
-    def set_property_type(self, property_type):
-        """Set selected property type"""
-        self.ids.property_type.text = property_type
-        self.property_type_menu.dismiss()
+        self.open_menu('property_type', ("Bungalow", "Mansion", "Commercial"))
     
     def show_kplc_menu(self):
         """Show KPLC availability dropdown menu"""
-        menu_items = [
-            {"text": "Yes", "viewclass": "OneLineListItem", "on_release": lambda x="Yes": self.set_kplc_availability(x)},
-            {"text": "No", "viewclass": "OneLineListItem", "on_release": lambda x="No": self.set_kplc_availability(x)},
-        ]
-        self.kplc_menu = MDDropdownMenu(
-            caller=self.ids.kplc_availability,
-            items=menu_items,
-            width_mult=4,
-        )
-        self.kplc_menu.open()
-    
-    def set_kplc_availability(self, availability):
-        """Set KPLC availability"""
-        self.ids.kplc_availability.text = availability
-        self.kplc_menu.dismiss()
+        self.open_menu('kplc_availability', ("Yes", "No"))
     
     def show_system_type_menu(self):
         """Show system type dropdown menu"""
-        menu_items = [
-            {"text": "Backup", "viewclass": "OneLineListItem", "on_release": lambda x="Backup": self.set_system_type(x)},
-            {"text": "Off-grid", "viewclass": "OneLineListItem", "on_release": lambda x="Off-grid": self.set_system_type(x)},
-            {"text": "Hybrid", "viewclass": "OneLineListItem", "on_release": lambda x="Hybrid": self.set_system_type(x)},
-        ]
-        self.system_type_menu = MDDropdownMenu(
-            caller=self.ids.system_type,
-            items=menu_items,
-            width_mult=4,
-        )
-        self.system_type_menu.open()
-    
-    def set_system_type(self, system_type):
-        """Set selected system type"""
-        self.ids.system_type.text = system_type
-        self.system_type_menu.dismiss()
+        self.open_menu('system_type', ("Backup", "Off-grid", "Hybrid"))
     
     def show_roof_type_menu(self):
         """Show roof type dropdown menu"""
-        menu_items = [
-            {"text": "Flat Roof", "viewclass": "OneLineListItem", "on_release": lambda x="Flat Roof": self.set_roof_type(x)},
-            {"text": "Pitched Roof", "viewclass": "OneLineListItem", "on_release": lambda x="Pitched Roof": self.set_roof_type(x)},
-        ]
-        self.roof_type_menu = MDDropdownMenu(
-            caller=self.ids.roof_type,
-            items=menu_items,
-            width_mult=4,
-        )
-        self.roof_type_menu.open()
-    
-    def set_roof_type(self, roof_type):
-        """Set selected roof type"""
-        self.ids.roof_type.text = roof_type
-        self.roof_type_menu.dismiss()
+        self.open_menu('roof_type', ("Flat Roof", "Pitched Roof"))
+    
+    def open_menu(self, field, items):
+        """Open the dropdown for a field; built once and reopened, as the items never change"""
+        menu = self.menus.get(field)
+        if menu is None:
+            menu = self.menus[field] = MDDropdownMenu(
+                caller=self.ids[field],
+                items=[
+                    {"text": item, "viewclass": "OneLineListItem", "on_release": lambda x=item: self.select_menu_item(field, x)}
+                    for item in items
+                ],
+                width_mult=4,
+            )
+        menu.open()
+    
+    def select_menu_item(self, field, value):
+        """Put the chosen item in its field and close the menu"""
+        self.ids[field].text = value
+        self.menus[field].dismiss()
     
     def calculate_system_size(self):
         """Calculate recommended system size based on energy usage"""
         try:
+            from app.sizing import recommend_system
+
             energy_usage = float(self.ids.energy_usage_field.text or 0)
-            # Simple calculation: 1kW system per 150 kWh monthly usage
-            recommended_size = energy_usage / 150
+            # Yield comes from the irradiance grid at the client's coordinates,
+            # falling back to 150 kWh per kW per month when they are unknown
+            client = self.db.get_client(self.client_id) if self.db and self.client_id else None
+            location = client.get('location_coordinates') if client else None
+            recommended_size, estimated_cost = recommend_system(
+                energy_usage, location, self.ids.system_type.text or None
+            )
             self.ids.system_size_field.text = f"{recommended_size:.1f}"
-            
-            # Estimate cost (rough calculation)
-            cost_per_kw = 90000  # KES per kW
-            estimated_cost = recommended_size * cost_per_kw
             self.ids.estimated_cost_field.text = f"{estimated_cost:,.0f}"
             
         except ValueError:
@@ -157,8 +121,7 @@ class SurveyScreen(Screen):
         try:
             # Ensure database is initialized
             if not self.db:
-                from app.database import DatabaseManager
-                self.db = DatabaseManager()
+                self.db = app_database()
             
             # Get selected appliances
             appliances = []
@@ -268,44 +231,13 @@ class SurveyScreen(Screen):
     
     def show_error(self, message):
         """Show error dialog"""
-        if self.dialog:
-            self.dialog.dismiss()
-        
-        self.dialog = MDDialog(
-            title="Error",
-            text=message,
-            buttons=[
-                MDFlatButton(
-                    text="OK",
-                    on_release=lambda x: self.dialog.dismiss()
-                )
-            ]
-        )
-        self.dialog.open()
+        self.dialog = self.dialogs.show('message', "Error", message)
     
     def show_success(self, message):
         """Show success dialog"""
-        if self.dialog:
-            self.dialog.dismiss()
-        
-        self.dialog = MDDialog(
-            title="Success",
-            text=message,
-            buttons=[
-                MDFlatButton(
-                    text="OK",
-                    on_release=lambda x: self.dialog.dismiss()
-                )
-            ]
-        )
-        self.dialog.open()
+        self.dialog = self.dialogs.show('message', "Success", message)
     
     def go_back(self):
         """Go back to previous screen"""
         self.manager.current = 'home'
-    
-    def on_enter(self):
-        """Called when screen is entered"""
-        if not self.client_id:
-            # Set default date to today
-            self.ids.survey_date_field.text = datetime.now().strftime('%Y-%m-%d')
+
@@ -1,24 +1,29 @@
 from kivy.uix.screenmanager import Screen
-from kivymd.uix.boxlayout import MDBoxLayout
-from kivymd.uix.card import MDCard
 from kivymd.uix.label import MDLabel
-from kivymd.uix.button import MDIconButton
-from kivymd.uix.dialog import MDDialog
-from kivymd.uix.button import MDFlatButton
-from app.database import DatabaseManager
+from app.screens import app_database
+from app.widgets.cards import SurveyListCard
+from app.widgets.pool import DialogPool, WidgetPool
+from app.widgets.progressive import renderer
 
 
 class SurveysListScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.db = DatabaseManager()
+        self.db = app_database()
         self.dialog = None
         self.client_id = None
+        self.card_pool = WidgetPool(SurveyListCard)
+        self.dialogs = DialogPool()
+        self.card_handlers = {'view': self.view_survey, 'edit': self.edit_survey}
     
     def on_enter(self):
         """Called when screen is entered"""
         self.load_surveys()
     
+    def on_leave(self):
+        """Stop building cards nobody will see"""
+        renderer().cancel_owner(self)
+    
     def set_client(self, client_id):
         """Set the client to filter surveys for"""
         self.client_id = client_id
@@ -30,7 +35,7 @@ class SurveysListScreen(Screen):
     def load_surveys(self):
         """Load and display surveys for the selected client"""
         surveys_container = self.ids.surveys_container
-        surveys_container.clear_widgets()
+        self.card_pool.recycle(surveys_container)
         
         # Update header with client name
         if self.client_id:
@@ -56,110 +61,14 @@ class SurveysListScreen(Screen):
                 surveys_container.add_widget(no_surveys_label)
                 return
             
-            for survey in surveys:
-                survey_card = self.create_survey_card(survey)
-                surveys_container.add_widget(survey_card)
+            renderer().render(surveys_container, surveys, self.create_survey_card, owner=self)
                 
         except Exception as e:
             self.show_error_dialog(f"Error loading surveys: {str(e)}")
     
     def create_survey_card(self, survey):
-        """Create a card widget for a survey"""
-        card = MDCard(
-            size_hint_y=None,
-            height="120dp",
-            padding="15dp",
-            spacing="10dp",
-            elevation=3,
-            radius=[12],
-            md_bg_color=(1, 1, 1, 1)
-        )
-        
-        main_layout = MDBoxLayout(
-            orientation='horizontal',
-            spacing="15dp"
-        )
-        
-        # Survey info
-        info_layout = MDBoxLayout(
-            orientation='vertical',
-            spacing="5dp"
-        )
-        
-        # Get client name
-        client = self.db.get_client(survey['client_id'])
-        client_name = client['name'] if client else "Unknown Client"
-        
-        # Survey title
-        title_label = MDLabel(
-            text=f"Survey for {client_name}",
-            font_style="H6",
-            theme_text_color="Primary",
-            size_hint_y=None,
-            height="25dp"
-        )
-        info_layout.add_widget(title_label)
-        
-        # Survey date
-        date_label = MDLabel(
-            text=f"Date: {survey['survey_date']}",
-            font_style="Caption",
-            theme_text_color="Secondary",
-            size_hint_y=None,
-            height="20dp"
-        )
-        info_layout.add_widget(date_label)
-        
-        # Property type and bedrooms
-        property_label = MDLabel(
-            text=f"Property: {survey.get('property_type', 'N/A')} - {survey.get('number_of_bedrooms', 0)} bedrooms",
-            font_style="Caption",
-            theme_text_color="Secondary",
-            size_hint_y=None,
-            height="20dp"
-        )
-        info_layout.add_widget(property_label)
-        
-        # Status
-        status_label = MDLabel(
-            text=f"Status: {survey.get('status', 'pending').title()}",
-            font_style="Caption",
-            theme_text_color="Primary",
-            size_hint_y=None,
-            height="20dp"
-        )
-        info_layout.add_widget(status_label)
-        
-        main_layout.add_widget(info_layout)
-        
-        # Action buttons
-        actions_layout = MDBoxLayout(
-            orientation='vertical',
-            size_hint_x=None,
-            width="80dp",
-            spacing="5dp"
-        )
-        
-        view_button = MDIconButton(
-            icon="eye",
-            theme_text_color="Custom",
-            text_color=(0.2, 0.6, 1, 1),
-            on_release=lambda x: self.view_survey(survey)
-        )
-        actions_layout.add_widget(view_button)
-        
-        edit_button = MDIconButton(
-            icon="pencil",
-            theme_text_color="Custom",
-            text_color=(1, 0.6, 0, 1),
-            on_release=lambda x: self.edit_survey(survey)
-        )
-        actions_layout.add_widget(edit_button)
-        
-        main_layout.add_widget(actions_layout)
-        card.add_widget(main_layout)
-        
-        return card
+        """Take a card from the pool and bind it to the survey"""
+        return self.card_pool.acquire().bind_record(survey, self.card_handlers)
     
     def view_survey(self, survey):
         """View survey details"""
@@ -208,17 +117,7 @@ Notes: {survey.get('notes', 'No notes')}
 Status: {survey.get('status', 'pending').title()}
         """
         
-        self.dialog = MDDialog(
-            title="Survey Details",
-            text=details_text,
-            buttons=[
-                MDFlatButton(
-                    text="CLOSE",
-                    on_release=self.close_dialog
-                )
-            ]
-        )
-        self.dialog.open()
+        self.dialog = self.dialogs.show('details', "Survey Details", details_text, buttons=[("CLOSE", None)])
     
     def edit_survey(self, survey):
         """Edit survey (navigate to survey screen with pre-filled data)"""
@@ -233,17 +132,7 @@ Status: {survey.get('status', 'pending').title()}
     
     def show_error_dialog(self, message):
         """Show error dialog"""
-        self.dialog = MDDialog(
-            title="Error",
-            text=message,
-            buttons=[
-                MDFlatButton(
-                    text="OK",
-                    on_release=self.close_dialog
-                )
-            ]
-        )
-        self.dialog.open()
+        self.dialog = self.dialogs.show('message', "Error", message)
     
     def go_back(self):
         """Navigate back to clients screen"""
@@ -0,0 +1,61 @@
+"""
+System sizing and yield simulation for Voltmatic Energy Solutions Site Survey App
+"""
+from typing import Dict, List, Optional, Tuple
+
+from app.geo import parse_coordinates
+from app.irradiance import DAYS_IN_MONTH, get_grid
+
+# Monthly yield used when a site has no usable coordinates
+DEFAULT_KWH_PER_KW_MONTH = 150.0
+PERFORMANCE_RATIO = 0.78
+COST_PER_KW = 90000  # KES per kW
+TARIFF_KES_PER_KWH = 28.0  # Blended KPLC domestic tariff incl. levies
+
+
+def monthly_insolation(location: Optional[str]) -> Optional[List[float]]:
+    """Mean daily insolation (kWh/m2/day) per month for a location, if known"""
+    point = parse_coordinates(location)
+    if not point:
+        return None
+    grid = get_grid()
+    if not grid:
+        return None
+    return grid.monthly_insolation(*point)
+
+
+def simulate_monthly_output(system_size_kw: float, location: Optional[str] = None) -> List[float]:
+    """Expected kWh produced in each month of the year"""
+    insolation = monthly_insolation(location)
+    if not insolation:
+        return [system_size_kw * DEFAULT_KWH_PER_KW_MONTH] * 12
+    return [system_size_kw * psh * days * PERFORMANCE_RATIO
+            for psh, days in zip(insolation, DAYS_IN_MONTH)]
+
+
+def yield_per_kw(location: Optional[str] = None, system_type: Optional[str] = None) -> float:
+    """kWh per installed kW per month used for sizing
+
+    Off-grid systems are sized for the worst month, everything else for
+    the annual average.
+    """
+    monthly = simulate_monthly_output(1.0, location)
+    if system_type == 'Off-grid':
+        return min(monthly)
+    return sum(monthly) / len(monthly)
+
+
+def recommend_system(monthly_kwh: float, location: Optional[str] = None,
+                     system_type: Optional[str] = None) -> Tuple[float, float]:
+    """Recommended system size (kW) and estimated cost (KES) for a monthly usage"""
+    recommended_size = monthly_kwh / yield_per_kw(location, system_type)
+    return recommended_size, recommended_size * COST_PER_KW
+
+
+def recommend_for_survey(survey: Dict, client: Optional[Dict] = None,
+                         monthly_kwh: Optional[float] = None) -> Tuple[float, float]:
+    """Size a survey using the client's coordinates when they are recorded"""
+    location = client.get('location_coordinates') if client else None
+    if monthly_kwh is None:
+        monthly_kwh = (survey.get('monthly_spending') or 0.0) / TARIFF_KES_PER_KWH
+    return recommend_system(monthly_kwh, location, survey.get('system_type'))
@@ -0,0 +1,108 @@
+"""
+Database locations for Voltmatic Energy Solutions Site Survey App
+
+A database is named by a path or, for in-memory databases, a shared-cache
+URI; every module opens it through connect() so both work the same way.
+
+Modes:
+    file    the SQLite file, read and written directly (default)
+    memory  a private in-memory database, gone when the manager is closed
+    mirror  the file is copied into memory with the backup API at start,
+            all queries run against RAM, and the copy is written back by
+            flush() (on a timer and when the app is paused or stopped)
+
+In mirror mode writes made since the last flush are lost if the process is
+killed, so the app flushes on every pause.
+"""
+import sqlite3
+import time
+import uuid
+from typing import Callable, Optional
+
+MODES = ('file', 'memory', 'mirror')
+FLUSH_INTERVAL_SECONDS = 60
+
+# Told about every connection while query instrumentation is on (app.instrumentation)
+_connect_observer = None
+
+
+def set_connect_observer(observer: Optional[Callable[[sqlite3.Connection, str, float], None]]):
+    """Call observer(conn, db_path, seconds_to_open) after each connect(); None to stop"""
+    global _connect_observer
+    _connect_observer = observer
+
+
+def connect(db_path: str, **kwargs) -> sqlite3.Connection:
+    """Open a database by file path or `file:` URI"""
+    # Plain paths are unaffected by uri=True; only "file:" names are parsed
+    if _connect_observer is None:
+        return sqlite3.connect(db_path, uri=True, **kwargs)
+    start = time.perf_counter()
+    conn = sqlite3.connect(db_path, uri=True, **kwargs)
+    _connect_observer(conn, db_path, time.perf_counter() - start)
+    return conn
+
+
+class MemoryDatabase:
+    """A shared in-memory database that lives as long as this object"""
+
+    def __init__(self, name: Optional[str] = None):
+        self.uri = f"file:voltmatic-{name or uuid.uuid4().hex}?mode=memory&cache=shared"
+        # The database is freed when its last connection closes
+        self._keeper = connect(self.uri)
+
+    def data_version(self) -> int:
+        """Changes whenever another connection commits"""
+        return self._keeper.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        if self._keeper is not None:
+            self._keeper.close()
+            self._keeper = None
+
+
+class HotMirror(MemoryDatabase):
+    """In-memory copy of a database file, written back on flush()"""
+
+    def __init__(self, disk_path: str):
+        super().__init__()
+        self.disk_path = disk_path
+        self.flushes = 0
+        self.load()
+
+    def load(self):
+        """Replace the in-memory copy with the file's contents"""
+        disk = sqlite3.connect(self.disk_path)
+        try:
+            disk.backup(self._keeper)
+        finally:
+            disk.close()
+        self._flushed_version = self.data_version()
+
+    @property
+    def dirty(self) -> bool:
+        """Whether anything was committed since the last load or flush"""
+        return self.data_version() != self._flushed_version
+
+    def flush(self, force: bool = False) -> bool:
+        """Write the in-memory copy back to the file if it changed
+
+        The backup replaces the file's pages inside one transaction, so an
+        interrupted flush leaves the previous contents intact.
+        """
+        if self._keeper is None or not (force or self.dirty):
+            return False
+        version = self.data_version()
+        disk = sqlite3.connect(self.disk_path)
+        try:
+            self._keeper.backup(disk)
+        finally:
+            disk.close()
+        self._flushed_version = version
+        self.flushes += 1
+        return True
+
+    def close(self):
+        """Flush and release the in-memory copy"""
+        self.flush()
+        super().close()
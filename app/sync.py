@@ -0,0 +1,230 @@
+"""
+Offline-first sync for Voltmatic Energy Solutions Site Survey App
+
+Pending changes from the change journal are shipped to the office server in
+compressed, sequence-numbered chunks over one reused HTTP connection. The
+server remembers the highest sequence number it has applied per device, so
+an interrupted sync resumes where it stopped and nothing acknowledged is
+sent twice. Rows are identified across devices by their uid and merged field
+by field (see app.versioning).
+"""
+import http.client
+import json
+import random
+import sqlite3
+import time
+import zlib
+from typing import Dict, List, Optional
+
+from app.cache import entity_cache
+from app.journal import DELETE, paused_journal
+from app.storage import connect
+from app.versioning import (HLC_ZERO, ROW_FIELD, TOMBSTONE_FIELD, UNVERSIONED_COLUMNS, export_versions,
+                            get_device_id, merge_changes)
+
+CONTENT_TYPE = 'application/x-voltmatic-sync'
+CHUNK_SIZE = 500
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 30.0
+
+# Columns that point at rows in another synced table
+REFERENCES = {
+    'site_surveys': {'client_id': 'clients'},
+    'call_logs': {'client_id': 'clients'},
+    'site_visits': {'client_id': 'clients'},
+}
+
+
+class SyncError(Exception):
+    """Raised when the server rejects a request or stays unreachable"""
+
+
+def get_state(conn, key: str, default: int = 0) -> int:
+    row = conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+    return int(row[0]) if row else default
+
+
+def set_state(conn, key: str, value):
+    conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, str(value)))
+
+
+def encode_payload(payload: Dict) -> bytes:
+    """Serialize and compress a sync message"""
+    return zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'), 6)
+
+
+def decode_payload(body: bytes) -> Dict:
+    """Decompress and parse a sync message"""
+    return json.loads(zlib.decompress(body).decode('utf-8'))
+
+
+def export_changes(conn, entries: List[Dict], skip_device: Optional[str] = None) -> List[Dict]:
+    """Turn change journal entries into wire changes
+
+    `entries` come from ChangeJournal.get_changes(). Every synced field is
+    sent with its version stamp, and references carry the parent's uid.
+    Changes that were made by `skip_device` are left out, so a device never
+    pulls back its own work.
+    """
+    cursor = conn.cursor()
+    entries = [e for e in entries if not (skip_device and e.get('source_device') == skip_device)]
+
+    uids, parent_ids = {}, {}
+    for entry in entries:
+        table, row = entry['table_name'], entry.get('row')
+        uids.setdefault(table, []).append(row['uid'] if row else entry['row_uid'])
+        for column, parent in REFERENCES.get(table, {}).items():
+            if row and row.get(column) is not None:
+                parent_ids.setdefault(parent, set()).add(row[column])
+    versions = {table: export_versions(cursor, table, [u for u in table_uids if u])
+                for table, table_uids in uids.items()}
+    parent_uids = {}
+    for parent, ids in parent_ids.items():
+        ids = list(ids)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            cursor.execute(f"SELECT id, uid FROM {parent} WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+            parent_uids.update(((parent, row[0]), row[1]) for row in cursor.fetchall())
+
+    changes = []
+    for entry in entries:
+        table, row = entry['table_name'], entry.get('row')
+        if entry['op'] == DELETE or row is None:
+            uid = entry['row_uid']
+            if uid:
+                stamps = versions[table].get(uid, {})
+                changes.append({'t': table, 'u': uid, 'op': DELETE, 'h': stamps.get(TOMBSTONE_FIELD, HLC_ZERO)})
+            continue
+
+        stamps = versions[table].get(row['uid'], {})
+        created = stamps.get(ROW_FIELD, HLC_ZERO)
+        fields = {}
+        for column, value in row.items():
+            if column in UNVERSIONED_COLUMNS:
+                continue
+            if column in REFERENCES.get(table, {}) and value is not None:
+                value = parent_uids.get((REFERENCES[table][column], value))
+            fields[column] = [value, stamps.get(column, created)]
+        changes.append({'t': table, 'u': row['uid'], 'op': entry['op'], 'f': fields})
+    return changes
+
+
+class SyncClient:
+    """Pushes local changes to and pulls remote changes from the office server"""
+
+    def __init__(self, db_path: str, host: str, port: int = 8765, chunk_size: int = CHUNK_SIZE,
+                 timeout: float = 30.0, max_retries: int = MAX_RETRIES):
+        self.db_path = db_path
+        self.host = host
+        self.port = port
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._connection = None
+        with connect(db_path) as conn:
+            self.device_id = get_device_id(conn)
+
+    def close(self):
+        """Close the reused HTTP connection"""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def request(self, method: str, path: str, payload: Optional[Dict] = None) -> Dict:
+        """Send one request, reconnecting with exponential backoff on failure"""
+        body = encode_payload(payload) if payload is not None else None
+        headers = {'Content-Type': CONTENT_TYPE, 'Accept-Encoding': 'deflate'}
+        delay = BACKOFF_SECONDS
+        for attempt in range(self.max_retries + 1):
+            try:
+                if self._connection is None:
+                    self._connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                self._connection.request(method, path, body=body, headers=headers)
+                response = self._connection.getresponse()
+                data = response.read()
+                if response.status >= 500:
+                    raise http.client.HTTPException(f"server error {response.status}")
+                if response.status != 200:
+                    raise SyncError(f"{method} {path} failed: {response.status} {data[:200]!r}")
+                return decode_payload(data) if data else {}
+            except (OSError, http.client.HTTPException) as e:
+                self.close()
+                if attempt == self.max_retries:
+                    raise SyncError(f"{method} {path} failed after {attempt + 1} attempts: {e}")
+                # Full jitter keeps dozens of devices from retrying in lockstep
+                time.sleep(random.uniform(0, delay))
+                delay = min(delay * 2, MAX_BACKOFF_SECONDS)
+
+    def push(self) -> Dict:
+        """Send every unacknowledged change in chunks; returns counts"""
+        from app.journal import ChangeJournal
+
+        journal = ChangeJournal(self.db_path)
+        status = self.request('GET', f'/sync/status?device={self.device_id}')
+        # The server may already hold chunks whose acknowledgement was lost
+        server_seq = status.get('acked_seq', 0)
+        if server_seq > journal.acknowledged_seq():
+            journal.acknowledge(server_seq)
+
+        pushed = chunks = 0
+        after = journal.acknowledged_seq()
+        while True:
+            entries = journal.get_changes(after, self.chunk_size)
+            if not entries:
+                break
+            with connect(self.db_path) as conn:
+                conn.row_factory = sqlite3.Row
+                changes = export_changes(conn, entries)
+            to_seq = entries[-1]['seq']
+            result = self.request('POST', '/sync/push', {
+                'device': self.device_id,
+                'from_seq': after,
+                'to_seq': to_seq,
+                'changes': changes
+            })
+            acked = result.get('acked_seq', 0)
+            if acked < to_seq:
+                raise SyncError(f"Server acknowledged {acked}, expected {to_seq}")
+            journal.acknowledge(acked)
+            after = acked
+            pushed += len(changes)
+            chunks += 1
+        return {'pushed': pushed, 'push_chunks': chunks}
+
+    def pull(self) -> Dict:
+        """Fetch and apply changes other devices sent to the server"""
+        pulled = chunks = 0
+        with connect(self.db_path) as conn:
+            after = get_state(conn, 'pulled_seq')
+        while True:
+            result = self.request(
+                'GET', f'/sync/pull?device={self.device_id}&after={after}&limit={self.chunk_size}'
+            )
+            changes = result.get('changes', [])
+            with connect(self.db_path) as conn:
+                with paused_journal(conn):
+                    merge_changes(conn, changes, REFERENCES)
+                set_state(conn, 'pulled_seq', result['to_seq'])
+                conn.commit()
+            if changes:
+                # Pulled rows can belong to any client
+                entity_cache(self.db_path).clear()
+            after = result['to_seq']
+            pulled += len(changes)
+            chunks += 1
+            if not result.get('more'):
+                break
+        return {'pulled': pulled, 'pull_chunks': chunks}
+
+    def sync(self) -> Dict:
+        """Push then pull"""
+        result = self.push()
+        result.update(self.pull())
+        return result
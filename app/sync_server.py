@@ -0,0 +1,351 @@
+"""
+Office sync and reporting server for Voltmatic Energy Solutions Site Survey App
+
+A small asyncio HTTP/1.1 server (standard library only) backed by the same
+schema as the app. Devices push journal chunks and pull what other devices
+sent; management reads fleet-wide dashboards from the rollup tables.
+
+Pushes go through a bounded queue to a single writer thread that applies
+every queued chunk in one transaction (group commit), so one fsync covers
+many devices. A full queue answers 503 and devices back off and retry.
+Reads run on a thread pool against the WAL database and reports are cached
+until the next commit. Run locally with:
+
+    python -m app.sync_server --db data/office.db --port 8765
+"""
+import argparse
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from app.database import DatabaseManager
+from app.journal import ChangeJournal, journal_source
+from app.sync import (CONTENT_TYPE, REFERENCES, SyncError, decode_payload, encode_payload,
+                      export_changes, get_device_id)
+from app.versioning import merge_changes
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+PULL_LIMIT = 500
+WRITE_QUEUE_SIZE = 256
+GROUP_COMMIT_SIZE = 64
+READ_THREADS = 4
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class HTTPError(Exception):
+    """Error response with an HTTP status"""
+
+    def __init__(self, status: int, message: str = ''):
+        super().__init__(message)
+        self.status = status
+
+
+class SyncServer:
+    """Stores pushed changes, serves them to other devices and reports on them"""
+
+    def __init__(self, db_path: str, host: str = '127.0.0.1', port: int = 8765,
+                 queue_size: int = WRITE_QUEUE_SIZE, group_size: int = GROUP_COMMIT_SIZE):
+        self.db = DatabaseManager(db_path)
+        self.db_path = db_path
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.group_size = group_size
+        self.journal = ChangeJournal(db_path)
+        self._server = None
+        self._queue = None
+        self._writer_task = None
+        self._writer_conn = None
+        # One thread owns the write connection; readers share a pool
+        self._write_executor = ThreadPoolExecutor(1, thread_name_prefix='sync-writer')
+        self._read_executor = ThreadPoolExecutor(READ_THREADS, thread_name_prefix='sync-reader')
+        # Bumped after every commit; cached reports from older generations are stale
+        self._generation = 0
+        self._cache = {}
+        self.stats = {'commits': 0, 'chunks': 0, 'rejected': 0}
+        with sqlite3.connect(db_path) as conn:
+            # Readers keep working while the writer commits
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS sync_devices (
+                    device_id TEXT PRIMARY KEY,
+                    acked_seq INTEGER NOT NULL DEFAULT 0,
+                    last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            self.device_id = get_device_id(conn)
+
+    # -- HTTP plumbing -----------------------------------------------------
+
+    async def start(self):
+        """Start the writer and listen; returns once the socket is bound"""
+        self._queue = asyncio.Queue(self.queue_size)
+        self._writer_task = asyncio.ensure_future(self._write_loop())
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._writer_task is not None:
+            # Let queued chunks commit before the writer goes away
+            await self._queue.join()
+            self._writer_task.cancel()
+            self._writer_task = None
+        await asyncio.get_running_loop().run_in_executor(self._write_executor, self._close_writer)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one keep-alive connection until the client closes it"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                status, payload = 200, None
+                if length > MAX_BODY_BYTES:
+                    status, payload = 413, None
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    try:
+                        payload = await self.dispatch(method, target, body)
+                    except HTTPError as e:
+                        status, payload = e.status, {'error': str(e)}
+                    except (SyncError, ValueError, KeyError) as e:
+                        status, payload = 400, {'error': str(e)}
+                    except Exception as e:
+                        print(f"Sync server error: {e}")
+                        status, payload = 500, {'error': 'internal error'}
+
+                data = encode_payload(payload) if payload is not None else b''
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                    f"Content-Type: {CONTENT_TYPE}\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data
+                )
+                await writer.drain()
+                if not keep_alive or status == 413:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Dict:
+        """Route a request to its handler"""
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if (method, url.path) == ('POST', '/sync/push'):
+            return await self.push(decode_payload(body))
+
+        routes = {
+            ('GET', '/sync/status'): lambda: self.status(query['device']),
+            ('GET', '/sync/pull'): lambda: self.pull(
+                query['device'], int(query.get('after', 0)), int(query.get('limit', PULL_LIMIT))
+            ),
+            ('GET', '/dashboard'): lambda: self.cached('dashboard', self.dashboard),
+            ('GET', '/reports/surveys-per-month'): lambda: self.cached(
+                ('surveys_per_month', query.get('since')),
+                lambda: {'rows': self.db.analytics.surveys_per_month(query.get('since'))}
+            ),
+            ('GET', '/reports/surveys-per-surveyor'): lambda: self.cached(
+                ('surveys_per_surveyor', query.get('month')),
+                lambda: {'rows': self.db.analytics.surveys_per_surveyor(query.get('month'))}
+            ),
+            ('GET', '/reports/call-outcomes'): lambda: self.cached(
+                ('call_outcomes', query.get('month')),
+                lambda: {'rows': self.db.analytics.call_outcomes(query.get('month'))}
+            ),
+            ('GET', '/server/stats'): lambda: dict(
+                self.stats, queued=self._queue.qsize(), generation=self._generation
+            ),
+        }
+        handler = routes.get((method, url.path))
+        if handler is None:
+            raise HTTPError(404, f"No route for {method} {url.path}")
+        # Blocking SQLite calls would stall every other connection on the loop
+        return await asyncio.get_running_loop().run_in_executor(self._read_executor, handler)
+
+    # -- Group-commit writer -----------------------------------------------
+
+    async def push(self, payload: Dict) -> Dict:
+        """Queue one chunk from a device and wait for the commit that applies it"""
+        chunk = (payload['device'], int(payload['to_seq']), payload['changes'])
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((chunk, future))
+        except asyncio.QueueFull:
+            self.stats['rejected'] += 1
+            raise HTTPError(503, "Write queue full, retry later")
+        return await future
+
+    async def _write_loop(self):
+        """Drain the queue, committing everything waiting as one transaction"""
+        loop = asyncio.get_running_loop()
+        while True:
+            group = [await self._queue.get()]
+            while len(group) < self.group_size and not self._queue.empty():
+                group.append(self._queue.get_nowait())
+            try:
+                results = await loop.run_in_executor(
+                    self._write_executor, self.commit_group, [chunk for chunk, _ in group]
+                )
+            except Exception as e:
+                print(f"Sync server commit failed: {e}")
+                results = [e] * len(group)
+            self._generation += 1
+            for (_, future), result in zip(group, results):
+                if not future.done():
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+                self._queue.task_done()
+
+    def _writer(self):
+        if self._writer_conn is None:
+            # Transactions are managed explicitly so each chunk can have a savepoint
+            self._writer_conn = sqlite3.connect(self.db_path, isolation_level=None)
+        return self._writer_conn
+
+    def _close_writer(self):
+        if self._writer_conn is not None:
+            self._writer_conn.close()
+            self._writer_conn = None
+
+    def commit_group(self, chunks: List[Tuple[str, int, List[Dict]]]) -> List:
+        """Apply chunks in one transaction, each under its own savepoint
+
+        A chunk that fails is rolled back alone and its error returned in
+        place of a result; the others still commit.
+        """
+        conn = self._writer()
+        results = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for device, to_seq, changes in chunks:
+                conn.execute("SAVEPOINT chunk")
+                try:
+                    results.append(self.apply_chunk(conn, device, to_seq, changes))
+                except (SyncError, ValueError, KeyError, TypeError, sqlite3.Error) as e:
+                    conn.execute("ROLLBACK TO chunk")
+                    results.append(SyncError(f"Chunk from {device} rejected: {e}"))
+                conn.execute("RELEASE chunk")
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        self.stats['commits'] += 1
+        self.stats['chunks'] += len(chunks)
+        return results
+
+    # -- Sync endpoints ----------------------------------------------------
+
+    def status(self, device: str) -> Dict:
+        """Highest sequence number applied for a device"""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("SELECT acked_seq FROM sync_devices WHERE device_id = ?", (device,)).fetchone()
+        return {'device': device, 'acked_seq': row[0] if row else 0}
+
+    def apply_chunk(self, conn, device: str, to_seq: int, changes) -> Dict:
+        """Apply a chunk and advance the device's sequence; the caller commits"""
+        conn.execute("INSERT OR IGNORE INTO sync_devices (device_id) VALUES (?)", (device,))
+        acked = conn.execute(
+            "SELECT acked_seq FROM sync_devices WHERE device_id = ?", (device,)
+        ).fetchone()[0]
+        if to_seq <= acked:
+            # Retried chunk whose response was lost
+            return {'acked_seq': acked, 'applied': 0}
+
+        with journal_source(conn, device):
+            merged = merge_changes(conn, changes, REFERENCES)
+        conn.execute(
+            "UPDATE sync_devices SET acked_seq = ?, last_seen = CURRENT_TIMESTAMP WHERE device_id = ?",
+            (to_seq, device)
+        )
+        return {'acked_seq': to_seq, 'applied': len(changes), 'merged': merged}
+
+    def pull(self, device: str, after: int, limit: int) -> Dict:
+        """Changes after a server sequence number that didn't come from `device`"""
+        entries = self.journal.get_changes(after, limit)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            changes = export_changes(conn, entries, skip_device=device)
+        to_seq = entries[-1]['seq'] if entries else after
+        return {'changes': changes, 'to_seq': to_seq, 'more': len(entries) == limit}
+
+    # -- Reporting endpoints -----------------------------------------------
+
+    def cached(self, key, compute) -> Dict:
+        """A report computed at most once per commit"""
+        generation = self._generation
+        hit = self._cache.get(key)
+        if hit is not None and hit[0] == generation:
+            return hit[1]
+        value = compute()
+        self._cache[key] = (generation, value)
+        return value
+
+    def dashboard(self) -> Dict:
+        """Fleet-wide home screen totals with per-surveyor and conversion figures"""
+        with sqlite3.connect(self.db_path) as conn:
+            devices, last_sync = conn.execute(
+                "SELECT COUNT(*), MAX(last_seen) FROM sync_devices"
+            ).fetchone()
+        return {
+            'counts': self.db.get_dashboard_counts(),
+            'surveys_per_surveyor': self.db.analytics.surveys_per_surveyor(),
+            'conversion': self.db.analytics.conversion(),
+            'devices': devices,
+            'last_sync': last_sync,
+        }
+
+
+def main(argv: Optional[Tuple[str, ...]] = None):
+    parser = argparse.ArgumentParser(description="Voltmatic office sync and reporting server")
+    parser.add_argument('--db', default='office.db', help="SQLite database for the office copy")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--queue-size', type=int, default=WRITE_QUEUE_SIZE,
+                        help="Pushes waiting to commit before new ones are refused")
+    parser.add_argument('--group-size', type=int, default=GROUP_COMMIT_SIZE,
+                        help="Most pushes applied in one transaction")
+    args = parser.parse_args(argv)
+
+    server = SyncServer(args.db, args.host, args.port, args.queue_size, args.group_size)
+    print(f"Sync server on http://{args.host}:{args.port} using {args.db}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
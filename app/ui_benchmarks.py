@@ -0,0 +1,255 @@
+"""
+Headless UI benchmark for Voltmatic Energy Solutions Site Survey App
+
+Boots VoltmaticApp without a display against a generated database (see
+app.dataset), opens each list screen several times and reports:
+
+- first_paint: from the navigation request to the first frame after on_enter
+- open: from the navigation request to the screen's layout settling
+- on_enter: time spent inside the screen's on_enter (query and widget building)
+- scroll_frame: frame times while scrolling the list top to bottom
+- widgets: widgets in the screen's tree once loaded
+
+    python -m app.ui_benchmarks --rows 20000 -o ui-before.json
+    python -m app.ui_benchmarks --rows 20000 --compare ui-before.json
+
+The default "mock" display uses Kivy's mock GL backend and SDL's dummy video
+driver, so no GPU or X server is needed and the numbers cover Python-side
+work (queries, widget creation, layout, canvas instructions). With
+--display xvfb the app renders through software GL on an existing $DISPLAY,
+e.g. under `xvfb-run -a`.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.benchmarks import (compare, format_comparison, format_results, load_results, percentiles, run_metadata,
+                            save_results)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIST_SCREENS = ('clients', 'surveys_list', 'call_history')
+DISPLAYS = ('mock', 'xvfb')
+# Frames to wait for a screen's layout before giving up on it settling
+MAX_SETTLE_FRAMES = 600
+
+
+def configure_display(display: str):
+    """Environment for a window without a screen; must run before Kivy is imported"""
+    os.environ.setdefault('KIVY_NO_ARGS', '1')
+    os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+    os.environ.setdefault('KIVY_NO_FILELOG', '1')
+    if display == 'mock':
+        os.environ.setdefault('KIVY_GL_BACKEND', 'mock')
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    else:
+        os.environ.setdefault('LIBGL_ALWAYS_SOFTWARE', '1')
+
+    from kivy.config import Config
+    # Uncapped frames, so frame times show the work rather than the 60 fps limit
+    Config.set('graphics', 'maxfps', '0')
+
+
+def prepare_database(db_path: Optional[str], rows: int, seed: int) -> str:
+    """A database with `rows` generated rows; reused if db_path already has clients"""
+    from app.database import DatabaseManager
+    from app.dataset import generate_dataset
+
+    if not db_path:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='voltmatic-ui-'), 'ui.db')
+    db = DatabaseManager(db_path)
+    if not db.get_dashboard_counts().get('clients'):
+        generate_dataset(db_path, rows, seed)
+    db.close()
+    return db_path
+
+
+def _signature(screen) -> Tuple[int, float, float]:
+    """Changes while widgets are still being added, sized or positioned"""
+    count, heights, ys = 0, 0.0, 0.0
+    for widget in screen.walk(restrict=True):
+        count += 1
+        heights += widget.height
+        ys += widget.y
+    return count, heights, ys
+
+
+def _scroll_view(screen):
+    from kivy.uix.scrollview import ScrollView
+
+    for widget in screen.walk(restrict=True):
+        if isinstance(widget, ScrollView):
+            return widget
+    return None
+
+
+class UIBenchmark:
+    """Drives the app one frame at a time from a generator script"""
+
+    def __init__(self, screens: Tuple[str, ...] = LIST_SCREENS, repeat: int = 5, scroll_frames: int = 60):
+        self.screens = screens
+        self.repeat = repeat
+        self.scroll_frames = scroll_frames
+        self.samples = {}
+        self.widgets = {}
+        self.frame_s = 0.0
+        self.settled_at = 0.0
+        self._entered = None
+        self._last_tick = None
+        self._script = None
+        self.app = None
+
+    def start(self, app):
+        from kivy.clock import Clock
+
+        self.app = app
+        self._script = self.script()
+        Clock.schedule_interval(self._tick, 0)
+
+    def _tick(self, dt):
+        now = time.perf_counter()
+        if self._last_tick is not None:
+            self.frame_s = now - self._last_tick
+        self._last_tick = now
+        try:
+            next(self._script)
+        except StopIteration:
+            self.app.stop()
+            return False
+
+    def _instrument(self, screen):
+        """Time the screen's own on_enter; Kivy looks the handler up on each dispatch"""
+        original = screen.on_enter
+
+        def on_enter(*args):
+            start = time.perf_counter()
+            original(*args)
+            self._entered = (start, time.perf_counter() - start)
+
+        screen.on_enter = on_enter
+
+    def _settle(self, screen) -> Iterator[None]:
+        """Yield frames until the screen looks the same two frames running"""
+        previous, previous_time = None, time.perf_counter()
+        for _ in range(MAX_SETTLE_FRAMES):
+            now = time.perf_counter()
+            current = _signature(screen)
+            if current == previous:
+                break
+            previous, previous_time = current, now
+            yield
+        self.settled_at = previous_time
+
+    def script(self) -> Iterator[None]:
+        manager = self.app.screen_manager
+        home = manager.get_screen('home')
+        yield from self._settle(home)
+
+        for name in self.screens:
+            screen = manager.get_screen(name)
+            self._instrument(screen)
+            opens, enters, firsts = [], [], []
+            for _ in range(self.repeat):
+                manager.current = 'home'
+                yield from self._settle(home)
+                self._entered = None
+                requested = time.perf_counter()
+                manager.current = name
+                while self._entered is None:
+                    yield
+                # Resumed on the next frame, after the one that drew the first cards
+                yield
+                firsts.append(time.perf_counter() - requested)
+                yield from self._settle(screen)
+                opens.append(self.settled_at - requested)
+                enters.append(self._entered[1])
+            self.samples[f'{name}.first_paint'] = firsts
+            self.samples[f'{name}.open'] = opens
+            self.samples[f'{name}.on_enter'] = enters
+            self.widgets[name] = _signature(screen)[0]
+            self.samples[f'{name}.scroll_frame'] = yield from self._scroll(screen)
+
+    def _scroll(self, screen) -> Iterator[None]:
+        view = _scroll_view(screen)
+        frames = []
+        if view is None or self.scroll_frames < 2:
+            return frames
+        yield
+        for step in range(self.scroll_frames):
+            view.scroll_y = 1 - step / (self.scroll_frames - 1)
+            yield
+            frames.append(self.frame_s)
+        return frames
+
+    def results(self) -> Dict[str, Dict]:
+        return {name: percentiles(samples) for name, samples in self.samples.items() if samples}
+
+
+def run_ui_benchmark(db_path: str, screens: Tuple[str, ...] = LIST_SCREENS, repeat: int = 5,
+                     scroll_frames: int = 60, display: str = 'mock') -> Dict:
+    """Boot the app on db_path, measure the screens and return a report"""
+    configure_display(display)
+    os.environ['VOLTMATIC_DB'] = os.path.abspath(db_path)
+    # main.py loads its .kv files relative to the project root
+    os.chdir(ROOT)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    from kivy.uix.screenmanager import NoTransition
+    from main import VoltmaticApp
+
+    benchmark = UIBenchmark(screens, repeat, scroll_frames)
+
+    class BenchmarkApp(VoltmaticApp):
+        def build(self):
+            root = super().build()
+            root.transition = NoTransition()
+            return root
+
+        def on_start(self):
+            benchmark.start(self)
+
+    BenchmarkApp().run()
+    return {
+        'meta': run_metadata(db_path, display=display, repeat=repeat, scroll_frames=scroll_frames,
+                             widgets=benchmark.widgets),
+        'results': benchmark.results(),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time list screens in a headless VoltmaticApp")
+    parser.add_argument('--db', help="Database to use; generated in a temporary directory if not given")
+    parser.add_argument('--rows', type=int, default=10000, help="Rows to generate (default %(default)s)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--screen', action='append', choices=LIST_SCREENS, help="Screens to measure (default: all)")
+    parser.add_argument('--repeat', type=int, default=5, help="Times each screen is opened")
+    parser.add_argument('--scroll-frames', type=int, default=60)
+    parser.add_argument('--display', choices=DISPLAYS, default='mock')
+    parser.add_argument('-o', '--output', help="Save the results as JSON")
+    parser.add_argument('--compare', metavar='RESULTS', help="Compare against results saved by --output")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    db_path = prepare_database(args.db, args.rows, args.seed)
+    report = run_ui_benchmark(db_path, tuple(args.screen or LIST_SCREENS), args.repeat, args.scroll_frames,
+                              args.display)
+    if args.output:
+        save_results(report, args.output)
+    if args.compare:
+        rows = compare(load_results(args.compare), report)
+        print(json.dumps(rows, indent=2) if args.json else format_comparison(rows))
+    elif args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_results(report))
+        for name, count in report['meta']['widgets'].items():
+            print(f"{name:<28}{count:>11} widgets")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
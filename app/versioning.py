@@ -0,0 +1,333 @@
+"""
+Global record identity and per-field versions for Voltmatic Energy Solutions Site Survey App
+
+Every synced row gets a random 128-bit `uid` alongside its local rowid.
+Every field write is stamped with a hybrid logical clock (HLC) timestamp in
+`field_versions`, so concurrent edits on different devices merge field by
+field with a deterministic winner.
+
+HLC timestamps are fixed-width strings, "PPPPPPPPPPPPP-CCCCC-<device>":
+milliseconds since the epoch, a counter for writes within the same
+millisecond, and the writing device as a tie-breaker. Comparing them as
+text orders them causally, so merges can be done entirely in SQL.
+"""
+from typing import Dict, List
+
+from app.journal import DELETE, JOURNALED_TABLES
+
+HLC_ZERO = '0000000000000-00000'
+
+# Columns that are local bookkeeping rather than record data; the *_ts
+# columns are derived from date columns on each device
+UNVERSIONED_COLUMNS = ('id', 'uid', 'origin_device', 'origin_id', 'survey_ts', 'call_ts', 'follow_up_ts',
+                       'reminded_at')
+
+# Pseudo-fields: the row's creation and its deletion (tombstone)
+ROW_FIELD = '*'
+TOMBSTONE_FIELD = '~'
+
+_NOW_MS = "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)"
+_LAST_MS = "CAST(substr(value, 1, 13) AS INTEGER)"
+_LAST_COUNT = "CAST(substr(value, 15, 5) AS INTEGER)"
+
+# Advance the stored clock: take wall time if it moved on, else bump the counter
+TICK_HLC = f'''
+    UPDATE sync_state SET value = CASE
+        WHEN {_NOW_MS} > {_LAST_MS} THEN printf('%013d-%05d', {_NOW_MS}, 0)
+        ELSE printf('%013d-%05d', {_LAST_MS}, {_LAST_COUNT} + 1)
+    END
+    WHERE key = 'hlc' AND (SELECT value FROM sync_state WHERE key = 'merging') IS NULL
+'''
+CURRENT_HLC = '''
+    ((SELECT value FROM sync_state WHERE key = 'hlc') || '-' ||
+     (SELECT value FROM sync_state WHERE key = 'device_id'))
+'''
+NOT_MERGING = "(SELECT value FROM sync_state WHERE key = 'merging') IS NULL"
+
+
+def versioned_columns(cursor, table: str) -> List[str]:
+    """Columns of a table whose values are versioned and synced"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in cursor.fetchall() if row[1] not in UNVERSIONED_COLUMNS]
+
+
+def _triggers(table: str, columns: List[str]) -> Dict[str, str]:
+    changed_fields = '\n                UNION ALL '.join(
+        f"SELECT '{column}' AS field WHERE OLD.{column} IS NOT NEW.{column}" for column in columns
+    )
+    return {
+        f'versions_{table}_insert': f'''
+            CREATE TRIGGER versions_{table}_insert AFTER INSERT ON {table}
+            BEGIN
+                UPDATE {table} SET uid = lower(hex(randomblob(16))) WHERE id = NEW.id AND uid IS NULL;
+                {TICK_HLC};
+                INSERT OR REPLACE INTO field_versions (table_name, uid, field, hlc)
+                SELECT '{table}', uid, '{ROW_FIELD}', {CURRENT_HLC}
+                FROM {table} WHERE id = NEW.id AND {NOT_MERGING};
+            END
+        ''',
+        # OLD.uid IS NULL is the uid assignment above, not a user edit
+        f'versions_{table}_update': f'''
+            CREATE TRIGGER versions_{table}_update AFTER UPDATE ON {table}
+            WHEN OLD.uid IS NOT NULL AND {NOT_MERGING}
+            BEGIN
+                {TICK_HLC};
+                INSERT OR REPLACE INTO field_versions (table_name, uid, field, hlc)
+                SELECT '{table}', NEW.uid, field, {CURRENT_HLC}
+                FROM ({changed_fields});
+            END
+        ''',
+        f'versions_{table}_delete': f'''
+            CREATE TRIGGER versions_{table}_delete AFTER DELETE ON {table}
+            WHEN OLD.uid IS NOT NULL AND {NOT_MERGING}
+            BEGIN
+                {TICK_HLC};
+                DELETE FROM field_versions WHERE table_name = '{table}' AND uid = OLD.uid;
+                INSERT INTO field_versions (table_name, uid, field, hlc)
+                VALUES ('{table}', OLD.uid, '{TOMBSTONE_FIELD}', {CURRENT_HLC});
+            END
+        ''',
+    }
+
+
+def install_versioning(cursor):
+    """Add uid columns, the version table, clock state and stamping triggers
+
+    Call after every other column migration: the update triggers list the
+    table's columns and are recreated on each start.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+    cursor.execute(
+        "INSERT OR IGNORE INTO sync_state (key, value) VALUES ('device_id', lower(hex(randomblob(16))))"
+    )
+    cursor.execute("INSERT OR IGNORE INTO sync_state (key, value) VALUES ('hlc', ?)", (HLC_ZERO,))
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS field_versions (
+            table_name TEXT NOT NULL,
+            uid TEXT NOT NULL,
+            field TEXT NOT NULL,
+            hlc TEXT NOT NULL,
+            PRIMARY KEY (table_name, uid, field)
+        ) WITHOUT ROWID
+    ''')
+
+    for table in JOURNALED_TABLES:
+        cursor.execute(f"PRAGMA table_info({table})")
+        if 'uid' not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN uid TEXT")
+        cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_uid ON {table} (uid)")
+        cursor.execute(f"UPDATE {table} SET uid = lower(hex(randomblob(16))) WHERE uid IS NULL")
+        if cursor.rowcount:
+            # Rows from before versioning lose to any edit made elsewhere since
+            cursor.execute(f'''
+                INSERT OR IGNORE INTO field_versions (table_name, uid, field, hlc)
+                SELECT '{table}', t.uid, '{ROW_FIELD}',
+                       '{HLC_ZERO}-' || (SELECT value FROM sync_state WHERE key = 'device_id')
+                FROM {table} t
+                WHERE NOT EXISTS (SELECT 1 FROM field_versions v WHERE v.table_name = '{table}' AND v.uid = t.uid)
+            ''')
+
+        for name, ddl in _triggers(table, versioned_columns(cursor, table)).items():
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(ddl)
+
+
+def get_device_id(conn) -> str:
+    """This database's device id, created when versioning was installed"""
+    return conn.execute("SELECT value FROM sync_state WHERE key = 'device_id'").fetchone()[0]
+
+
+def export_versions(cursor, table: str, uids: List[str]) -> Dict[str, Dict[str, str]]:
+    """{uid: {field: hlc}} for a batch of rows, including row and tombstone stamps"""
+    versions = {}
+    for start in range(0, len(uids), 500):
+        chunk = uids[start:start + 500]
+        cursor.execute(
+            f"SELECT uid, field, hlc FROM field_versions WHERE table_name = ? AND uid IN ({','.join('?' * len(chunk))})",
+            [table] + chunk
+        )
+        for uid, field, hlc in cursor.fetchall():
+            versions.setdefault(uid, {})[field] = hlc
+    return versions
+
+
+def merge_changes(conn, changes: List[Dict], references: Dict[str, Dict[str, str]]) -> Dict[str, int]:
+    """Merge incoming changes into the database in one transaction
+
+    `changes` are wire changes: {'t': table, 'u': uid, 'op': 'I'|'U', 'f':
+    {field: [value, hlc]}} or {'t': table, 'u': uid, 'op': 'D', 'h': hlc}.
+    Reference columns (see `references`) carry the parent's uid.
+
+    Incoming values are staged in temp tables with one executemany per
+    table; every comparison and write after that is a set-based statement:
+    a field wins if its HLC is newer than the local field (or row) stamp,
+    deletes win over edits, and HLC ties cannot happen because the device
+    id is part of the stamp. The local clock is advanced past everything
+    seen, keeping later local edits ordered after the merged ones.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS merge_fields (
+            table_name TEXT NOT NULL,
+            uid TEXT NOT NULL,
+            field TEXT NOT NULL,
+            value,
+            hlc TEXT NOT NULL,
+            PRIMARY KEY (table_name, uid, field)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS merge_deletes (
+            table_name TEXT NOT NULL,
+            uid TEXT NOT NULL,
+            hlc TEXT NOT NULL,
+            PRIMARY KEY (table_name, uid)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute("DELETE FROM temp.merge_fields")
+    cursor.execute("DELETE FROM temp.merge_deletes")
+
+    # Within a batch the highest stamp for a field wins
+    cursor.executemany('''
+        INSERT OR REPLACE INTO temp.merge_fields (table_name, uid, field, value, hlc)
+        SELECT ?1, ?2, ?3, ?4, ?5 WHERE NOT EXISTS (
+            SELECT 1 FROM temp.merge_fields
+            WHERE table_name = ?1 AND uid = ?2 AND field = ?3 AND hlc >= ?5
+        )
+    ''', (
+        (change['t'], change['u'], field, value, hlc)
+        for change in changes if change['op'] != DELETE and change['t'] in JOURNALED_TABLES
+        for field, (value, hlc) in change['f'].items()
+    ))
+    deletes = [(change['t'], change['u'], change['h'])
+               for change in changes if change['op'] == DELETE and change['t'] in JOURNALED_TABLES]
+    cursor.executemany('''
+        INSERT OR REPLACE INTO temp.merge_deletes (table_name, uid, hlc)
+        SELECT ?1, ?2, ?3 WHERE NOT EXISTS (
+            SELECT 1 FROM temp.merge_deletes WHERE table_name = ?1 AND uid = ?2 AND hlc >= ?3
+        )
+    ''', deletes)
+
+    result = {'inserted': 0, 'updated': 0, 'deleted': 0, 'fields': 0}
+    conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES ('merging', '1')")
+    try:
+        # Deletes win: drop incoming fields for rows deleted here or in this batch
+        cursor.execute('''
+            DELETE FROM temp.merge_fields WHERE EXISTS (
+                SELECT 1 FROM field_versions v
+                WHERE v.table_name = merge_fields.table_name AND v.uid = merge_fields.uid
+                  AND v.field = ?
+            ) OR EXISTS (
+                SELECT 1 FROM temp.merge_deletes d
+                WHERE d.table_name = merge_fields.table_name AND d.uid = merge_fields.uid
+            )
+        ''', (TOMBSTONE_FIELD,))
+
+        # Keep only fields newer than what this database already has
+        cursor.execute('''
+            DELETE FROM temp.merge_fields WHERE hlc <= COALESCE(
+                (SELECT v.hlc FROM field_versions v
+                 WHERE v.table_name = merge_fields.table_name AND v.uid = merge_fields.uid
+                   AND v.field = merge_fields.field),
+                (SELECT v.hlc FROM field_versions v
+                 WHERE v.table_name = merge_fields.table_name AND v.uid = merge_fields.uid
+                   AND v.field = ?),
+                ''
+            )
+        ''', (ROW_FIELD,))
+
+        # Parents that are referenced but neither here nor in this batch get a
+        # placeholder row to point at until their own change arrives
+        for table, columns in references.items():
+            for column, parent in columns.items():
+                cursor.execute(f'''
+                    INSERT INTO {parent} (uid{", name" if parent == 'clients' else ""})
+                    SELECT DISTINCT f.value{", ''" if parent == 'clients' else ""}
+                    FROM temp.merge_fields f
+                    WHERE f.table_name = ? AND f.field = ? AND f.value IS NOT NULL
+                      AND NOT EXISTS (SELECT 1 FROM {parent} p WHERE p.uid = f.value)
+                      AND NOT EXISTS (SELECT 1 FROM temp.merge_fields pf
+                                      WHERE pf.table_name = ? AND pf.uid = f.value)
+                ''', (table, column, parent))
+                result['inserted'] += cursor.rowcount
+
+        for table in JOURNALED_TABLES:
+            columns = versioned_columns(cursor, table)
+            refs = references.get(table, {})
+
+            def incoming(column: str, alias: str = 'f') -> str:
+                value = f"{alias}.value"
+                if column in refs:
+                    value = f"(SELECT p.id FROM {refs[column]} p WHERE p.uid = {alias}.value)"
+                return value
+
+            # Existing rows: overwrite only the fields that won
+            assignments = ',\n'.join(f'''
+                {column} = CASE WHEN EXISTS (
+                    SELECT 1 FROM temp.merge_fields f
+                    WHERE f.table_name = '{table}' AND f.uid = {table}.uid AND f.field = '{column}'
+                ) THEN (
+                    SELECT {incoming(column)} FROM temp.merge_fields f
+                    WHERE f.table_name = '{table}' AND f.uid = {table}.uid AND f.field = '{column}'
+                ) ELSE {column} END''' for column in columns)
+            cursor.execute(f'''
+                UPDATE {table} SET {assignments}
+                WHERE uid IN (SELECT uid FROM temp.merge_fields WHERE table_name = '{table}')
+            ''')
+            result['updated'] += cursor.rowcount
+
+            # New rows: pivot the staged fields into one row per uid
+            pivot = ',\n'.join(
+                f"MAX(CASE WHEN f.field = '{column}' THEN {incoming(column)} END)" for column in columns
+            )
+            cursor.execute(f'''
+                INSERT INTO {table} (uid, {', '.join(columns)})
+                SELECT f.uid, {pivot}
+                FROM temp.merge_fields f
+                WHERE f.table_name = '{table}'
+                  AND NOT EXISTS (SELECT 1 FROM {table} t WHERE t.uid = f.uid)
+                GROUP BY f.uid
+            ''')
+            result['inserted'] += cursor.rowcount
+
+        # Deletes, children first so nothing is left pointing at a removed parent
+        for table in reversed(JOURNALED_TABLES):
+            cursor.execute(f'''
+                DELETE FROM {table}
+                WHERE uid IN (SELECT uid FROM temp.merge_deletes WHERE table_name = '{table}')
+            ''')
+            result['deleted'] += cursor.rowcount
+
+        # Record the winning stamps and tombstones
+        cursor.execute('''
+            INSERT OR REPLACE INTO field_versions (table_name, uid, field, hlc)
+            SELECT table_name, uid, field, hlc FROM temp.merge_fields
+        ''')
+        result['fields'] = cursor.rowcount
+        cursor.executemany(
+            "DELETE FROM field_versions WHERE table_name = ? AND uid = ?",
+            ((table, uid) for table, uid, _ in deletes)
+        )
+        cursor.execute('''
+            INSERT INTO field_versions (table_name, uid, field, hlc)
+            SELECT table_name, uid, ?, hlc FROM temp.merge_deletes
+        ''', (TOMBSTONE_FIELD,))
+
+        # Advance the local clock past every stamp seen
+        cursor.execute('''
+            UPDATE sync_state SET value = MAX(value, COALESCE((
+                SELECT substr(MAX(hlc), 1, 19) FROM (
+                    SELECT MAX(hlc) AS hlc FROM temp.merge_fields
+                    UNION ALL SELECT MAX(hlc) FROM temp.merge_deletes
+                )
+            ), value))
+            WHERE key = 'hlc'
+        ''')
+    finally:
+        conn.execute("DELETE FROM sync_state WHERE key = 'merging'")
+    return result
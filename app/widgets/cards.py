@@ -0,0 +1,186 @@
+"""
+List cards for Voltmatic Energy Solutions Site Survey App
+
+Each card builds its widget tree once; bind_record() fills it from a row and
+its buttons call handlers with whichever row is bound at the time, so a
+card taken from a WidgetPool can show a different row without rebuilding.
+"""
+from typing import Callable, Dict, Optional
+
+from kivymd.uix.boxlayout import MDBoxLayout
+from kivymd.uix.button import MDIconButton
+from kivymd.uix.card import MDCard
+from kivymd.uix.label import MDLabel
+
+
+def _label(font_style: str = "Caption", height: str = "20dp", theme_text_color: Optional[str] = None) -> MDLabel:
+    kwargs = {'theme_text_color': theme_text_color} if theme_text_color else {}
+    return MDLabel(text='', font_style=font_style, size_hint_y=None, height=height, **kwargs)
+
+
+class RecordCard(MDCard):
+    """Card bound to one row at a time"""
+
+    card_height = "120dp"
+
+    def __init__(self, **kwargs):
+        super().__init__(
+            size_hint_y=None,
+            height=self.card_height,
+            padding="15dp",
+            spacing="10dp",
+            elevation=3,
+            radius=[12],
+            md_bg_color=(1, 1, 1, 1),
+            **kwargs
+        )
+        self.record = None
+        self.handlers: Dict[str, Callable] = {}
+        self.pool = None
+
+    def button(self, icon: str, action: str, color=None) -> MDIconButton:
+        kwargs = {'theme_text_color': "Custom", 'text_color': color} if color else {}
+        return MDIconButton(icon=icon, on_release=lambda x: self.trigger(action), **kwargs)
+
+    def trigger(self, action: str):
+        handler = self.handlers.get(action)
+        if handler and self.record is not None:
+            handler(self.record)
+
+    def bind_record(self, record: Dict, handlers: Dict[str, Callable]) -> 'RecordCard':
+        self.record = record
+        self.handlers = handlers
+        self.update(record)
+        return self
+
+    def unbind_record(self):
+        """Drop the row and handlers so a pooled card keeps nothing alive"""
+        self.record = None
+        self.handlers = {}
+
+    def update(self, record: Dict):
+        """Fill the card's widgets from a row; subclasses override, the base card stays blank"""
+
+
+class ClientListCard(RecordCard):
+    """Name, contact and address with call, history, timeline, survey, view, edit and delete actions"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        content = MDBoxLayout(orientation='horizontal', spacing="15dp")
+        info = MDBoxLayout(orientation='vertical', spacing="5dp")
+        self.name_label = _label("H6", "25dp")
+        self.contact_label = _label()
+        self.address_label = _label()
+        for label in (self.name_label, self.contact_label, self.address_label):
+            info.add_widget(label)
+
+        actions = MDBoxLayout(orientation='horizontal', size_hint_x=None, width="290dp", spacing="5dp")
+        actions.add_widget(self.button("phone", 'call', (0.2, 0.8, 0.2, 1)))
+        actions.add_widget(self.button("history", 'call_history', (0.6, 0.4, 1, 1)))
+        actions.add_widget(self.button("timeline-clock-outline", 'timeline', (0.6, 0.4, 1, 1)))
+        actions.add_widget(self.button("clipboard-plus", 'survey'))
+        actions.add_widget(self.button("eye", 'view_surveys'))
+        actions.add_widget(self.button("pencil", 'edit'))
+        actions.add_widget(self.button("delete", 'delete', (1, 0.2, 0.2, 1)))
+
+        content.add_widget(info)
+        content.add_widget(actions)
+        self.add_widget(content)
+
+    def update(self, client: Dict):
+        address = client['address'] or ''
+        self.name_label.text = client['name']
+        self.contact_label.text = f" {client['phone']} | {client['email'] or 'No email'}"
+        self.address_label.text = f"📍 {address[:50]}..." if len(address) > 50 else f"📍 {address}"
+
+
+class SurveyListCard(RecordCard):
+    """Client, date, property and status with view and edit actions"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        content = MDBoxLayout(orientation='horizontal', spacing="15dp")
+        info = MDBoxLayout(orientation='vertical', spacing="5dp")
+        self.title_label = _label("H6", "25dp", "Primary")
+        self.date_label = _label(theme_text_color="Secondary")
+        self.property_label = _label(theme_text_color="Secondary")
+        self.status_label = _label(theme_text_color="Primary")
+        for label in (self.title_label, self.date_label, self.property_label, self.status_label):
+            info.add_widget(label)
+
+        actions = MDBoxLayout(orientation='vertical', size_hint_x=None, width="80dp", spacing="5dp")
+        actions.add_widget(self.button("eye", 'view', (0.2, 0.6, 1, 1)))
+        actions.add_widget(self.button("pencil", 'edit', (1, 0.6, 0, 1)))
+
+        content.add_widget(info)
+        content.add_widget(actions)
+        self.add_widget(content)
+
+    def update(self, survey: Dict):
+        self.title_label.text = f"Survey for {survey.get('client_name') or 'Unknown Client'}"
+        self.date_label.text = f"Date: {survey['survey_date']}"
+        self.property_label.text = (f"Property: {survey.get('property_type', 'N/A')} - "
+                                    f"{survey.get('number_of_bedrooms', 0)} bedrooms")
+        self.status_label.text = f"Status: {(survey.get('status') or 'pending').title()}"
+
+
+class CallListCard(RecordCard):
+    """Call date, caller, purpose and outcome, with the client and follow-up lines when relevant"""
+
+    card_height = "140dp"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        content = MDBoxLayout(orientation='horizontal', spacing="15dp")
+        self.info = MDBoxLayout(orientation='vertical', spacing="5dp")
+        self.client_label = _label("H6", "25dp", "Primary")
+        self.date_label = _label(theme_text_color="Secondary")
+        self.details_label = _label(theme_text_color="Secondary")
+        self.outcome_label = _label(theme_text_color="Secondary")
+        self.follow_up_label = _label(theme_text_color="Primary")
+
+        actions = MDBoxLayout(orientation='vertical', size_hint_x=None, width="50dp", spacing="5dp")
+        actions.add_widget(self.button("eye", 'view', (0.2, 0.6, 1, 1)))
+
+        content.add_widget(self.info)
+        content.add_widget(actions)
+        self.add_widget(content)
+
+    def update(self, call: Dict):
+        """Shows the client line only when the row carries client_name"""
+        self.info.clear_widgets()
+        if call.get('client_name') is not None:
+            self.client_label.text = f"Client: {call['client_name']}"
+            self.info.add_widget(self.client_label)
+        self.date_label.text = f"Date: {call['call_date']} | Caller: {call.get('caller_name', 'N/A')}"
+        self.details_label.text = (f"Duration: {call.get('call_duration', 'N/A')} | "
+                                   f"Purpose: {call.get('call_purpose', 'N/A')}")
+        self.outcome_label.text = f"Outcome: {call.get('call_outcome', 'N/A')}"
+        for label in (self.date_label, self.details_label, self.outcome_label):
+            self.info.add_widget(label)
+        if call.get('follow_up_required'):
+            self.follow_up_label.text = f"📅 Follow-up: {call.get('follow_up_date', 'Date not set')}"
+            self.info.add_widget(self.follow_up_label)
+
+
+class TimelineCard(RecordCard):
+    """One survey, call or visit from a client's timeline"""
+
+    card_height = "100dp"
+    KIND_LABELS = {'survey': "📋 Site survey", 'call': "📞 Call", 'visit': "🚐 Site visit"}
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        info = MDBoxLayout(orientation='vertical', spacing="5dp")
+        self.title_label = _label("Subtitle1", "25dp", "Primary")
+        self.summary_label = _label(theme_text_color="Secondary")
+        self.status_label = _label(theme_text_color="Secondary")
+        for label in (self.title_label, self.summary_label, self.status_label):
+            info.add_widget(label)
+        self.add_widget(info)
+
+    def update(self, item: Dict):
+        self.title_label.text = f"{self.KIND_LABELS.get(item['kind'], item['kind'])} | {item['date']}"
+        self.summary_label.text = item['summary'] or 'N/A'
+        self.status_label.text = f"Status: {item['status'] or 'N/A'}"
@@ -0,0 +1,55 @@
+"""
+Frame-time overlay for Voltmatic Energy Solutions Site Survey App
+"""
+from kivy.clock import Clock
+from kivy.graphics import Color, Rectangle
+from kivy.metrics import dp
+from kivy.properties import BooleanProperty
+from kivy.uix.label import Label
+
+REFRESH_SECONDS = 0.25
+
+
+class PerfOverlay(Label):
+    """FPS, worst recent frame and the current screen's enter-to-render time"""
+
+    visible = BooleanProperty(True)
+
+    def __init__(self, diagnostics, **kwargs):
+        super().__init__(
+            size_hint=(None, None),
+            font_size='11sp',
+            halign='left',
+            valign='middle',
+            padding=(dp(6), dp(4)),
+            color=(1, 1, 1, 1),
+            **kwargs
+        )
+        self.diagnostics = diagnostics
+        with self.canvas.before:
+            Color(0, 0, 0, 0.6)
+            self._background = Rectangle(pos=self.pos, size=self.size)
+        self.bind(pos=self._redraw, size=self._redraw, texture_size=self._fit)
+        self._event = Clock.schedule_interval(self.refresh, REFRESH_SECONDS)
+        self.refresh()
+
+    def refresh(self, dt=None):
+        if self.visible:
+            self.text = '\n'.join(self.diagnostics.summary())
+
+    def _fit(self, *args):
+        self.size = self.texture_size
+        if self.parent:
+            # Top-right corner, clear of the triple-tap corner
+            self.pos = (self.parent.width - self.width, self.parent.height - self.height)
+
+    def _redraw(self, *args):
+        self._background.pos = self.pos
+        self._background.size = self.size
+
+    def on_parent(self, widget, parent):
+        self._fit()
+
+    def on_visible(self, widget, visible):
+        self.opacity = 1 if visible else 0
+        self.refresh()
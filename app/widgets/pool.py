@@ -0,0 +1,107 @@
+"""
+Widget recycling for Voltmatic Energy Solutions Site Survey App
+
+Lists used to build a new card tree per row on every load, and every tap on
+a menu or message built a new dialog. WidgetPool keeps detached cards for
+reuse and DialogPool keeps one dialog per kind; both rebind data and
+callbacks instead of rebuilding widgets.
+"""
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from kivy.animation import Animation
+from kivymd.uix.button import MDFlatButton
+from kivymd.uix.dialog import MDDialog
+
+from app.widgets.progressive import renderer
+
+# Cards kept per pool once a list is cleared; more than this are left to the GC
+DEFAULT_POOL_LIMIT = 1000
+
+
+class WidgetPool:
+    """Free list of widgets built by factory(); acquired widgets are rebound by the caller"""
+
+    def __init__(self, factory: Callable, limit: int = DEFAULT_POOL_LIMIT):
+        self.factory = factory
+        self.limit = limit
+        self.free = []
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self):
+        if self.free:
+            self.reused += 1
+            return self.free.pop()
+        self.created += 1
+        widget = self.factory()
+        widget.pool = self
+        return widget
+
+    def release(self, widget):
+        if widget.parent:
+            widget.parent.remove_widget(widget)
+        if hasattr(widget, 'unbind_record'):
+            widget.unbind_record()
+        if len(self.free) < self.limit:
+            self.free.append(widget)
+
+    def recycle(self, container):
+        """Empty a container, returning this pool's widgets to the free list
+
+        Also stops any progressive render still filling the container, so an
+        empty-state label put there next isn't followed by stale cards.
+        """
+        renderer().cancel(container)
+        children = list(container.children)
+        container.clear_widgets()
+        for child in children:
+            if getattr(child, 'pool', None) is self:
+                self.release(child)
+
+
+class DialogPool:
+    """One MDDialog per kind, retitled and reopened instead of rebuilt
+
+    buttons are (text, callback) or (text, callback, button kwargs); a
+    button dismisses the dialog, then calls its callback if there is one.
+    The button texts and styles of a kind are fixed by its first use.
+    """
+
+    def __init__(self):
+        self.dialogs: Dict[str, MDDialog] = {}
+        self._callbacks: Dict[str, Tuple[Optional[Callable], ...]] = {}
+
+    def show(self, kind: str, title: str, text: str = '', buttons: Sequence[Tuple] = (('OK', None),),
+             **dialog_kwargs) -> MDDialog:
+        self._callbacks[kind] = tuple(button[1] for button in buttons)
+        dialog = self.dialogs.get(kind)
+        if dialog is None:
+            dialog = self.dialogs[kind] = MDDialog(
+                title=title,
+                text=text,
+                buttons=[
+                    MDFlatButton(text=button[0], on_release=lambda x, index=index: self._press(kind, index),
+                                 **(button[2] if len(button) > 2 else {}))
+                    for index, button in enumerate(buttons)
+                ],
+                **dialog_kwargs
+            )
+        else:
+            if dialog.parent is not None:
+                # Still open or fading out; close at once so open() below takes effect
+                Animation.cancel_all(dialog)
+                dialog.dismiss(animation=False)
+            dialog.title = title
+            dialog.text = text
+        dialog.open()
+        return dialog
+
+    def _press(self, kind: str, index: int):
+        self.dialogs[kind].dismiss()
+        callback = self._callbacks[kind][index]
+        if callback:
+            callback()
+
+    def dismiss_all(self):
+        for dialog in self.dialogs.values():
+            dialog.dismiss()
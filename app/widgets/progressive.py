@@ -0,0 +1,152 @@
+"""
+Progressive list rendering for Voltmatic Energy Solutions Site Survey App
+
+Building every card of a long list inside on_enter blocks the frame until
+the last one exists. The shared renderer builds the first screenful at
+once, then adds the rest a few per frame within a time budget. Starting a
+new render into a container replaces its unfinished one, and screens
+cancel their jobs when left.
+
+    renderer().render(container, rows, build_card, owner=screen)
+"""
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional
+
+# Time spent building widgets per frame, leaving the rest for layout and drawing
+FRAME_BUDGET_MS = 6.0
+# Smallest card height in dp; sizes the first screenful
+MIN_ITEM_HEIGHT_DP = 100
+
+
+class RenderJob:
+    """Rows still to be built into one container"""
+
+    def __init__(self, container, rows: Iterable[Dict], build: Callable, owner=None,
+                 on_done: Optional[Callable] = None):
+        self.container = container
+        self.rows = iter(rows)
+        self.build = build
+        self.owner = owner
+        self.on_done = on_done
+        self.built = 0
+        self.done = False
+        self.cancelled = False
+
+    def step(self) -> bool:
+        """Build and add one row's widget; False when there are no rows left"""
+        row = next(self.rows, None)
+        if row is None:
+            self.done = True
+            return False
+        self.container.add_widget(self.build(row))
+        self.built += 1
+        return True
+
+    def owner_left(self) -> bool:
+        owner = self.owner
+        manager = getattr(owner, 'manager', None)
+        return manager is not None and manager.current != owner.name
+
+
+class ProgressiveRenderer:
+    """Spreads widget builds across frames under a per-frame time budget"""
+
+    def __init__(self, budget_ms: float = FRAME_BUDGET_MS, clock=None):
+        self.budget = budget_ms / 1000
+        self.jobs: Dict[int, RenderJob] = OrderedDict()
+        self._clock = clock
+        self._event = None
+
+    @property
+    def clock(self):
+        if self._clock is None:
+            from kivy.clock import Clock
+            self._clock = Clock
+        return self._clock
+
+    def screenful(self, container) -> int:
+        """Rows needed to fill the visible part of a container's scroll view"""
+        from kivy.core.window import Window
+        from kivy.metrics import dp
+
+        view = container.parent
+        height = view.height if view is not None and view.height > 1 else Window.height
+        return math.ceil(height / dp(MIN_ITEM_HEIGHT_DP)) + 1
+
+    def render(self, container, rows: Iterable[Dict], build: Callable, owner=None, first: Optional[int] = None,
+               on_done: Optional[Callable] = None) -> RenderJob:
+        """Build the first screenful now and queue the rest"""
+        self.cancel(container)
+        job = RenderJob(container, rows, build, owner, on_done)
+        for _ in range(self.screenful(container) if first is None else first):
+            if not job.step():
+                break
+        if job.done:
+            self._finish(job)
+        else:
+            self.jobs[id(container)] = job
+            self._schedule()
+        return job
+
+    def cancel(self, container) -> bool:
+        """Drop a container's unfinished job; widgets already added stay"""
+        job = self.jobs.pop(id(container), None)
+        if job is None:
+            return False
+        job.cancelled = True
+        return True
+
+    def cancel_owner(self, owner):
+        """Drop every job started for a screen"""
+        for key, job in list(self.jobs.items()):
+            if job.owner is owner:
+                job.cancelled = True
+                del self.jobs[key]
+
+    def pending(self) -> int:
+        return len(self.jobs)
+
+    def _schedule(self):
+        if self._event is None:
+            self._event = self.clock.schedule_interval(self._frame, 0)
+
+    def _finish(self, job: RenderJob):
+        if job.on_done:
+            job.on_done(job)
+
+    def _frame(self, dt):
+        deadline = time.perf_counter() + self.budget
+        for key, job in list(self.jobs.items()):
+            if job.owner_left():
+                # The user moved on; nobody will see the rest of this list
+                job.cancelled = True
+                del self.jobs[key]
+                continue
+            try:
+                while time.perf_counter() < deadline:
+                    if not job.step():
+                        del self.jobs[key]
+                        self._finish(job)
+                        break
+            except Exception as e:
+                print(f"Error rendering list: {e}")
+                job.cancelled = True
+                self.jobs.pop(key, None)
+            if time.perf_counter() >= deadline:
+                break
+        if not self.jobs:
+            self._event = None
+            return False
+
+
+_renderer = None
+
+
+def renderer() -> ProgressiveRenderer:
+    """The renderer every list screen shares"""
+    global _renderer
+    if _renderer is None:
+        _renderer = ProgressiveRenderer()
+    return _renderer
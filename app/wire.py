@@ -0,0 +1,307 @@
+"""
+Compact columnar record format for Voltmatic Energy Solutions Site Survey App
+
+Batches of dict rows (as returned by DatabaseManager) are stored column by
+column instead of as repeated JSON objects:
+
+    packet  = b'VREC' <u32 body length> zlib(body)
+    body    = <u32 rows> <u16 columns> column*
+    column  = <u16 name length> name <u8 kind> null bitmap payload
+
+Integers and floats are packed arrays, low-cardinality strings such as
+`property_type`, `roof_type`, `system_type` and `status` are stored once in
+a dictionary with one index byte per row, other strings and blobs as
+lengths plus one concatenated payload. A stream is any number of packets back to back, so large
+tables are written and read one batch at a time.
+
+Run `python -m app.wire --db data/voltmatic.db` to compare against JSON.
+"""
+import argparse
+import io
+import json
+import sqlite3
+import struct
+import sys
+import time
+import zlib
+from array import array
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b'VREC'
+BATCH_SIZE = 1000
+COMPRESSION_LEVEL = 6
+
+# Column kinds
+NULL, INTEGER, REAL, TEXT, DICTIONARY, JSON, BLOB = range(7)
+
+# Strings with at most this many distinct values (and repeats) use a dictionary
+MAX_DICTIONARY_SIZE = 255
+
+_U32 = struct.Struct('<I')
+_HEADER = struct.Struct('<IH')
+_NAME = struct.Struct('<H')
+
+_BIG_ENDIAN = sys.byteorder == 'big'
+
+
+class WireError(ValueError):
+    """Raised for data that is not a valid record packet"""
+
+
+def _packed(typecode: str, values) -> bytes:
+    data = array(typecode, values)
+    if _BIG_ENDIAN:
+        data.byteswap()
+    return data.tobytes()
+
+
+def _unpacked(typecode: str, buffer: memoryview, count: int, offset: int) -> Tuple[array, int]:
+    data = array(typecode)
+    end = offset + count * data.itemsize
+    data.frombytes(buffer[offset:end])
+    if _BIG_ENDIAN:
+        data.byteswap()
+    return data, end
+
+
+def _column_kind(values: List) -> int:
+    kinds = {type(value) for value in values if value is not None}
+    if not kinds:
+        return NULL
+    if kinds <= {int, bool}:
+        return INTEGER if all(-2 ** 63 <= value < 2 ** 63 for value in values if value is not None) else JSON
+    if kinds <= {int, float}:
+        # Doubles hold integers exactly only up to 2**53; larger ones go as JSON
+        exact = all(int(float(value)) == value for value in values if value.__class__ is int)
+        return REAL if exact else JSON
+    if kinds == {str}:
+        distinct = set(values)
+        distinct.discard(None)
+        if len(distinct) <= MAX_DICTIONARY_SIZE and len(distinct) * 2 <= len(values):
+            return DICTIONARY
+        return TEXT
+    if kinds == {bytes}:
+        return BLOB
+    return JSON
+
+
+def _encode_column(kind: int, values: List) -> bytes:
+    present = [value for value in values if value is not None]
+    if kind == NULL:
+        return b''
+    if kind == INTEGER:
+        return _packed('q', present)
+    if kind == REAL:
+        return _packed('d', present)
+    if kind == DICTIONARY:
+        entries = list(dict.fromkeys(present))
+        index = {value: position for position, value in enumerate(entries)}
+        encoded = [entry.encode('utf-8') for entry in entries]
+        return (bytes([len(entries)]) + _packed('I', [len(entry) for entry in encoded]) + b''.join(encoded)
+                + bytes(index[value] for value in present))
+    if kind == JSON:
+        present = [json.dumps(value, separators=(',', ':')) for value in present]
+    encoded = present if kind == BLOB else [value.encode('utf-8') for value in present]
+    return _packed('I', [len(value) for value in encoded]) + b''.join(encoded)
+
+
+def _null_bitmap(values: List) -> bytes:
+    bitmap = bytearray((len(values) + 7) // 8)
+    for position, value in enumerate(values):
+        if value is None:
+            bitmap[position >> 3] |= 1 << (position & 7)
+    return bytes(bitmap)
+
+
+def encode_batch(records: List[Dict], columns: Optional[List[str]] = None,
+                 level: int = COMPRESSION_LEVEL) -> bytes:
+    """Encode one batch of dict rows as a packet
+
+    Columns default to every key in order of first appearance; rows missing
+    a key store NULL for it.
+    """
+    if columns is None:
+        columns = list(dict.fromkeys(key for record in records for key in record))
+    parts = [_HEADER.pack(len(records), len(columns))]
+    for column in columns:
+        values = [record.get(column) for record in records]
+        kind = _column_kind(values)
+        name = column.encode('utf-8')
+        parts += [_NAME.pack(len(name)), name, bytes([kind]), _null_bitmap(values), _encode_column(kind, values)]
+    body = zlib.compress(b''.join(parts), level)
+    return MAGIC + _U32.pack(len(body)) + body
+
+
+def _read_strings(buffer: memoryview, count: int, offset: int, binary: bool = False) -> Tuple[List, int]:
+    lengths, offset = _unpacked('I', buffer, count, offset)
+    strings = []
+    for length in lengths:
+        value = buffer[offset:offset + length]
+        strings.append(bytes(value) if binary else str(value, 'utf-8'))
+        offset += length
+    return strings, offset
+
+
+def decode_body(body: bytes) -> List[Dict]:
+    """Decode an uncompressed packet body into dict rows"""
+    buffer = memoryview(body)
+    try:
+        rows, column_count = _HEADER.unpack_from(buffer, 0)
+        offset = _HEADER.size
+        names, columns = [], []
+        for _ in range(column_count):
+            (length,) = _NAME.unpack_from(buffer, offset)
+            offset += _NAME.size
+            names.append(str(buffer[offset:offset + length], 'utf-8'))
+            offset += length
+            kind = buffer[offset]
+            offset += 1
+
+            bitmap = bytes(buffer[offset:offset + (rows + 7) // 8])
+            offset += len(bitmap)
+            nulls = None
+            count = rows
+            if any(bitmap):
+                nulls = [bool(bitmap[row >> 3] & (1 << (row & 7))) for row in range(rows)]
+                count = rows - sum(nulls)
+
+            if kind == NULL:
+                present = []
+            elif kind == INTEGER:
+                present, offset = _unpacked('q', buffer, count, offset)
+            elif kind == REAL:
+                present, offset = _unpacked('d', buffer, count, offset)
+            elif kind == DICTIONARY:
+                size = buffer[offset]
+                entries, offset = _read_strings(buffer, size, offset + 1)
+                present = [entries[index] for index in buffer[offset:offset + count]]
+                offset += count
+            elif kind in (TEXT, JSON):
+                present, offset = _read_strings(buffer, count, offset)
+                if kind == JSON:
+                    present = [json.loads(value) for value in present]
+            elif kind == BLOB:
+                present, offset = _read_strings(buffer, count, offset, binary=True)
+            else:
+                raise WireError(f"Unknown column kind {kind}")
+
+            if nulls is None:
+                columns.append(present)
+            else:
+                values = iter(present)
+                columns.append([None if null else next(values) for null in nulls])
+    except (struct.error, IndexError, UnicodeDecodeError, StopIteration) as e:
+        raise WireError(f"Corrupt record packet: {e}")
+
+    return [dict(zip(names, row)) for row in zip(*columns)] if columns else [{} for _ in range(rows)]
+
+
+def decode_batch(packet: bytes) -> List[Dict]:
+    """Decode a single packet produced by encode_batch"""
+    if packet[:4] != MAGIC:
+        raise WireError("Not a record packet")
+    (length,) = _U32.unpack_from(packet, 4)
+    body = packet[8:8 + length]
+    if len(body) != length:
+        raise WireError("Truncated record packet")
+    return decode_body(zlib.decompress(body))
+
+
+def iter_packets(records: Iterable[Dict], batch_size: int = BATCH_SIZE,
+                 columns: Optional[List[str]] = None) -> Iterator[bytes]:
+    """Encode rows lazily, one packet per batch"""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield encode_batch(batch, columns)
+            batch = []
+    if batch:
+        yield encode_batch(batch, columns)
+
+
+def write_records(stream: BinaryIO, records: Iterable[Dict], batch_size: int = BATCH_SIZE,
+                  columns: Optional[List[str]] = None) -> int:
+    """Write rows to a binary stream in batches; returns the number of bytes written"""
+    written = 0
+    for packet in iter_packets(records, batch_size, columns):
+        stream.write(packet)
+        written += len(packet)
+    return written
+
+
+def read_batches(stream: BinaryIO) -> Iterator[List[Dict]]:
+    """Read packets from a binary stream, yielding each batch of rows"""
+    while True:
+        header = stream.read(8)
+        if not header:
+            return
+        if len(header) < 8 or header[:4] != MAGIC:
+            raise WireError("Not a record stream")
+        (length,) = _U32.unpack_from(header, 4)
+        body = stream.read(length)
+        if len(body) != length:
+            raise WireError("Truncated record packet")
+        yield decode_body(zlib.decompress(body))
+
+
+def read_records(stream: BinaryIO) -> Iterator[Dict]:
+    """Read rows from a binary stream one at a time"""
+    for batch in read_batches(stream):
+        yield from batch
+
+
+def compare_with_json(records: List[Dict], repeat: int = 5) -> Dict:
+    """Size and best-of-`repeat` encode/decode times for this format and JSON"""
+    def best(function) -> float:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def encode_wire() -> bytes:
+        stream = io.BytesIO()
+        write_records(stream, records)
+        return stream.getvalue()
+
+    wire = encode_wire()
+    plain_json = json.dumps(records, separators=(',', ':')).encode('utf-8')
+    zipped_json = zlib.compress(plain_json, COMPRESSION_LEVEL)
+    return {
+        'records': len(records),
+        'wire': {
+            'bytes': len(wire),
+            'encode_ms': best(encode_wire) * 1000,
+            'decode_ms': best(lambda: list(read_records(io.BytesIO(wire)))) * 1000,
+        },
+        'json': {
+            'bytes': len(plain_json),
+            'encode_ms': best(lambda: json.dumps(records, separators=(',', ':')).encode('utf-8')) * 1000,
+            'decode_ms': best(lambda: json.loads(plain_json)) * 1000,
+        },
+        'json_zlib': {
+            'bytes': len(zipped_json),
+            'encode_ms': best(lambda: zlib.compress(
+                json.dumps(records, separators=(',', ':')).encode('utf-8'), COMPRESSION_LEVEL)) * 1000,
+            'decode_ms': best(lambda: json.loads(zlib.decompress(zipped_json))) * 1000,
+        },
+    }
+
+
+def main(argv: Optional[Tuple[str, ...]] = None):
+    parser = argparse.ArgumentParser(description="Compare the record format with JSON on a table")
+    parser.add_argument('--db', default='data/voltmatic.db', help="SQLite database to read rows from")
+    parser.add_argument('--table', default='site_surveys')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with sqlite3.connect(args.db) as conn:
+        conn.row_factory = sqlite3.Row
+        records = [dict(row) for row in conn.execute(f"SELECT * FROM {args.table}")]
+    print(json.dumps(compare_with_json(records, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -13,7 +13,7 @@ package.domain = org.voltmatic
 source.dir = .
 
 # (list) Source files to include (let empty to include all the files)
-source.include_exts = py,png,jpg,kv,atlas
+source.include_exts = py,png,jpg,kv,atlas,bin
 
 # (str) Application versioning (method 1)
 version = 0.1
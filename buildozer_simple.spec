@@ -3,7 +3,7 @@ title = Voltmatic App
 package.name = voltmaticapp
 package.domain = org.voltmatic
 source.dir = .
-source.include_exts = py,png,jpg,kv,atlas
+source.include_exts = py,png,jpg,kv,atlas,bin
 version = 0.1
 requirements = python3,kivy
 orientation = portrait
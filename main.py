@@ -9,6 +9,7 @@ from kivy.lang import Builder
 from kivymd.app import MDApp
 from kivy.core.window import Window
 from kivy.utils import platform
+from kivy.clock import Clock
 from kivy.uix.screenmanager import ScreenManager
 from kivymd.uix.navigationdrawer import MDNavigationLayout
 from kivymd.uix.boxlayout import MDBoxLayout
@@ -40,6 +41,12 @@ class VoltmaticApp(MDApp):
         # Initialize components
         self.screen_manager = None
         self.db = None
+        self.reminders = None
+        self.query_recorder = None
+        self.diagnostics = None
+        self.memory_profiler = None
+        self.maintenance = None
+        self.backups = None
         
     def build(self):
         # Load KV files
@@ -53,9 +60,46 @@ class VoltmaticApp(MDApp):
         from app.screens.client_form_screen import ClientFormScreen
         from app.screens.surveys_list_screen import SurveysListScreen
         from app.screens.call_history_screen import CallHistoryScreen
+        from app.screens.client_timeline_screen import ClientTimelineScreen
         
-        # Initialize database
-        self.db = DatabaseManager()
+        # VOLTMATIC_PROFILE=1 records every database call; dumped on pause
+        if os.environ.get('VOLTMATIC_PROFILE'):
+            from app.instrumentation import QueryRecorder, install
+            self.query_recorder = install(QueryRecorder(
+                slow_log=os.path.join(self.user_data_dir, 'slow-queries.jsonl')
+            ))
+        
+        # Initialize database; VOLTMATIC_DB_MODE=mirror serves queries from RAM
+        from app.storage import FLUSH_INTERVAL_SECONDS
+        self.db = DatabaseManager(
+            os.environ.get('VOLTMATIC_DB'),
+            mode=os.environ.get('VOLTMATIC_DB_MODE', 'file')
+        )
+        if self.db.mirror:
+            Clock.schedule_interval(lambda dt: self.db.flush(), FLUSH_INTERVAL_SECONDS)
+        
+        # Follow-up reminders fire from a heap of due dates, not by polling
+        from app.reminders import FollowUpScheduler, notify_follow_up
+        self.reminders = FollowUpScheduler(self.db, notify_follow_up)
+        self.reminders.start()
+        
+        # Vacuum, statistics and WAL checkpoints once the user leaves the app idle
+        from app.maintenance import DatabaseMaintenance, MaintenanceScheduler
+        self.maintenance = MaintenanceScheduler(
+            DatabaseMaintenance(self.db.db_path),
+            log_path=os.path.join(self.user_data_dir, 'maintenance.jsonl')
+        )
+        self.maintenance.bind_input(Window)
+        self.maintenance.start()
+        
+        # Daily snapshot on a worker thread; mirror mode backs up the RAM copy
+        if self.db.disk_path:
+            from app.backup import BackupManager, backup_directory
+            self.backups = BackupManager(
+                self.db.db_path,
+                os.environ.get('VOLTMATIC_BACKUP_DIR') or backup_directory(self.db.disk_path)
+            )
+            self.backups.create_if_due()
         
         # Create screen manager
         self.screen_manager = ScreenManager()
@@ -67,11 +111,25 @@ class VoltmaticApp(MDApp):
         self.screen_manager.add_widget(SurveyScreen(name='survey'))
         self.screen_manager.add_widget(SurveysListScreen(name='surveys_list'))
         self.screen_manager.add_widget(CallHistoryScreen(name='call_history'))
+        self.screen_manager.add_widget(ClientTimelineScreen(name='client_timeline'))
         
         
         # Set initial screen
         self.screen_manager.current = 'home'
         
+        # Frame-time overlay: VOLTMATIC_DIAGNOSTICS=1, or triple tap the top-left corner
+        from app.diagnostics import Diagnostics
+        self.diagnostics = Diagnostics(self)
+        self.diagnostics.bind_gesture(Window)
+        if os.environ.get('VOLTMATIC_DIAGNOSTICS'):
+            Clock.schedule_once(lambda dt: self.diagnostics.toggle(), 0)
+        
+        # VOLTMATIC_MEMORY=1 snapshots memory and widget counts on every screen change
+        if os.environ.get('VOLTMATIC_MEMORY'):
+            from app.diagnostics import MemoryProfiler
+            self.memory_profiler = MemoryProfiler(self)
+            self.memory_profiler.start()
+        
         return self.screen_manager
     
     def load_kv_files(self):
@@ -83,6 +141,7 @@ class VoltmaticApp(MDApp):
             'app/screens/survey_screen.kv',
             'app/screens/client_form_screen.kv',
             'app/screens/call_history_screen.kv',
+            'app/screens/client_timeline_screen.kv',
             'app/widgets/client_card.kv',
             'app/widgets/survey_form.kv'
         ]
@@ -91,13 +150,49 @@ class VoltmaticApp(MDApp):
             if os.path.exists(kv_file):
                 Builder.load_file(kv_file)
     
+    def dump_query_profile(self):
+        """Write recorded database calls to query-profile.json in the data directory"""
+        if self.query_recorder:
+            return self.query_recorder.dump(os.path.join(self.user_data_dir, 'query-profile.json'))
+        return None
+    
     def on_pause(self):
         """Handle app pause (Android)"""
+        # The OS may kill a paused app without calling on_stop, so save
+        # the data before the slower maintenance pass
+        if self.db:
+            self.db.flush()
+        if self.maintenance:
+            self.maintenance.stop()
+            self.maintenance.on_pause()
+        self.dump_query_profile()
+        if self.diagnostics:
+            self.diagnostics.save()
         return True
     
     def on_resume(self):
         """Handle app resume (Android)"""
-        pass
+        # Clock events don't advance while paused; re-arm from the current time
+        if self.reminders:
+            self.reminders.start()
+        if self.maintenance:
+            self.maintenance.start()
+    
+    def on_stop(self):
+        """Handle app shutdown"""
+        if self.reminders:
+            self.reminders.stop()
+        if self.maintenance:
+            self.maintenance.close()
+        if self.backups:
+            self.backups.close()
+        if self.memory_profiler:
+            self.memory_profiler.stop()
+        if self.db:
+            self.db.close()
+        self.dump_query_profile()
+        if self.diagnostics:
+            self.diagnostics.save()
 
 if __name__ == '__main__':
     # Create necessary directories